@@ -0,0 +1,92 @@
+"""
+Arrival process of the merchants entering the area of interest.
+Arrivals follow a non-homogeneous Poisson process with an hour-of-day intensity profile.
+The schedule (arrival times, models and entry points) is sampled ahead in chunks, ships are created from it on demand.
+"""
+import numpy as np
+
+import constants
+from scenario import ScenarioConfig
+
+MERCHANT_MODELS = ["Cargo", "Bulk", "Container"]
+
+
+class ArrivalSchedule:
+    def __init__(self, start_time: float = 0, chunk_length: float = None, scenario: ScenarioConfig = None):
+        """
+        :param start_time: World time from which arrivals are sampled
+        :param chunk_length: Number of hours sampled at once
+        :param scenario: Scenario with the arrival means and profile, the default scenario if not provided
+        """
+        if chunk_length is None:
+            chunk_length = constants.ARRIVAL_SCHEDULE_CHUNK
+        if scenario is None:
+            scenario = ScenarioConfig()
+        self.chunk_length = chunk_length
+
+        daily_means = np.array([scenario.cargo_daily_arrival_mean,
+                                scenario.bulk_daily_arrival_mean,
+                                scenario.container_daily_arrival_mean]) * scenario.arrival_rate_multiplier
+        self.hourly_rate = daily_means.sum() / 24
+        self.model_probabilities = daily_means / daily_means.sum()
+
+        # Intensity relative to the mean rate per hour of the day
+        profile = np.array(scenario.arrival_hourly_profile, dtype=float)
+        self.hourly_intensity = profile / profile.mean()
+
+        self.times = np.empty(0)
+        self.models = np.empty(0, dtype=int)
+        self.entry_longitudes = np.empty(0)
+        self.next_index = 0
+        self.sampled_until = start_time
+
+    def arrival_rate(self, times: np.ndarray) -> np.ndarray:
+        """
+        :param times: Array of world times
+        :return: Arrival rate (ships per hour) at each time
+        """
+        hours = np.floor(times % 24).astype(int)
+        return self.hourly_rate * self.hourly_intensity[hours]
+
+    def sample_chunk(self) -> None:
+        """
+        Samples all arrivals in the next chunk of time by thinning a homogeneous process at the maximum rate.
+        Arrivals that have already been handed out are dropped from the schedule.
+        """
+        start_time = self.sampled_until
+        end_time = start_time + self.chunk_length
+        max_rate = self.hourly_rate * self.hourly_intensity.max()
+
+        number_of_candidates = np.random.poisson(max_rate * self.chunk_length)
+        candidate_times = np.sort(np.random.uniform(start_time, end_time, number_of_candidates))
+        accepted = np.random.uniform(0, 1, number_of_candidates) < self.arrival_rate(candidate_times) / max_rate
+        times = candidate_times[accepted]
+
+        models = np.random.choice(len(MERCHANT_MODELS), size=len(times), p=self.model_probabilities)
+        entry_longitudes = np.random.uniform(constants.MIN_LONG, constants.MAX_LONG, len(times))
+
+        self.times = np.concatenate([self.times[self.next_index:], times])
+        self.models = np.concatenate([self.models[self.next_index:], models])
+        self.entry_longitudes = np.concatenate([self.entry_longitudes[self.next_index:], entry_longitudes])
+        self.next_index = 0
+        self.sampled_until = end_time
+
+    def next_arrival_time(self) -> float:
+        while self.next_index >= len(self.times):
+            self.sample_chunk()
+        return self.times[self.next_index]
+
+    def pop_arrivals(self, time: float) -> list:
+        """
+        Takes all arrivals up to the given time from the schedule.
+        :param time: Current world time
+        :return: List of (arrival time, model, entry longitude)
+        """
+        while self.sampled_until < time:
+            self.sample_chunk()
+
+        end_index = int(np.searchsorted(self.times, time, side="right"))
+        arrivals = [(self.times[i], MERCHANT_MODELS[self.models[i]], self.entry_longitudes[i])
+                    for i in range(self.next_index, end_index)]
+        self.next_index = max(self.next_index, end_index)
+        return arrivals
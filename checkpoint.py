@@ -0,0 +1,99 @@
+"""
+Checkpoints of the full simulation state.
+A checkpoint contains the world (receptor arrays, vessels, drones, routes, event calendar and world time),
+the states of the random number generators and the id counters of the modules. Plot artists are excluded.
+A run can be resumed from a checkpoint, or forked into multiple branches by reseeding the random number generators.
+"""
+import contextlib
+import gzip
+import pickle
+import random
+import sys
+
+import numpy as np
+
+import constants
+import drones
+import points
+import ships
+from telemetry import TelemetryWriter
+
+from log_setup import get_logger
+
+logger = get_logger("CHECKPOINT")
+
+CHECKPOINT_VERSION = 1
+
+# The world is a densely linked structure (world, ships, drones and routes refer to each other), pickling it
+# recurses deeply
+PICKLE_RECURSION_LIMIT = 100_000
+
+
+@contextlib.contextmanager
+def raised_recursion_limit():
+    """
+    Raises the recursion limit to PICKLE_RECURSION_LIMIT, the previous limit is restored on exit, also on errors.
+    :return:
+    """
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, PICKLE_RECURSION_LIMIT))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def save_checkpoint(world, path: str) -> None:
+    """
+    Saves the state of the world and the random number generators to a compressed file.
+    :param world:
+    :param path:
+    :return:
+    """
+    state = {"version": CHECKPOINT_VERSION,
+             "world": world,
+             "random_state": random.getstate(),
+             "numpy_random_state": np.random.get_state(),
+             "ship_id": ships.ship_id,
+             "uav_id": drones.uav_id,
+             "unique_point_id": points.unique_point_id}
+
+    with raised_recursion_limit():
+        with gzip.open(path, "wb", compresslevel=constants.CHECKPOINT_COMPRESSION_LEVEL) as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+    logger.info("Saved checkpoint at time % .3f to %s", world.world_time, path)
+
+
+def load_checkpoint(path: str, seed: int = None, telemetry_directory: str = None):
+    """
+    Restores a world from a checkpoint.
+    :param path:
+    :param seed: Reseeds the random number generators after restoring, to fork the run into a different branch.
+    Continues the original random streams if not provided.
+    :param telemetry_directory: Directory to record the telemetry of the restored run to, not recorded if not provided
+    :return: The restored world
+    """
+    with raised_recursion_limit():
+        with gzip.open(path, "rb") as file:
+            state = pickle.load(file)
+
+    if state["version"] != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint {path} has version {state['version']}, expected {CHECKPOINT_VERSION}")
+
+    ships.ship_id = state["ship_id"]
+    drones.uav_id = state["uav_id"]
+    points.unique_point_id = state["unique_point_id"]
+
+    if seed is None:
+        random.setstate(state["random_state"])
+        np.random.set_state(state["numpy_random_state"])
+    else:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    world = state["world"]
+    if constants.PLOTTING_MODE or constants.DEBUG_MODE:
+        world.restore_plot()
+    if telemetry_directory is not None:
+        world.telemetry = TelemetryWriter(world, directory=telemetry_directory)
+    return world
@@ -6,6 +6,7 @@ DEBUG_MODE = True
 PLOTTING_MODE = True
 
 RECEPTOR_PLOT_PARAMETER = "sea_states"  # ["sea_states", "pheromones"]
+LOG_LEVEL = "WARNING"  # Level of the log file, "DEBUG" logs every decision of the agents
 
 # ---- PERFORMANCE MEASURING ----
 
@@ -23,13 +24,50 @@ time_spent_launching_drones = 0
 
 time_spent_selecting_receptors = 0
 
+# ---- TELEMETRY ----
+RECORD_TELEMETRY = False
+TELEMETRY_DIRECTORY = "telemetry"
+TELEMETRY_CHUNK_STEPS = 500  # Steps buffered in memory before a chunk is written to disk
+TELEMETRY_GRID_INTERVAL = 5  # Steps between snapshots of the full receptor grid
+TELEMETRY_QUEUE_SIZE = 4  # Chunks waiting to be written before the simulation waits on the writer
+TELEMETRY_PHEROMONE_THRESHOLD = 1  # Pheromone level counted as covered in the summary statistics
+
+# ---- CHECKPOINTS ----
+CHECKPOINT_INTERVAL = None  # Steps between checkpoints written by World.run, no checkpoints if None
+CHECKPOINT_DIRECTORY = "checkpoints"
+CHECKPOINT_COMPRESSION_LEVEL = 3
+
 # ---- World Constants ----
 WEATHER_RESAMPLING_TIME_SPLIT = 1
 
+# Discrete-event mode: periods in which all entities are in straight-line transit are jumped to the next event.
+# Ships are still moved every step, so this only saves time in idle periods without patrolling drones
+DISCRETE_EVENT_MODE = False
+
 CARGO_DAILY_ARRIVAL_MEAN = 30
 BULK_DAILY_ARRIVAL_MEAN = 30
 CONTAINER_DAILY_ARRIVAL_MEAN = 30
 
+# Scales all arrival means. The default keeps the earlier rate of a 1 % chance of an arrival per 0.2 h step
+# (1.2 ships a day), set it to 1 to get the daily means above, e.g. for saturation studies
+ARRIVAL_RATE_MULTIPLIER = 1.2 / (CARGO_DAILY_ARRIVAL_MEAN + BULK_DAILY_ARRIVAL_MEAN + CONTAINER_DAILY_ARRIVAL_MEAN)
+ARRIVAL_HOURLY_PROFILE = [1] * 24  # Relative arrival intensity per hour of the day
+ARRIVAL_SCHEDULE_CHUNK = 24 * 7  # Hours of arrivals sampled ahead at once
+
+VECTORIZED_SHIP_MOVEMENT = True  # Move all ships in a single array operation instead of one by one
+
+MERCHANT_ENTRY_BANDS = 20  # Number of bands on the entry edge for which merchant routes are precomputed
+SHORTEST_PATH_TREES = False  # Route to docks and airbases over precomputed shortest-path trees of a visibility graph
+HIERARCHICAL_ROUTING = False  # Plan routes to other points over gateways around and between clusters of islands
+ISLAND_CLUSTER_DISTANCE = 1.0  # Largest gap between islands in the same cluster in degrees
+GATEWAY_OFFSET = 0.1  # Distance of the gateways to the convex hull of their cluster in degrees
+GRID_ROUTING = False  # Estimate routes (e.g. the endurance checks of UAVs) with Theta* on an obstacle raster
+GRID_ROUTING_RESOLUTION = 0.25  # Cell size of the obstacle raster in degrees
+GRID_ROUTING_MIN_VERTICES = 2000  # Fewer polygon vertices are routed faster by the exact planners, 0 always uses Theta*
+COASTLINE_LOD = False  # Reject routing and containment queries far from the coast on a coarse outline of each landmass
+COASTLINE_BUFFER = 0.05  # Outward buffer of the coarse outlines in degrees
+COASTLINE_SIMPLIFY_TOLERANCE = 0.04  # Simplification tolerance of the coarse outlines, below the buffer
+
 MIN_LAT = 110
 MAX_LAT = 150
 
@@ -41,6 +79,9 @@ GRID_HEIGHT = GRID_WIDTH
 
 PLOT_SIZE = 7
 
+CACHE_STATIC_MASKS = True  # Cache the land and AoI masks of the receptor grid on disk
+STATIC_MASK_CACHE_DIRECTORY = "cache"
+
 LAT_GRID_EXTRA = 6
 LONG_GRID_EXTRA = 6
 
@@ -72,6 +113,12 @@ japan_engagement = "never_attack"  # ["never_attack",  "attack_territorial", "at
 
 # ---- Pheromone ----
 PHEROMONE_DEPRECIATION_FACTOR_PER_TIME_DELTA = 0.99
+PHEROMONE_DIFFUSION = False  # Diffuse pheromones over the grid and steer patrols on the local concentration
+PHEROMONE_DIFFUSION_RATE = 0.5  # Fraction of the difference exchanged with each adjacent receptor per hour
+PHEROMONE_DIFFUSION_MAX_RATE = 0.2  # Largest fraction per sub-step, the 5-point stencil is unstable above 0.25
+PHEROMONE_PYRAMID = False  # Approximate the CoP of patrol candidates from a pyramid of coarser pheromone summaries
+PHEROMONE_PYRAMID_THETA = 0.5  # Largest ratio of block size to distance at which a block of receptors is summarised
+PHEROMONE_SUMMED_AREA = False  # Select patrol starts from window sums of a summed-area table of the pheromones
 RECEPTOR_RADIUS_MULTIPLIER = 10
 
 # ---- GEO Constants ----
@@ -79,12 +126,14 @@ EXPANSION_PARAMETER = 0.001  # Parameter to slightly extend polygons to prevent
 
 LATITUDE_CONVERSION_FACTOR = 110.574
 LONGITUDE_CONVERSION_FACTOR = 111.320
+METRIC_PROJECTION = False  # Measure distances on a local km plane around the centre of the AoI, geometry stays lon/lat
 
 STANDARD_ROUTE_COLOR = "red"
 
 # ---- UAV Parameters ----
 UAV_HEALTH = 100
 MAX_TRAILING_DISTANCE = 0.01
+TRAIL_REPLAN_TOLERANCE = 25  # Distance (km) a trailed ship can move before the pursuit route is re-planned
 
 SAFETY_ENDURANCE = 0.1
 
@@ -220,6 +269,7 @@ UAV_MODELS = [{"name": "WLI_GJI",
 # ---- Detection Parameters ----
 UAV_MOVEMENT_SPLITS_P_H = 24  # (24 is at least 2 every 5 mins) Splits per hour - gets recalculated per timedelta
 PATROL_LOCATIONS = 10  # Number of locations to sample and compare
+PATROL_WINDOW_CANDIDATES = 500  # Number of locations compared when using the summed-area table
 
 K_CONSTANT = 39_633
 
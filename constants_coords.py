@@ -151,3 +151,25 @@ CHINA_POINTS = [Point(18.50888529440916, 108.69305618407309, lon_lat=True),
                 Point(39.89547663058136, 124.25596777932132, lon_lat=True),
                 Point(41.89547663058136, 124.25596777932132, lon_lat=True),
                 Point(41.89547663058136, 108.69305618407309, lon_lat=True),]
+
+# Landmasses acting as obstacles (name, outline, color), China is kept separately as it is not an obstacle
+LANDMASSES = [("taiwan", TAIWAN_POINTS, TAIWAN_COLOR),
+              ("orchid_island", ORCHID_ISLAND_POINTS, TAIWAN_COLOR),
+              ("green_island", GREEN_ISLAND_POINTS, TAIWAN_COLOR),
+              ("penghu", PENGHU_COUNTRY_POINTS, TAIWAN_COLOR),
+              ("wangan", WANGAN_POINTS, TAIWAN_COLOR),
+              ("qimei", QIMEI_POINTS, TAIWAN_COLOR),
+              ("yonaguni", YONAGUNI_POINTS, JAPAN_COLOR),
+              ("taketomi", TAKETOMI_POINTS, JAPAN_COLOR),
+              ("ishigaki", ISHIGAKE_POINTS, JAPAN_COLOR),
+              ("miyakojima", MIYAKOJIMA_POINTS, JAPAN_COLOR),
+              ("okinawa", OKINAWA_POINTS, JAPAN_COLOR),
+              ("okinoerabujima", OKINOERABUJIMA_POINTS, JAPAN_COLOR),
+              ("tokunoshima", TOKUNOSHIMA_POINTS, JAPAN_COLOR),
+              ("amami_oshima", AMAMI_OSHIMA_POINTS, JAPAN_COLOR),
+              ("yakushima", YAKUSHIMA_POINTS, JAPAN_COLOR),
+              ("tanegashima", TANEGASHIMA_POINTS, JAPAN_COLOR),
+              ("japan", JAPAN_POINTS, JAPAN_COLOR),
+              ]
+
+CHINA = ("china", CHINA_POINTS, CHINA_COLOR)
@@ -4,23 +4,19 @@ import math
 import copy
 
 import constants
+import events
+import general_maths
 import routes
 from points import Point
-from routes import create_route
+from routes import Route, create_route
 from general_maths import calculate_distance, calculate_direction_vector
 from ships import Ship
 
 import time
 
-import os
-import logging
-import datetime
+from log_setup import get_logger
 
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("UAV")
-logger.setLevel(logging.DEBUG)
+logger = get_logger("UAV")
 
 uav_id = 0
 
@@ -54,7 +50,7 @@ class DroneType:
                     drone_launched = True
                     break
             if not drone_launched:
-                logger.debug(f"No drones of type {self.name} available for launch. Can not satisfy utilization rate")
+                logger.debug("No drones of type %s available for launch. Can not satisfy utilization rate", self.name)
                 return
 
     def calculate_utilization_rate(self) -> None:
@@ -71,6 +67,15 @@ class DroneType:
         else:
             return False
 
+    def can_launch(self) -> bool:
+        """
+        Checks if a drone of this type would be launched in the next step
+        :return:
+        """
+        if self.reached_utilization_rate():
+            return False
+        return any([drone.grounded and not drone.under_maintenance for drone in self.drones])
+
 
 class Drone:
     def __init__(self, model: str, drone_type: DroneType, world, airbase,
@@ -112,6 +117,9 @@ class Drone:
         self.maintenance_time = None
         self.time_maintenance_finish = 0
 
+        # Discrete-event mode: event at which the current straight-line transit ends
+        self.transit_event = None
+
         self.name = model
 
         # Model inherited properties
@@ -141,9 +149,15 @@ class Drone:
     def __str__(self):
         return f"Drone {self.uav_id} at {self.location}. Status: Grounded? {self.grounded}, Trailing? {self.trailing}"
 
+    def __getstate__(self):
+        # Plot artists are not part of the state, they are recreated when the world is plotted again
+        state = self.__dict__.copy()
+        state.update(ax=None, marker=None, route_plot=None, radius_patch=None, text=None)
+        return state
+
     def make(self, model: str) -> None:
-        logger.debug(f"Initiating drone of type {model}.")
-        for blueprint in constants.UAV_MODELS:
+        logger.debug("Initiating drone of type %s.", model)
+        for blueprint in self.world.scenario.uav_models:
             if blueprint['name'] == model:
                 self.speed = blueprint['speed']
                 self.vulnerability = blueprint['vulnerability']
@@ -172,23 +186,70 @@ class Drone:
         remaining_endurance = self.endurance - self.time_spent_airborne
 
         # Check heuristically - to prevent route creation for all instances
-        dist_to_base = self.location.distance_to_point(self.base.location)
+        dist_to_base = self.location.distance_to_point(self.base.location, self.world.projection)
         required_endurance_max = (1.5 * dist_to_base) / self.speed
         if required_endurance_max < remaining_endurance:
             return True
 
-        logger.debug(f"Creating route to base for UAV {self.uav_id} at ({self.location.x}, {self.location.y}) "
-                     f"from {self.location} to {self.base.location}")
-        base_route = create_route(self.location, self.base.location, self.polygons_to_avoid)
+        logger.debug("Creating route to base for UAV %s at (%s, %s) from %s to %s", self.uav_id, self.location.x,
+                     self.location.y, self.location, self.base.location)
+        base_route = self.plan_route(self.location, self.base.location, estimate=True)
         time_required_to_return = np.ceil(base_route.length / self.speed)
 
         # logger.debug(f"UAV {self.uav_id} - remaining endurance: {remaining_endurance}, "
         #              f"time to return: {time_required_to_return}")
-        if remaining_endurance * (1 + constants.SAFETY_ENDURANCE) <= time_required_to_return:
+        if remaining_endurance * (1 + self.world.scenario.safety_endurance) <= time_required_to_return:
             return False
         else:
             return True
 
+    def route_time_remaining(self) -> float:
+        """
+        Time required to reach the end of the current route
+        :return:
+        """
+        if self.next_point is None:
+            return 0
+        route_points = [self.location, self.next_point] + self.remaining_points
+        remaining_distance = sum([a.distance_to_point(b, self.world.projection)
+                                  for a, b in zip(route_points, route_points[1:])])
+        return remaining_distance / self.speed
+
+    def transit_time_remaining(self) -> float:
+        """
+        Time the drone can stay in straight-line transit without any decisions being required.
+        Routing to base, this is until the base is reached.
+        Routing to the start location, this is until the end of the route or until the heuristic of can_continue
+        could fail. During the transit the distance to base is at most the current distance plus the remaining
+        route length, so the check is guaranteed to pass before that time.
+        :return:
+        """
+        time_to_end_of_route = self.route_time_remaining()
+        if self.routing_to_base:
+            return time_to_end_of_route
+
+        remaining_endurance = self.endurance - self.time_spent_airborne
+        max_dist_to_base = (self.location.distance_to_point(self.base.location, self.world.projection)
+                            + time_to_end_of_route * self.speed)
+        time_until_return_check = remaining_endurance - (1.5 * max_dist_to_base) / self.speed - self.world.time_delta
+        return max(0, min(time_to_end_of_route, time_until_return_check))
+
+    def fast_forward(self, steps: int, depreciation_factor: float = 1) -> None:
+        """
+        Discrete-event mode: move a drone in straight-line transit over multiple time steps without the decisions
+        of move. Only valid while the transit lasts, see transit_time_remaining.
+        The pheromones are spread step by step like in move, but the grid is depreciated over all steps beforehand,
+        so the pheromones of each step are only depreciated over the steps from it to the end.
+        :param steps: Number of time steps
+        :param depreciation_factor: Depreciation of the pheromones per time step
+        :return:
+        """
+        for step in range(1, steps + 1):
+            self.last_location = copy.deepcopy(self.location)
+            self.time_spent_airborne += self.world.time_delta
+            self.move_through_route(self.speed * self.world.time_delta)
+            self.spread_pheromones(weight=depreciation_factor ** (steps - step + 1))
+
     def debug(self):
         """
         Checks if any rules and/or logic are broken
@@ -240,7 +301,7 @@ class Drone:
         # Case 1: Check if the UAV has to return to base if not already
         if not self.routing_to_base:
             if not self.can_continue():
-                logger.debug(f"Checking after can_continue function for {self.uav_id}")
+                logger.debug("Checking after can_continue function for %s", self.uav_id)
                 if constants.DEBUG_MODE:
                     self.debug()
                 self.return_to_base()
@@ -316,25 +377,24 @@ class Drone:
         #              f"left: {left_direction}, right: {right_direction}")
 
         left_point = self.move_towards_orientation(distance_to_travel, direction=left_direction)
-        CoP_left, left_receptors = self.world.receptor_grid.calculate_CoP(left_point, self.radius)
-
         straight_point = self.move_towards_orientation(distance_to_travel, direction=self.direction)
-        CoP_straight, straight_receptors = self.world.receptor_grid.calculate_CoP(straight_point, self.radius)
-
         right_point = self.move_towards_orientation(distance_to_travel, direction=right_direction)
-        CoP_right, right_receptors = self.world.receptor_grid.calculate_CoP(right_point, self.radius)
+
+        CoP_left = self.concentration_of_pheromones(left_point)
+        CoP_straight = self.concentration_of_pheromones(straight_point)
+        CoP_right = self.concentration_of_pheromones(right_point)
 
         # logger.debug(f"{CoP_left=}, {CoP_straight=}, {CoP_right=}")
         concentration_of_pheromones = [CoP_left, CoP_straight, CoP_right]
         try:
             probabilities = [1 / CoP for CoP in concentration_of_pheromones]
         except ZeroDivisionError:
-            logger.warning(f"UAV {self.uav_id} at {self.location.x}, {self.location.y} has 0 CoP surrounding.")
+            logger.warning("UAV %s at %s, %s has 0 CoP surrounding.", self.uav_id, self.location.x, self.location.y)
             probabilities = [1 / 3, 1 / 3, 1 / 3]
         if sum(probabilities) != 0:
             probabilities = [p / sum(probabilities) for p in probabilities]
         else:
-            logger.warning(f"No Valid probabilities")
+            logger.warning("No Valid probabilities")
             probabilities = [1 / len(probabilities)] * len(probabilities)
 
         if all([math.isinf(CoP_left), math.isinf(CoP_straight), math.isinf(CoP_right)]):
@@ -409,28 +469,28 @@ class Drone:
         if direction is None:
             direction = self.direction
 
-        latitudinal_distance = distance_to_travel / constants.LATITUDE_CONVERSION_FACTOR
-        latitude = self.location.y
-        longitudinal_distance = distance_to_travel / (constants.LONGITUDE_CONVERSION_FACTOR
-                                                      * math.cos(math.radians(latitude)))
+        # Like the helpers, x is named latitude and y longitude: north and south change y, east and west change x
+        longitudinal_distance = general_maths.km_to_longitudinal_distance(distance_to_travel)
+        latitudinal_distance = general_maths.km_to_latitudinal_distance(distance_to_travel, self.location.y,
+                                                                        self.world.projection)
 
         if direction == "north":
-            return Point(x, y + latitudinal_distance)
+            return Point(x, y + longitudinal_distance)
         elif direction == "east":
-            return Point(x + longitudinal_distance, y)
+            return Point(x + latitudinal_distance, y)
         elif direction == "south":
-            return Point(x, y - latitudinal_distance)
+            return Point(x, y - longitudinal_distance)
         elif direction == "west":
-            return Point(x - longitudinal_distance, y)
+            return Point(x - latitudinal_distance, y)
         elif direction == "reverse":
             if self.direction == "north":
-                return Point(x, y - latitudinal_distance)
+                return Point(x, y - longitudinal_distance)
             elif self.direction == "east":
-                return Point(x - longitudinal_distance, y)
+                return Point(x - latitudinal_distance, y)
             elif self.direction == "south":
-                return Point(x, y + latitudinal_distance)
+                return Point(x, y + longitudinal_distance)
             elif self.direction == "west":
-                return Point(x + longitudinal_distance, y)
+                return Point(x + latitudinal_distance, y)
             else:
                 raise NotImplementedError(f"Invalid direction {self.direction}")
         else:
@@ -444,7 +504,7 @@ class Drone:
             iterations += 1
             if iterations > constants.ITERATION_LIMIT:
                 if self.route is not None:
-                    logger.warning(f"Route: {[str(p) for p in self.route.points]}")
+                    logger.warning("Route: %s", [str(p) for p in self.route.points])
                     self.next_point.add_point_to_plot(constants.axes_plot, color="yellow", text="next")
                 self.location.add_point_to_plot(constants.axes_plot, color="yellow", text="L")
                 raise TimeoutError(f"Distance travel not converging for UAV {self.uav_id} at {self.location} "
@@ -454,8 +514,9 @@ class Drone:
                                    f"- Vessel being chased: {self.located_ship.ship_id}")
 
             # Instance 1: Staying close to a tracked ship
-            if (self.trailing and calculate_distance(a=self.location,
-                                                     b=self.located_ship.location) < constants.MAX_TRAILING_DISTANCE):
+            if (self.trailing and calculate_distance(a=self.location, b=self.located_ship.location,
+                                                     projection=self.world.projection)
+                    < constants.MAX_TRAILING_DISTANCE):
                 # Chasing sees if we still have to catch up with the vessel, otherwise the UAV trails it.
                 t_1 = time.perf_counter()
                 constants.time_spent_uav_route_move += (t_1 - t_0)
@@ -471,7 +532,7 @@ class Drone:
             # logger.debug(f"route is {[str(p) for p in self.route.points]} \n")
             if self.next_point is not None:
                 # logger.debug(f"Next Point at: {self.next_point.x, self.next_point.y}")
-                distance_to_next_point = self.location.distance_to_point(self.next_point)
+                distance_to_next_point = self.location.distance_to_point(self.next_point, self.world.projection)
 
                 distance_travelled = min(distance_to_travel, distance_to_next_point)
                 distance_to_travel -= distance_travelled
@@ -525,8 +586,14 @@ class Drone:
         if constants.DEBUG_MODE:
             self.debug()
 
-    def spread_pheromones(self):
+    def spread_pheromones(self, weight: float = 1):
+        """
+        Spreads pheromones over the path travelled since the last location.
+        :param weight: Factor on the spread pheromones
+        :return:
+        """
         t_0 = time.perf_counter()
+        grid = self.world.receptor_grid
         locations = []
         for lamb in np.arange(0, 1, 1 / self.world.splits_per_step):
             x_loc = self.location.x * lamb + self.last_location.x * (1 - lamb)
@@ -534,14 +601,13 @@ class Drone:
             locations.append(Point(x_loc, y_loc))
 
         for location in locations:
-            receptors = self.world.receptor_grid.select_receptors_in_radius(
+            indices, distances = grid.receptor_indices_in_radius(
                 location, radius=self.radius*constants.LATITUDE_CONVERSION_FACTOR)
 
-            for receptor in receptors:
-                if receptor.decay:  # To Check if receptor is not a boundary point
-                    receptor.uav_pheromones += ((1 / max(location.distance_to_point(receptor.location), 0.1)) *
-                                                (self.pheromone_spread / self.world.splits_per_step))
-                    # receptor.update_plot(self.world.ax, self.world.receptor_grid.cmap)
+            # Only decaying receptors receive pheromones, to skip boundary points
+            decaying = grid.decay[indices]
+            grid.pheromones[indices[decaying]] += ((1 / np.maximum(distances[decaying], 0.1)) *
+                                                   (weight * self.pheromone_spread / self.world.splits_per_step))
         t_1 = time.perf_counter()
         constants.time_spreading_pheromones += (t_1 - t_0)
 
@@ -566,32 +632,40 @@ class Drone:
             pass
 
     def is_near(self, location: Point) -> bool:
-        if self.location.distance_to_point(location) < constants.MAX_TRAILING_DISTANCE:
+        if self.location.distance_to_point(location, self.world.projection) < constants.MAX_TRAILING_DISTANCE:
             return True
         else:
             return False
 
     def observe_area(self, ships):
         t_0 = time.perf_counter()
-        for ship in ships:
-            detection_probabilities = []
+        radius_travelled = self.radius + self.speed * self.world.time_delta
+        ship_distances = general_maths.distance_many([ship.location.x for ship in ships],
+                                                     [ship.location.y for ship in ships],
+                                                     self.location.x, self.location.y, self.world.projection)
 
-            radius_travelled = self.radius + self.speed * self.world.time_delta
+        # Locations of the UAV along the path travelled during the step
+        lambdas = np.append(np.arange(0, 1, step=1 / self.world.splits_per_step), 1)
+        path_x = self.location.x * lambdas + self.last_location.x * (1 - lambdas)
+        path_y = self.location.y * lambdas + self.last_location.y * (1 - lambdas)
 
-            if calculate_distance(a=self.location, b=ship.location) > radius_travelled:
+        for ship, ship_distance in zip(ships, ship_distances):
+            detection_probabilities = []
+
+            if ship_distance > radius_travelled:
                 continue
 
             if len(ship.trailing_UAVs) > 0:
                 continue
 
-            for lamb in np.append(np.arange(0, 1, step=1 / self.world.splits_per_step), 1):
-                uav_location = Point(self.location.x * lamb + self.last_location.x * (1 - lamb),
-                                     self.location.y * lamb + self.last_location.y * (1 - lamb))
-                distance = calculate_distance(a=uav_location, b=ship.location)
+            distances = general_maths.distance_many(path_x, path_y, ship.location.x, ship.location.y,
+                                                    self.world.projection)
+            for x, y, distance in zip(path_x, path_y, distances):
                 if distance <= self.radius:
-                    detection_probabilities.append(self.roll_detection_check(uav_location, ship, distance))
+                    detection_probabilities.append(self.roll_detection_check(Point(x, y), ship, distance))
             probability = 1 - np.prod([(1 - p) ** (1 / self.world.splits_per_step) for p in detection_probabilities])
             if np.random.rand() <= probability:
+                self.world.register_detection(self, ship)
                 # logger.debug(f"UAV {self.uav_id} detected {ship.ship_id} - w/ prob {probability}. "
                 #              f"- {self.routing_to_base=}")
                 if not self.routing_to_base:
@@ -608,7 +682,7 @@ class Drone:
 
     def roll_detection_check(self, uav_location, ship: Ship, distance: float = None) -> float:
         if distance is None:
-            distance = calculate_distance(a=uav_location, b=ship.location)
+            distance = calculate_distance(a=uav_location, b=ship.location, projection=self.world.projection)
 
         # Get weather conditions in area
         closest_receptor = self.world.receptor_grid.get_closest_receptor(ship.location)
@@ -635,10 +709,10 @@ class Drone:
 
     def start_trailing(self, ship: Ship):
         if self.routing_to_start:
-            logger.warning(f"UAV {self.uav_id} stopped routing to start point - chasing {ship.ship_id}")
+            logger.warning("UAV %s stopped routing to start point - chasing %s", self.uav_id, ship.ship_id)
             self.routing_to_start = False
         elif self.routing_to_base:
-            logger.warning(f"Tried calling UAV {self.uav_id} routing to base - Continuing going back")
+            logger.warning("Tried calling UAV %s routing to base - Continuing going back", self.uav_id)
             return
         self.patrolling = False
         self.trailing = True
@@ -649,28 +723,29 @@ class Drone:
     def update_trail_route(self):
         if self.located_ship is not None:
             if self.located_ship.left_world:
-                logger.debug(f"UAV {self.uav_id} is forced to stop chasing {self.located_ship.ship_id} "
-                             f"- reached destination.")
+                logger.debug("UAV %s is forced to stop chasing %s - reached destination.", self.uav_id,
+                             self.located_ship.ship_id)
                 self.stop_trailing("Target Reached Destination")
                 return
 
             # TODO: Make this territorial waters to avoid rather than world polygons
             for polygon in self.world.polygons:
                 if polygon.check_if_contains_point(self.located_ship.location):
-                    logger.debug(
-                        f"UAV {self.uav_id} is forced to stop chasing {self.located_ship.ship_id} - in safe zone.")
+                    logger.debug("UAV %s is forced to stop chasing %s - in safe zone.", self.uav_id,
+                                 self.located_ship.ship_id)
                     self.stop_trailing("Target Entered Safe Zone")
                     return
 
-        self.generate_route(destination=self.located_ship.location)
+        self.update_pursuit_route(self.located_ship.location)
         if constants.DEBUG_MODE:
             self.debug()
 
     def stop_trailing(self, reason: str, call_from_ship=False):
         if self.trailing:
             self.trailing = False
-            logger.debug(f"UAV {self.uav_id} is stopping trailing {self.located_ship.ship_id} - {reason} - \n"
-                         f"status: {self.trailing=}, {self.routing_to_start=}, {self.routing_to_base=}.")
+            logger.debug("UAV %s is stopping trailing %s - %s - \nstatus: self.trailing=%r, "
+                         "self.routing_to_start=%r, self.routing_to_base=%r.", self.uav_id, self.located_ship.ship_id,
+                         reason, self.trailing, self.routing_to_start, self.routing_to_base)
             self.located_ship.trailing_UAVs.remove(self)
             self.located_ship = None
             self.awaiting_support = False
@@ -679,10 +754,10 @@ class Drone:
             if not call_from_ship:
                 self.make_next_patrol_move(self.speed * self.world.time_delta)
         else:
-            logger.warning(f"UAV {self.uav_id} was not trailing - ordered to stop")
+            logger.warning("UAV %s was not trailing - ordered to stop", self.uav_id)
             for ship in self.world.current_vessels:
                 if self in ship.trailing_UAVs:
-                    logger.debug(f"Ship {ship.ship_id} found to identify uav {self.uav_id} as trailing!")
+                    logger.debug("Ship %s found to identify uav %s as trailing!", ship.ship_id, self.uav_id)
 
         if constants.DEBUG_MODE:
             self.debug()
@@ -701,37 +776,54 @@ class Drone:
         Attacks targeted vessel.
         :return:
         """
-        logger.debug(f"UAV {self.uav_id} attacking {self.located_ship.ship_id}")
+        logger.debug("UAV %s attacking %s", self.uav_id, self.located_ship.ship_id)
         if self.ammunition == 0:
             raise ValueError(f"UAV {self.uav_id} attempting to attack without available ammunition")
 
         damage = np.random.randint(0, 101)
+        self.world.register_attack(self, self.located_ship, damage)
         self.located_ship.receive_damage(damage)
 
     def perceive_ship_sunk(self):
         self.trailing = False
 
     def call_in_attacking_drone(self):
-        options = []
-        for uav in self.world.current_airborne_drones:
-            if uav.ammunition > 0 and uav.reach_and_return(self.located_ship.location) and not uav.routing_to_base:
-                options.append([uav, self.location.distance_to_point(uav.location)])
+        selected_support = self.select_support()
 
-        if len(options) == 0:
-            logger.debug(f"No supporting UAV available, gave up on the chase")
+        if selected_support is None:
+            logger.debug("No supporting UAV available, gave up on the chase")
             self.stop_trailing("No Action Capacity")
             return
-        else:
-            selected_support = min(options, key=lambda x: x[1])[0]
-
-            if selected_support.routing_to_base:
-                raise PermissionError(f"Calling Occupied UAV {self.uav_id}")
+        elif selected_support.routing_to_base:
+            raise PermissionError(f"Calling Occupied UAV {self.uav_id}")
 
         self.awaiting_support = True
         selected_support.start_trailing(self.located_ship)
         self.support_object = selected_support
-        logger.debug(f"UAV {self.uav_id} calling in UAV {selected_support.uav_id} "
-                     f"to attack ship {self.located_ship.ship_id}")
+        logger.debug("UAV %s calling in UAV %s to attack ship %s", self.uav_id, selected_support.uav_id,
+                     self.located_ship.ship_id)
+
+    def select_support(self):
+        """
+        Selects the closest UAV with ammunition that can reach the located ship and return to its base.
+        The candidates are checked in order of distance, so only the closest candidates plan their routes.
+        :return: Selected UAV, None if no UAV can support
+        """
+        candidates = [uav for uav in self.world.current_airborne_drones
+                      if uav.ammunition > 0 and not uav.routing_to_base]
+        if len(candidates) == 0:
+            return None
+
+        distances = general_maths.distance_many([uav.location.x for uav in candidates],
+                                                [uav.location.y for uav in candidates],
+                                                self.location.x, self.location.y, self.world.projection)
+        candidates = [candidates[index] for index in np.argsort(distances, kind="stable")]
+        target = self.located_ship.location
+
+        for uav in candidates:
+            if uav.reach_and_return(target):
+                return uav
+        return None
 
     def reach_and_return(self, target: Point) -> bool:
         """
@@ -742,20 +834,20 @@ class Drone:
 
         # First check if the distance is possible without obstacles to prevent unnecessary heavier computations
         remaining_endurance = self.endurance - self.time_spent_airborne
-        dist_to_point = self.location.distance_to_point(target)
-        dist_to_base = target.distance_to_point(self.base.location)
+        dist_to_point = self.location.distance_to_point(target, self.world.projection)
+        dist_to_base = target.distance_to_point(self.base.location, self.world.projection)
         min_endurance_required = (dist_to_point + dist_to_base) / self.speed
 
-        if min_endurance_required * (1 + constants.SAFETY_ENDURANCE) > remaining_endurance:
+        if min_endurance_required * (1 + self.world.scenario.safety_endurance) > remaining_endurance:
             return False
 
         # logger.debug(f"Checking if UAV {self.uav_id} can reach {target} and return to {self.base.location}")
-        path_to_point = routes.create_route(self.location, target, polygons_to_avoid=self.world.polygons)
-        path_to_base = routes.create_route(target, self.base.location, polygons_to_avoid=self.world.polygons)
+        path_to_point = self.plan_route(self.location, target, estimate=True)
+        path_to_base = self.plan_route(target, self.base.location, estimate=True)
         total_length = path_to_point.length + path_to_base.length
         endurance_required = total_length / self.speed
         # See if we have enough endurance remaining, plus small penalty to ensure we can trail
-        if endurance_required * (1 + constants.SAFETY_ENDURANCE) > remaining_endurance:
+        if endurance_required * (1 + self.world.scenario.safety_endurance) > remaining_endurance:
             return False
         else:
             return True
@@ -766,14 +858,14 @@ class Drone:
         self.drone_type.airborne += 1
         start_location = self.generate_patrol_location()
         start_location.name = "Start Location"
-        logger.debug(f"Launching UAV {self.uav_id} to {start_location}")
+        logger.debug("Launching UAV %s to %s", self.uav_id, start_location)
         self.generate_route(start_location)
         self.routing_to_start = True
         # logger.debug(f"Created route to start: {[str(p) for p in self.route.points]}")
         self.move()
 
     def return_to_base(self):
-        logger.debug(f"UAV {self.uav_id} is forced to return to base.")
+        logger.debug("UAV %s is forced to return to base.", self.uav_id)
         self.routing_to_start = False
 
         if self.trailing:
@@ -783,7 +875,7 @@ class Drone:
         self.routing_to_base = True
 
     def land(self):
-        logger.debug(f"UAV {self.uav_id} landed at {self.location} - starting maintenance")
+        logger.debug("UAV %s landed at %s - starting maintenance", self.uav_id, self.location)
 
         self.grounded = True
         self.update_plot()
@@ -795,16 +887,67 @@ class Drone:
         self.time_spent_airborne = 0
         self.start_maintenance()
 
+    def plan_route(self, point_a: Point, point_b: Point, estimate: bool = False) -> Route:
+        """
+        Routes to the airbases are read from the shortest-path trees of the world if it has them
+        :param estimate: Route is only used to check the endurance, allows a cheaper planner
+        """
+        if self.world.router is not None:
+            route = self.world.router.get_route(point_a, point_b, estimate=estimate)
+        else:
+            route = create_route(point_a=point_a, point_b=point_b, polygons_to_avoid=self.polygons_to_avoid)
+        if self.world.projection is not None:
+            route.calculate_length(self.world.projection)
+        return route
+
     def generate_route(self, destination):
         # logger.debug(f"Creating route from {self.location} to {destination} for UAV {self.uav_id} \n"
         #              f"{self.trailing=}, {self.routing_to_start=}, {self.routing_to_base=}")
-        self.route = create_route(point_a=self.location, point_b=destination,
-                                  polygons_to_avoid=self.polygons_to_avoid)
+        self.set_route(self.plan_route(self.location, destination))
+
+    def set_route(self, route: Route) -> None:
+        if self.transit_event is not None:
+            self.transit_event.cancel()
+            self.transit_event = None
+        self.route = route
         self.past_points.append(self.route.points[0])
         self.next_point = self.route.points[1]
         self.remaining_points = self.route.points[2:]
         # logger.debug(f"UAV {self.uav_id} has routing {[str(p) for p in self.route.points]}")
 
+    def update_pursuit_route(self, target: Point) -> None:
+        """
+        Incremental pursuit of a moving target.
+        The current route is kept and only its end is moved to the target, as long as the target moved less than
+        the re-plan tolerance and is still in line of sight of the last waypoint.
+        Otherwise, the route is re-planned - a direct intercept if the line to the target is clear (open water),
+        or a full route around the obstacles.
+        :param target: Current location of the trailed ship
+        :return:
+        """
+        if self.route is not None and self.next_point is not None:
+            upcoming_points = [self.next_point] + self.remaining_points
+            if len(upcoming_points) > 1:
+                last_waypoint = upcoming_points[-2]
+            else:
+                last_waypoint = self.location
+
+            if (upcoming_points[-1].distance_to_point(target, self.world.projection)
+                    <= constants.TRAIL_REPLAN_TOLERANCE and
+                    not routes.line_crosses_any_polygon(self.polygons_to_avoid, [last_waypoint, target])[0]):
+                new_end = copy.deepcopy(target)
+                if len(self.remaining_points) > 0:
+                    self.remaining_points[-1] = new_end
+                else:
+                    self.next_point = new_end
+                self.route = Route(points=self.route.points[:-1] + [new_end], color=self.route.color)
+                return
+
+        if not routes.line_crosses_any_polygon(self.polygons_to_avoid, [self.location, target])[0]:
+            self.set_route(Route(points=[copy.deepcopy(self.location), copy.deepcopy(target)]))
+        else:
+            self.generate_route(destination=target)
+
     def sample_random_patrol_start(self) -> Point:
         # TODO: make dependent on endurance and range of the UAV (In a more sophisticated way)
         x = np.random.uniform(constants.PATROL_MIN_LAT,
@@ -813,19 +956,54 @@ class Drone:
                               min(constants.PATROL_MAX_LONG, constants.PATROL_MIN_LONG + (self.range / 2)))
         return Point(x, y)
 
+    def concentration_of_pheromones(self, point: Point) -> float:
+        if constants.PHEROMONE_DIFFUSION:
+            return self.world.receptor_grid.local_concentration(point)
+        elif constants.PHEROMONE_PYRAMID:
+            return self.world.receptor_grid.approximate_CoP(point, self.radius)
+        cop, _ = self.world.receptor_grid.calculate_CoP(point, self.radius)
+        return cop
+
     def generate_patrol_location(self) -> Point:
-        points = [self.sample_random_patrol_start() for _ in range(constants.PATROL_LOCATIONS)]
+        if constants.PHEROMONE_SUMMED_AREA:
+            return self.generate_patrol_location_from_windows()
+
+        points = [self.sample_random_patrol_start() for _ in range(self.world.scenario.patrol_locations)]
         concentration_of_pheromones = []
         for point in points:
-            cop, _ = self.world.receptor_grid.calculate_CoP(point, self.radius)
-            concentration_of_pheromones.append(cop)
+            concentration_of_pheromones.append(self.concentration_of_pheromones(point))
         # currently selecting minimal location - could do weight based sampling instead
         min_index = concentration_of_pheromones.index(min(concentration_of_pheromones))
         return points[min_index]
 
+    def generate_patrol_location_from_windows(self) -> Point:
+        """
+        Compares many patrol starts at once on the mean pheromones in the window around them, read from the
+        summed-area table of the receptor grid.
+        :return: Valid start with the lowest mean pheromones
+        """
+        grid = self.world.receptor_grid
+        x = np.random.uniform(constants.PATROL_MIN_LAT, constants.PATROL_MAX_LAT, constants.PATROL_WINDOW_CANDIDATES)
+        y = np.random.uniform(constants.PATROL_MIN_LONG,
+                              min(constants.PATROL_MAX_LONG, constants.PATROL_MIN_LONG + (self.range / 2)),
+                              constants.PATROL_WINDOW_CANDIDATES)
+        min_row, max_row, min_col, max_col = grid.windows_around_points(x, y, self.radius * 2)
+        cells = np.maximum((max_row - min_row) * (max_col - min_col), 1)
+        mean_pheromones = grid.window_totals(min_row, max_row, min_col, max_col) / cells
+
+        for index in np.argsort(mean_pheromones):
+            point = Point(x[index], y[index])
+            if not math.isinf(grid.local_concentration(point)):
+                return point
+        logger.warning("UAV %s found no valid patrol location out of %s candidates.", self.uav_id,
+                       constants.PATROL_WINDOW_CANDIDATES)
+        return self.sample_random_patrol_start()
+
     def start_maintenance(self):
         self.under_maintenance = True
         self.time_maintenance_finish = self.world.world_time + self.maintenance_time
+        if constants.DISCRETE_EVENT_MODE:
+            self.world.event_calendar.schedule(self.time_maintenance_finish, events.MAINTENANCE_DONE, self)
 
     def check_if_complete_maintenance(self):
         if self.world.world_time >= self.time_maintenance_finish:
@@ -0,0 +1,80 @@
+"""
+Event calendar for the discrete-event mode of the world.
+Events are kept in a heap ordered by time, ties are resolved in order of scheduling.
+Cancelled events stay in the heap and are discarded once they reach the front.
+"""
+import heapq
+import math
+
+# Event kinds
+ARRIVAL = "arrival"
+WAYPOINT_REACHED = "waypoint_reached"
+WEATHER_RESAMPLE = "weather_resample"
+MAINTENANCE_DONE = "maintenance_done"
+ENDURANCE_LIMIT = "endurance_limit"
+
+
+class Event:
+    def __init__(self, time: float, kind: str, entity=None):
+        self.time = time
+        self.kind = kind
+        self.entity = entity
+        self.cancelled = False
+
+    def __str__(self):
+        return f"Event {self.kind} at {self.time: .3f} for {self.entity}"
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class EventCalendar:
+    def __init__(self):
+        self.heap = []
+        self.events_scheduled = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def schedule(self, time: float, kind: str, entity=None) -> Event:
+        """
+        Adds an event to the calendar.
+        :param time: World time at which the event occurs
+        :param kind: One of the event kinds defined in this module
+        :param entity: Object the event applies to (e.g. a drone for maintenance)
+        :return: The scheduled event, which can be cancelled later on
+        """
+        event = Event(time, kind, entity)
+        heapq.heappush(self.heap, (time, self.events_scheduled, event))
+        self.events_scheduled += 1
+        return event
+
+    def discard_cancelled(self) -> None:
+        while len(self.heap) > 0 and self.heap[0][2].cancelled:
+            heapq.heappop(self.heap)
+
+    def next_event_time(self, ignored_kinds: list = None) -> float:
+        """
+        :param ignored_kinds: Kinds of events that are not considered
+        :return: Time of the first event that has not been cancelled, inf if there are none
+        """
+        self.discard_cancelled()
+        if ignored_kinds is not None:
+            return min((time for time, _, event in self.heap
+                        if not event.cancelled and event.kind not in ignored_kinds), default=math.inf)
+        if len(self.heap) == 0:
+            return math.inf
+        return self.heap[0][0]
+
+    def pop_due_events(self, time: float) -> list:
+        """
+        Removes and returns all events that occur at or before the given time, in order.
+        :param time: Current world time
+        :return: List of events
+        """
+        due_events = []
+        while len(self.heap) > 0 and self.heap[0][0] <= time:
+            _, _, event = heapq.heappop(self.heap)
+            if not event.cancelled:
+                due_events.append(event)
+        return due_events
@@ -3,33 +3,32 @@ import math
 import constants
 
 import time
+import numpy as np
+import shapely
 import shapely.geometry
 
 # ----------------------------------------------- LOGGER SET UP ------------------------------------------------
-import logging
-import datetime
-import os
+from log_setup import get_logger
 
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("GM")
-logger.setLevel(logging.DEBUG)
+logger = get_logger("GM")
 
 
 # --------------------------------------------- END LOGGER SET UP ------------------------------------------------
 
-def calculate_distance(a: object, b: object, lon_lat_to_km=True) -> float:
+def calculate_distance(a: object, b: object, lon_lat_to_km=True, projection=None) -> float:
     """
     Calculates Euclidean distance
     :param a: Point
     :param b: Point
     :param lon_lat_to_km: bool, whether distance translated from lon_lat
+    :param projection: Local km plane of the world to measure in, the mean latitude of the points is used if None
     :return: Float distance
     """
     t_0 = time.perf_counter()
 
-    if lon_lat_to_km:
+    if lon_lat_to_km and projection is not None:
+        distance = projection.distance(a.x, a.y, b.x, b.y)
+    elif lon_lat_to_km:
         latitudinal_distance_in_km = longitudinal_distance_to_km(a.y, b.y)
         mean_latitude = (a.y + b.y) / 2
         longitudinal_distance_in_km = latitudinal_distance_to_km(a.x, b.x, mean_latitude)
@@ -42,11 +41,65 @@ def calculate_distance(a: object, b: object, lon_lat_to_km=True) -> float:
     return distance
 
 
+def distance_between(x_1, y_1, x_2, y_2, projection=None) -> np.ndarray:
+    """
+    Vectorized calculate_distance, all coordinates are broadcast against each other.
+    :param projection: Local km plane of the world to measure in, the mean latitude of the points is used if None
+    :return: Array of distances in km
+    """
+    if projection is not None:
+        return np.hypot((np.subtract(x_1, x_2)) * projection.x_scale, np.subtract(y_1, y_2) * projection.y_scale)
+    mean_latitude = np.radians(np.add(y_1, y_2) / 2)
+    return np.hypot(np.subtract(x_1, x_2) * (constants.LONGITUDE_CONVERSION_FACTOR * np.cos(mean_latitude)),
+                    np.subtract(y_1, y_2) * constants.LATITUDE_CONVERSION_FACTOR)
+
+
+def distance_many(xs: np.ndarray, ys: np.ndarray, x_0: float, y_0: float, projection=None) -> np.ndarray:
+    """
+    Distances from many locations to a single location.
+    :param xs: x coordinates of the locations
+    :param ys: y coordinates of the locations
+    :param x_0: x coordinate of the single location
+    :param y_0: y coordinate of the single location
+    :param projection: Local km plane of the world to measure in
+    :return: Array of distances in km
+    """
+    return distance_between(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), x_0, y_0, projection)
+
+
+def pairwise_distance(a: np.ndarray, b: np.ndarray, projection=None) -> np.ndarray:
+    """
+    Distances between all combinations of two sets of locations.
+    :param a: (n, 2) array of x, y coordinates
+    :param b: (m, 2) array of x, y coordinates
+    :param projection: Local km plane of the world to measure in
+    :return: (n, m) array of distances in km
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    return distance_between(a[:, 0, np.newaxis], a[:, 1, np.newaxis], b[np.newaxis, :, 0], b[np.newaxis, :, 1],
+                            projection)
+
+
+def polyline_length(xs: np.ndarray, ys: np.ndarray, projection=None) -> float:
+    """
+    :param xs: x coordinates of the points on the line
+    :param ys: y coordinates of the points on the line
+    :param projection: Local km plane of the world to measure in
+    :return: Total length in km of the line through the points
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    return float(np.sum(distance_between(xs[:-1], ys[:-1], xs[1:], ys[1:], projection)))
+
+
 def longitudinal_distance_to_km(lon_1: float, lon_2: float) -> float:
     return abs((lon_1 - lon_2) * constants.LATITUDE_CONVERSION_FACTOR)
 
 
-def latitudinal_distance_to_km(lat_1: float, lat_2: float, approx_long: float) -> float:
+def latitudinal_distance_to_km(lat_1: float, lat_2: float, approx_long: float, projection=None) -> float:
+    if projection is not None:
+        return abs((lat_1 - lat_2) * projection.x_scale)
     return abs((lat_1 - lat_2) * (constants.LONGITUDE_CONVERSION_FACTOR *
                                   math.cos(math.radians(approx_long))))
 
@@ -60,13 +113,16 @@ def km_to_longitudinal_distance(kilometers: float) -> float:
     return kilometers / constants.LATITUDE_CONVERSION_FACTOR
 
 
-def km_to_latitudinal_distance(kilometers: float, approx_long) -> float:
+def km_to_latitudinal_distance(kilometers: float, approx_long, projection=None) -> float:
     """
     Takes kilometer distance and converts it to approximate latitudinal points
     :param kilometers:
     :param approx_long:
+    :param projection: Local km plane of the world, its fixed scale replaces the one at approx_long
     :return:
     """
+    if projection is not None:
+        return kilometers / projection.x_scale
     return kilometers / (constants.LONGITUDE_CONVERSION_FACTOR *
                          math.cos(math.radians(approx_long)))
 
@@ -320,7 +376,7 @@ def calculate_direction_vector(point_a: object, point_b: object) -> list:
         raise ValueError(f"Traversing between same points: {point_a}")
     normalisation_value = math.sqrt((point_b.x - point_a.x) ** 2 + (point_b.y - point_a.y) ** 2)
     if normalisation_value == 0:
-        logger.warning(f"Normalisation value of 0 - direction from {str(point_a)} to {str(point_b)}")
+        logger.warning("Normalisation value of 0 - direction from %s to %s", point_a, point_b)
 
         return [0, 0]
     x_change = (point_b.x - point_a.x) / normalisation_value
@@ -384,6 +440,83 @@ def graham_scan(points: list) -> list:
     return convex_hull
 
 
+def monotone_chain(points: list) -> list:
+    """
+    Convex hull with Andrew's monotone chain algorithm, collinear points are left out.
+    :param points: List of Points objects
+    :return: Points of the hull in counterclockwise order
+    """
+    ordered = sorted(points, key=lambda p: (p.x, p.y))
+    if len(ordered) < 3:
+        return ordered
+
+    lower = []
+    for point in ordered:
+        while len(lower) >= 2 and ccw(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    upper = []
+    for point in reversed(ordered):
+        while len(upper) >= 2 and ccw(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+
+def insert_point_into_hull(convex_hull: list, point: object) -> list:
+    """
+    Adds a point to a counterclockwise convex hull. The edges that the point sees from the outside are replaced by
+    the two tangents from the point.
+    :param convex_hull: Points of the hull in counterclockwise order
+    :param point: Point to add
+    :return: New list of hull points, the input is not changed
+    """
+    if point in convex_hull:
+        # The point takes the place of the equal hull point
+        convex_hull = convex_hull.copy()
+        convex_hull[convex_hull.index(point)] = point
+        return convex_hull
+    if len(convex_hull) < 3:
+        return monotone_chain(convex_hull + [point])
+
+    areas = [ccw(a, b, point) for a, b in zip(convex_hull, convex_hull[1:] + convex_hull[:1])]
+    if min(areas) >= 0:
+        # Inside or on the hull
+        return convex_hull
+
+    # Edges the point is collinear with are seen as well, their shared hull point would become collinear
+    edges = len(convex_hull)
+    seen = [area <= 0 for area in areas]
+    first = next(i for i in range(edges) if seen[i] and not seen[i - 1])
+    last = first
+    while seen[(last + 1) % edges]:
+        last = (last + 1) % edges
+
+    # Keep the hull points from the end of the last seen edge up to the start of the first seen edge
+    kept = [convex_hull[(last + 1 + i) % edges] for i in range((first - last - 1) % edges + 1)]
+    return kept + [point]
+
+
+def start_hull_at_point(convex_hull: list, start: object) -> list:
+    """
+    Rotates a counterclockwise hull to start at the lowest point, as the Graham scan does. The lowest point is kept
+    when it is collinear on the bottom edge.
+    :param convex_hull: Points of the hull in counterclockwise order
+    :param start: Lowest point of the points the hull was made of
+    :return:
+    """
+    if start in convex_hull:
+        index = convex_hull.index(start)
+        convex_hull = convex_hull.copy()
+        convex_hull[index] = start
+    else:
+        # Insert the start on the (counterclockwise, so left to right) bottom edge that contains it
+        index = next(i for i, (a, b) in enumerate(zip(convex_hull, convex_hull[1:] + convex_hull[:1]))
+                     if a.y == b.y == start.y and a.x < start.x < b.x) + 1
+        convex_hull = convex_hull[:index] + [start] + convex_hull[index:]
+    return convex_hull[index:] + convex_hull[:index]
+
+
 def find_closest_reachable_point(target: object, polygon: object) -> object:
     """
     :param target: Point - Location from which we want to reach to a polygon
@@ -412,3 +545,52 @@ def check_if_point_in_polygons(polygons, point, exclude_edges=True) -> bool:
         if polygon.check_if_contains_point(point, exclude_edges=exclude_edges):
             return True
     return False
+
+
+def rasterize_polygons(polygons: list, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Checks for all coordinates at once whether they fall within (not on the edge of) any of the polygons.
+    :param polygons: List of Polygons
+    :param x: Array of x coordinates
+    :param y: Array of y coordinates
+    :return: Boolean array, True for coordinates within a polygon
+    """
+    mask = np.zeros(np.shape(x), dtype=bool)
+    for polygon in polygons:
+        shape = shapely.geometry.Polygon([(p.x, p.y) for p in polygon.points])
+        mask |= shapely.contains_xy(shape, x, y)
+    return mask
+
+
+def benchmark_distance_kernels(sizes: tuple = (10, 100, 1000, 10000), repetitions: int = 5) -> None:
+    """
+    Compares the scalar calculate_distance in a Python loop with the batched kernels.
+    """
+    from points import Point
+
+    generator = np.random.default_rng(0)
+    for size in sizes:
+        xs = generator.uniform(constants.MIN_LAT, constants.MAX_LAT, size)
+        ys = generator.uniform(constants.MIN_LONG, constants.MAX_LONG, size)
+        points = [Point(x, y) for x, y in zip(xs, ys)]
+        origin = points[0]
+
+        t_0 = time.perf_counter()
+        for _ in range(repetitions):
+            scalar_distances = [calculate_distance(origin, point) for point in points]
+            scalar_length = sum(calculate_distance(a, b) for a, b in zip(points, points[1:]))
+        t_1 = time.perf_counter()
+        for _ in range(repetitions):
+            batched_distances = distance_many(xs, ys, origin.x, origin.y)
+            batched_length = polyline_length(xs, ys)
+        t_2 = time.perf_counter()
+
+        if not (np.allclose(scalar_distances, batched_distances) and np.isclose(scalar_length, batched_length)):
+            raise ValueError(f"Batched distances differ from the scalar distances for {size} points")
+        print(f"{size: >6} points - scalar: {(t_1 - t_0) / repetitions * 1000: .3f} ms, "
+              f"batched: {(t_2 - t_1) / repetitions * 1000: .3f} ms, "
+              f"speed-up: {(t_1 - t_0) / (t_2 - t_1): .0f}x")
+
+
+if __name__ == "__main__":
+    benchmark_distance_kernels()
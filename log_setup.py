@@ -0,0 +1,88 @@
+"""
+Central logging set up for all modules.
+Records are put on a queue by the simulation and written to the log file by a background listener thread, so the
+simulation never waits on file IO. The level is set by constants.LOG_LEVEL, debug records are dropped before they
+are formatted unless debug logging is enabled.
+"""
+import atexit
+import datetime
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+import constants
+
+LOG_DIRECTORY = "logs"
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = "%H:%M:%S"
+
+# Third party loggers that are too verbose below warning level
+QUIET_LOGGERS = ["matplotlib", "PIL", "PIL.PngImagePlugin", "fiona.ogrext", "GEOPOLYGON"]
+
+queue_handler = None
+listener = None
+
+
+def setup_logging(level: str = None) -> None:
+    """
+    Routes all records through a queue to the log file of today, replaces a previous set up.
+    :param level: Level of the root logger, constants.LOG_LEVEL if not provided
+    :return:
+    """
+    global queue_handler, listener
+    if level is None:
+        level = constants.LOG_LEVEL
+
+    root = logging.getLogger()
+    if queue_handler is not None:
+        root.removeHandler(queue_handler)
+    if listener is not None:
+        listener.stop()
+
+    os.makedirs(LOG_DIRECTORY, exist_ok=True)
+    file_handler = logging.FileHandler(os.path.join(os.getcwd(), LOG_DIRECTORY,
+                                                    "navy_log_" + str(datetime.date.today()) + ".log"))
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+
+    records = queue.SimpleQueue()
+    queue_handler = QueueHandler(records)
+    listener = QueueListener(records, file_handler, respect_handler_level=True)
+    listener.start()
+
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def stop_logging() -> None:
+    """
+    Writes the remaining records and stops the listener thread.
+    """
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
+
+
+def restart_in_child() -> None:
+    # The listener thread does not survive a fork, worker processes start their own
+    global listener
+    listener = None
+    setup_logging()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    :param name: Name of the module logger
+    :return: Logger that writes through the central queue
+    """
+    if queue_handler is None:
+        setup_logging()
+    return logging.getLogger(name)
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=restart_in_child)
@@ -1,18 +1,17 @@
-from world import World
-import matplotlib
-
-matplotlib.use("Agg")
-from matplotlib.animation import FuncAnimation
-
-test_world = World(time_delta=0.2)
+import os
 
+import constants
 
-def animation_function(frame):
-    test_world.time_step()
+constants.PLOTTING_MODE = False
+constants.RECORD_TELEMETRY = True
 
+from renderer import render_video
+from world import World
 
-anim_created = FuncAnimation(test_world.fig, animation_function, frames=50000, interval=10, repeat=False)
-
-anim_created.save("animated_arrivals.mp4", writer="ffmpeg")
+test_world = World(time_delta=0.2)
+test_world.run(duration=50000 * test_world.time_delta)
+test_world.close()
 
 print("Simulation Completed.")
+
+render_video(constants.TELEMETRY_DIRECTORY, "animated_arrivals.mp4", workers=os.cpu_count())
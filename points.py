@@ -2,15 +2,9 @@ import general_maths as gm
 import constants
 
 # ----------------------------------------------- LOGGER SET UP ------------------------------------------------
-import logging
-import datetime
-import os
+from log_setup import get_logger
 
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("POINTS")
-logger.setLevel(logging.DEBUG)
+logger = get_logger("POINTS")
 
 
 # --------------------------------------------- END LOGGER SET UP ------------------------------------------------
@@ -63,8 +57,8 @@ class Point:
     def location(self) -> tuple:
         return self.x, self.y
 
-    def distance_to_point(self, point) -> float:
-        return gm.calculate_distance(self, point)
+    def distance_to_point(self, point, projection=None) -> float:
+        return gm.calculate_distance(self, point, projection=projection)
 
     def add_point_to_plot(self, axes=constants.axes_plot, color=None, text="", marker="o",
                           marker_edge_width=1, markersize=10, plot_text=True):
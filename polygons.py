@@ -1,6 +1,7 @@
 
 import matplotlib.axes
 import matplotlib.patches
+import shapely
 import shapely.geometry
 import numpy as np
 
@@ -9,22 +10,53 @@ import general_maths as gm
 
 # ----------------------------------------------- LOGGER SET UP ------------------------------------------------
 import logging
-import datetime
-import os
+from log_setup import get_logger
 
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("POLYGON")
-logger.setLevel(logging.DEBUG)
+logger = get_logger("POLYGON")
 
 
 # --------------------------------------------- END LOGGER SET UP ------------------------------------------------
 
+# Tolerance on the cross product in gm.is_between_points
+EDGE_TOLERANCE = 0.001
+# Distance at which gm.check_if_point_on_line considers a point on a line
+LINE_TOLERANCE = 1e-8
+
+
+def distance_to_segments(x, y, start_x, start_y, end_x, end_y) -> np.ndarray:
+    """
+    Euclidean distance (in coordinates) from points to line segments, all arguments are broadcast against each other.
+    """
+    dx = np.subtract(end_x, start_x)
+    dy = np.subtract(end_y, start_y)
+    squared_length = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(squared_length > 0,
+                            ((x - start_x) * dx + (y - start_y) * dy) / squared_length, 0)
+    fraction = np.clip(fraction, 0, 1)
+    return np.hypot(x - (start_x + fraction * dx), y - (start_y + fraction * dy))
+
+
 class Polygon:
     def __init__(self, points: list):
         self.points = points
 
+        # Vertices and edges as arrays, edge i runs from vertex i to vertex i + 1
+        self.x = None
+        self.y = None
+        self.end_x = None
+        self.end_y = None
+        self.dx = None
+        self.dy = None
+        self.squared_length = None
+        self.vertex_bounds = None
+        self.edge_bounds = None
+        self.shape = None
+        # Coarse level of detail, see set_up_coarse_level
+        self.coarse = None
+        self.convex_hull = None
+        self.set_up_edges()
+
     def __str__(self):
         point_text = ""
         for point in self.points:
@@ -40,6 +72,87 @@ class Polygon:
                                                       closed=True, color=color, alpha=opacity))
         return axes
 
+    def set_up_edges(self) -> None:
+        """
+        Stores the vertices and edges as arrays, so that the edge predicates check all edges at once.
+        Has to be called again when the points of the polygon change.
+        """
+        self.x = np.array([p.x for p in self.points], dtype=float)
+        self.y = np.array([p.y for p in self.points], dtype=float)
+        self.end_x = np.roll(self.x, -1)
+        self.end_y = np.roll(self.y, -1)
+        self.dx = self.end_x - self.x
+        self.dy = self.end_y - self.y
+        self.squared_length = self.dx ** 2 + self.dy ** 2
+
+        self.vertex_bounds = (np.min(self.x, initial=np.inf), np.max(self.x, initial=-np.inf),
+                              np.min(self.y, initial=np.inf), np.max(self.y, initial=-np.inf))
+
+        # The tolerance of is_between_points allows points further from shorter edges, a zero-length edge has every
+        # point on it - which makes the bounds infinite and disables the early rejection for the polygon
+        with np.errstate(divide="ignore"):
+            margin = EDGE_TOLERANCE / np.sqrt(self.squared_length)
+        self.edge_bounds = (np.min(np.minimum(self.x, self.end_x) - margin, initial=np.inf),
+                            np.max(np.maximum(self.x, self.end_x) + margin, initial=-np.inf),
+                            np.min(np.minimum(self.y, self.end_y) - margin, initial=np.inf),
+                            np.max(np.maximum(self.y, self.end_y) + margin, initial=-np.inf))
+        self.shape = None
+        self.coarse = None
+        self.convex_hull = None
+
+    def get_shape(self) -> shapely.Polygon:
+        """
+        :return: Prepared shapely polygon, created once
+        """
+        if self.shape is None:
+            self.shape = shapely.geometry.Polygon(list(zip(self.x, self.y)))
+            shapely.prepare(self.shape)
+        return self.shape
+
+    def get_convex_hull(self) -> list:
+        """
+        :return: Counterclockwise convex hull of the polygon points, created once
+        """
+        if self.convex_hull is None:
+            unique_points = []
+            for point in self.points:
+                if point not in unique_points:
+                    unique_points.append(point)
+            self.convex_hull = gm.monotone_chain(unique_points)
+        return self.convex_hull
+
+    def set_up_coarse_level(self, buffer: float, tolerance: float) -> None:
+        """
+        Creates a coarse outline that contains the polygon: the polygon is buffered outwards and simplified
+        (Douglas-Peucker) with a tolerance below the buffer, so the outline never moves inside the coastline.
+        Lines and points that do not come within the buffer are rejected on the outline, only queries near the
+        coastline are answered by the polygon itself. Routes that do not start or end within the buffer are
+        created around the outline.
+        :param buffer: Outward buffer in coordinates
+        :param tolerance: Simplification tolerance in coordinates, has to be smaller than the buffer
+        :return:
+        """
+        if tolerance >= buffer:
+            raise ValueError(f"Simplification tolerance {tolerance} has to be smaller than the buffer {buffer}")
+
+        coarse_shape = self.get_shape().buffer(buffer).simplify(tolerance, preserve_topology=True)
+        if not coarse_shape.covers(self.get_shape()):
+            logger.warning("Coarse outline does not cover polygon %s, using the polygon only", self)
+            return
+        self.coarse = Polygon(points=[Point(x, y) for x, y in coarse_shape.exterior.coords[:-1]])
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Coarse outline with %s points for polygon with %s points",
+                         len(self.coarse.points), len(self.points))
+
+    def within_coarse_level(self, P: Point) -> bool:
+        """
+        :return: True if the polygon has no coarse outline, or if P is within (or on) the outline
+        """
+        return self.coarse is None or bool(shapely.intersects_xy(self.coarse.get_shape(), P.x, P.y))
+
+    def bounds_overlap(self, bounds: tuple, min_x: float, max_x: float, min_y: float, max_y: float) -> bool:
+        return bounds[0] <= max_x and min_x <= bounds[1] and bounds[2] <= max_y and min_y <= bounds[3]
+
     def check_if_contains_point(self, P: Point, exclude_edges=True) -> bool:
         """
         Check if point P is in polygon - excludes the edges
@@ -47,25 +160,69 @@ class Polygon:
         :param P: Point P containing (x, y) coordinates
         :return:
         """
-        x = P.x
-        y = P.y
+        if not self.bounds_overlap(self.vertex_bounds, P.x, P.x, P.y, P.y):
+            return False
 
-        if exclude_edges:
-            for a, b in zip(self.points, self.points[1:] + [self.points[0]]):
-                if gm.is_between_points(a, b, P):
-                    return False
+        if not self.within_coarse_level(P):
+            return False
+
+        if exclude_edges and self.point_is_on_edge(P):
+            return False
+
+        return bool(shapely.contains_xy(self.get_shape(), P.x, P.y))
 
-        poly_coordinates = [(p.x, p.y) for p in self.points]
-        poly = shapely.geometry.Polygon(poly_coordinates)
-        point = shapely.geometry.Point(x, y)
-        return point.within(poly)
-        # return poly.contains(point)
+    def edges_through_point(self, target) -> np.ndarray:
+        """
+        Vectorized gm.is_between_points for all edges.
+        :param target: Point
+        :return: Boolean array, True for the edges the point is on
+        """
+        cross_product = (target.y - self.y) * self.dx - (target.x - self.x) * self.dy
+        dot_product = (target.x - self.x) * self.dx + (target.y - self.y) * self.dy
+        return (np.abs(cross_product) <= EDGE_TOLERANCE) & (dot_product >= 0) & (dot_product <= self.squared_length)
 
     def point_is_on_edge(self, target) -> bool:
-        for a, b in zip(self.points, self.points[1:] + [self.points[0]]):
-            if gm.is_between_points(a, b, target):
-                return True
-        return False
+        if not self.bounds_overlap(self.edge_bounds, target.x, target.x, target.y, target.y):
+            return False
+        return bool(np.any(self.edges_through_point(target)))
+
+    def edges_on_line(self, target) -> np.ndarray:
+        """
+        Vectorized gm.check_if_point_on_line for all edges.
+        :param target: Point
+        :return: Boolean array, True for the edges the point is on
+        """
+        return distance_to_segments(target.x, target.y, self.x, self.y, self.end_x, self.end_y) < LINE_TOLERANCE
+
+    def edges_with_end_point(self, target) -> np.ndarray:
+        return (((self.x == target.x) & (self.y == target.y)) |
+                ((self.end_x == target.x) & (self.end_y == target.y)))
+
+    def line_crosses_edge(self, p_1: Point, p_2: Point) -> bool:
+        """
+        Vectorized gm.check_if_lines_intersect of the line from p_1 to p_2 with all edges. Lines sharing an end point
+        or touching the end point of the other line do not count as crossing, which leaves proper crossings only.
+        :param p_1:
+        :param p_2:
+        :return:
+        """
+        side_1 = self.dx * (p_1.y - self.y) - self.dy * (p_1.x - self.x)
+        side_2 = self.dx * (p_2.y - self.y) - self.dy * (p_2.x - self.x)
+        start_side = (p_2.x - p_1.x) * (self.y - p_1.y) - (p_2.y - p_1.y) * (self.x - p_1.x)
+        end_side = (p_2.x - p_1.x) * (self.end_y - p_1.y) - (p_2.y - p_1.y) * (self.end_x - p_1.x)
+        crossing = np.flatnonzero((side_1 * side_2 < 0) & (start_side * end_side < 0))
+        if len(crossing) == 0:
+            return False
+
+        # Only the crossing edges are checked for touching
+        x, y, end_x, end_y = self.x[crossing], self.y[crossing], self.end_x[crossing], self.end_y[crossing]
+        touching = (((x == p_1.x) & (y == p_1.y)) | ((end_x == p_1.x) & (end_y == p_1.y)) |
+                    ((x == p_2.x) & (y == p_2.y)) | ((end_x == p_2.x) & (end_y == p_2.y)) |
+                    (distance_to_segments(p_1.x, p_1.y, x, y, end_x, end_y) < LINE_TOLERANCE) |
+                    (distance_to_segments(p_2.x, p_2.y, x, y, end_x, end_y) < LINE_TOLERANCE) |
+                    (distance_to_segments(x, y, p_1.x, p_1.y, p_2.x, p_2.y) < LINE_TOLERANCE) |
+                    (distance_to_segments(end_x, end_y, p_1.x, p_1.y, p_2.x, p_2.y) < LINE_TOLERANCE))
+        return bool(np.any(~touching))
 
     def check_if_line_through_polygon(self, p_1: Point = None, p_2: Point = None, line: list = None) -> bool:
         """
@@ -75,7 +232,8 @@ class Polygon:
         :param line:
         :return:
         """
-        logger.debug(f"Checking if line {p_1} -> {p_2} through polygon {[str(p) for p in self.points]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Checking if line %s -> %s through polygon %s", p_1, p_2, [str(p) for p in self.points])
         # Define the points using the input type
         if (p_1 is None or p_2 is None) and line is None:
             raise AttributeError("Not enough valid attributes passed through")
@@ -83,33 +241,41 @@ class Polygon:
             p_1 = line[0]
             p_2 = line[1]
 
+        # ------------------ CASE 0: THE LINE DOES NOT COME NEAR THE POLYGON
+        if not self.bounds_overlap(self.edge_bounds, min(p_1.x, p_2.x), max(p_1.x, p_2.x),
+                                   min(p_1.y, p_2.y), max(p_1.y, p_2.y)):
+            logger.debug("LINE CHECK: CASE 0")
+            return False
+        elif self.coarse is not None and not self.coarse.get_shape().intersects(
+                shapely.LineString([(p_1.x, p_1.y), (p_2.x, p_2.y)])):
+            logger.debug("LINE CHECK: CASE 0")
+            return False
+
         # ------------------ CASE 1.1: A POINT IS IN THE POLYGON
         if self.check_if_contains_point(p_1) or self.check_if_contains_point(p_2):
-            logger.debug(f"LINE CHECK: CASE 1.1")
+            logger.debug("LINE CHECK: CASE 1.1")
             # logger.debug(f"Polygon contains the point "
             #              f"p1 {p_1}: {self.check_if_contains_point(p_1)}, "
             #              f"p2 {p_2}: {self.check_if_contains_point(p_2)}")
             return True
         # ------------------ CASE 1.2 BOTH POINTS ARE THE SAME
         elif p_1 is p_2:
-            logger.debug(f"LINE CHECK: CASE 1.2")
+            logger.debug("LINE CHECK: CASE 1.2")
             return False
         # ------------------ CASE 1.3 ONE POINT IS A POLYGON POINT, OTHER IS ON AN EDGE OF THE POLYGON
         elif (p_1 in self.points and self.point_is_on_edge(p_2)) or (self.point_is_on_edge(p_1) and p_2 in self.points):
-            logger.debug(f"LINE CHECK: CASE 1.3")
+            logger.debug("LINE CHECK: CASE 1.3")
             # Check if it's on one edge - if they are on the same edge, it does not violate -
             # if they are on different edges, we check it as usual
-            for a, b in zip(self.points, self.points[1:] + [self.points[0]]):
-                # Case 1.3a: Points are on the same edge - p_1 is one of the edge points
-                if p_1 in [a, b] and gm.check_if_point_on_line(point=p_2, line=[a, b]):
-                    return False
-                # Case 1.3b: Points are on the same edge - p_2 is one of the edge points
-                elif p_2 in [a, b] and gm.check_if_point_on_line(point=p_1, line=[a, b]):
-                    return False
-                # Case 1.3c: Points are on the same edge - both on the edge
-                elif (gm.check_if_point_on_line(point=p_1, line=[a, b]) and
-                      gm.check_if_point_on_line(point=p_2, line=[a, b])):
-                    return False
+            p_1_on_edge = self.edges_on_line(p_1)
+            p_2_on_edge = self.edges_on_line(p_2)
+            # Case 1.3a: Points are on the same edge - p_1 is one of the edge points
+            # Case 1.3b: Points are on the same edge - p_2 is one of the edge points
+            # Case 1.3c: Points are on the same edge - both on the edge
+            if np.any((self.edges_with_end_point(p_1) & p_2_on_edge) |
+                      (self.edges_with_end_point(p_2) & p_1_on_edge) |
+                      (p_1_on_edge & p_2_on_edge)):
+                return False
             # logger.debug(f"Points not on subsequent edge")
             # Case 1.3d - Points are on a different edge:
             if not self.check_if_can_connect_edge_points(p_1, p_2):
@@ -117,21 +283,20 @@ class Polygon:
 
         # ------------------ CASE 1.4 BOTH POINTS ARE ON EDGES OF THE POLYGON
         elif self.point_is_on_edge(p_1) and self.point_is_on_edge(p_2):
-            logger.debug(f"LINE CHECK: CASE 1.4a")
+            logger.debug("LINE CHECK: CASE 1.4a")
             # ----------------- CASE 1.4a THE POINTS ARE ON THE SAME EDGE
-            for a, b in zip(self.points, self.points[1:] + [self.points[0]]):
-                if gm.is_between_points(a, b, tested_point=p_1) and gm.is_between_points(a, b, tested_point=p_2):
-                    return False
+            if np.any(self.edges_through_point(p_1) & self.edges_through_point(p_2)):
+                return False
 
             # ----------------- CASE 1.4b THE POINTS ARE ON DIFFERENT EDGES
-            logger.debug(f"LINE CHECK: CASE 1.4b")
+            logger.debug("LINE CHECK: CASE 1.4b")
             if not self.check_if_can_connect_edge_points(p_1, p_2):
                 return True
 
         # ----------------- CASE 2: BOTH POINTS ARE ON THE POLYGON
         if p_1 in self.points and p_2 in self.points:
             # --------------- CASE 2.1: WE TRAVERSE AN EDGE
-            logger.debug(f"LINE CHECK: CASE 2.1")
+            logger.debug("LINE CHECK: CASE 2.1")
             for a, b in zip(self.points, self.points[1:] + [self.points[0]]):
                 if p_1 is a and p_2 is b:
                     return False
@@ -139,22 +304,19 @@ class Polygon:
                     return False
 
             # --------------------- CASE 2.2: WE JUMP PAST A POINT - TEST IF FEASIBLE
-            logger.debug(f"LINE CHECK: CASE 2.2")
+            logger.debug("LINE CHECK: CASE 2.2")
             if not self.check_if_can_connect_edge_points(p_1, p_2):
                 return True
             return False
         else:
             # --------------------- CASE 3: WE CROSS THE POLYGON
-            logger.debug(f"LINE CHECK: CASE 3")
-            for a, b in zip(self.points, self.points[1:] + [self.points[0]]):
-                # logger.debug(f"Checking line from {a} to {b}: {gm.check_if_lines_intersect([a, b], [p_1, p_2])}")
-                # Check if there is any line that the line intersects
-                if gm.check_if_lines_intersect([a, b], [p_1, p_2]):
-                    # logger.debug(f"Intersection between line ({a}, {b}) and line ({p_1}, {p_2})")
-                    return True
+            logger.debug("LINE CHECK: CASE 3")
+            # Check if there is any line that the line intersects
+            if self.line_crosses_edge(p_1, p_2):
+                return True
 
         # ----------------- CASE 4: WE DO NOT INTERACT WITH THE POLYGON
-        logger.debug(f"LINE CHECK: CASE 4")
+        logger.debug("LINE CHECK: CASE 4")
         return False
 
     def check_if_can_connect_edge_points(self, p_1, p_2):
@@ -164,15 +326,18 @@ class Polygon:
         :param p_2:
         :return:
         """
-        # TODO: Make this less resource intensive
+        lambdas = np.arange(0.01, 1, 0.01)
+        x = p_1.x * lambdas + p_2.x * (1 - lambdas)
+        y = p_1.y * lambdas + p_2.y * (1 - lambdas)
 
-        for lamb in np.arange(0.01, 1, 0.01):
-            if self.check_if_contains_point(
-                    Point(p_1.x * lamb + p_2.x * (1 - lamb), p_1.y * lamb + p_2.y * (1 - lamb))):
-                # logger.debug(f"{Point(p_1.x * lamb + p_2.x * (1 - lamb), p_1.y * lamb + p_2.y * (1 - lamb))} "
-                #              f"is in the polygon")
-                return False
-        logger.debug(f"{p_1} and {p_2} both in polygon. Does not cross polygon.")
+        # Vectorized check_if_contains_point of all points on the line, excluding the edges
+        cross_product = ((y[:, np.newaxis] - self.y) * self.dx - (x[:, np.newaxis] - self.x) * self.dy)
+        dot_product = ((x[:, np.newaxis] - self.x) * self.dx + (y[:, np.newaxis] - self.y) * self.dy)
+        on_edge = np.any((np.abs(cross_product) <= EDGE_TOLERANCE) & (dot_product >= 0) &
+                         (dot_product <= self.squared_length), axis=1)
+        if np.any(shapely.contains_xy(self.get_shape(), x, y) & ~on_edge):
+            return False
+        logger.debug("%s and %s both in polygon. Does not cross polygon.", p_1, p_2)
         return True
 
     def order_points(self):
@@ -184,3 +349,4 @@ class Polygon:
         self.points.remove(starting_point)
         self.points.sort(key=lambda p: gm.calculate_polar_angle(starting_point, p))
         self.points.insert(0, starting_point)
+        self.set_up_edges()
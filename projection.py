@@ -0,0 +1,54 @@
+"""
+Local equirectangular projection of the AoI onto a plane in km.
+Longitudes are scaled with the cosine of a single reference latitude, so the projection is an affine map of the
+lon/lat coordinates. Containment and intersection tests therefore give the same results in both systems and the
+simulation keeps storing lon/lat coordinates; only the distances are measured in the plane, without any
+trigonometry per call.
+"""
+import math
+
+import numpy as np
+
+import constants
+
+
+class EquirectangularProjection:
+    def __init__(self, reference_x: float, reference_y: float) -> None:
+        """
+        :param reference_x: Longitude (x) of the origin of the plane
+        :param reference_y: Latitude (y) of the origin of the plane, the scale is exact at this latitude
+        """
+        self.reference_x = reference_x
+        self.reference_y = reference_y
+        # km per degree along both axes
+        self.x_scale = constants.LONGITUDE_CONVERSION_FACTOR * math.cos(math.radians(reference_y))
+        self.y_scale = constants.LATITUDE_CONVERSION_FACTOR
+
+    @classmethod
+    def around_area_of_interest(cls):
+        return cls(reference_x=(constants.MIN_LAT + constants.MAX_LAT) / 2,
+                   reference_y=(constants.MIN_LONG + constants.MAX_LONG) / 2)
+
+    def to_plane(self, x, y) -> tuple:
+        """
+        :param x: Longitude(s)
+        :param y: Latitude(s)
+        :return: Coordinates in km from the origin of the plane
+        """
+        return (np.subtract(x, self.reference_x) * self.x_scale,
+                np.subtract(y, self.reference_y) * self.y_scale)
+
+    def to_lon_lat(self, plane_x, plane_y) -> tuple:
+        """
+        :param plane_x: km from the origin along x
+        :param plane_y: km from the origin along y
+        :return: Longitude(s) and latitude(s)
+        """
+        return (self.reference_x + np.divide(plane_x, self.x_scale),
+                self.reference_y + np.divide(plane_y, self.y_scale))
+
+    def distance(self, x_1: float, y_1: float, x_2: float, y_2: float) -> float:
+        """
+        Euclidean distance in km between two lon/lat locations in the plane
+        """
+        return math.hypot((x_1 - x_2) * self.x_scale, (y_1 - y_2) * self.y_scale)
@@ -0,0 +1,129 @@
+"""
+Pyramid of coarser summaries of a value per receptor, for fast inverse-distance weighted sums over large windows.
+Every level sums blocks of 2x2 cells of the level below. A query walks down from the coarsest level, uses the
+summary of a block that is far away relative to its size and only descends to finer levels near the query point.
+The cost of a query therefore grows with the log of the window size instead of with the number of cells.
+"""
+import numpy as np
+
+from general_maths import distance_between
+
+
+def pool(values: np.ndarray, reduce, fill: float) -> np.ndarray:
+    """
+    Combines every block of 2x2 cells into a single cell, odd shapes are padded with the fill value.
+    :param values: (rows, cols) array
+    :param reduce: Reduction over the cells of a block, e.g. np.sum
+    :param fill: Value of the padding
+    :return: (ceil(rows / 2), ceil(cols / 2)) array
+    """
+    rows, cols = values.shape
+    padded = np.full((rows + rows % 2, cols + cols % 2), fill, dtype=values.dtype)
+    padded[:rows, :cols] = values
+    return reduce(padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2), axis=(1, 3))
+
+
+class SummedPyramid:
+    def __init__(self, x: np.ndarray, y: np.ndarray, projection=None) -> None:
+        """
+        :param x: (rows, cols) x coordinates of the cells
+        :param y: (rows, cols) y coordinates of the cells
+        :param projection: Local km plane of the world to measure distances in
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.x = x
+        self.y = y
+        self.projection = projection
+
+        # Bounding box of the cells in every block, per level
+        self.min_x = [x]
+        self.max_x = [x]
+        self.min_y = [y]
+        self.max_y = [y]
+        while self.min_x[-1].shape != (1, 1):
+            self.min_x.append(pool(self.min_x[-1], np.nanmin, np.nan))
+            self.max_x.append(pool(self.max_x[-1], np.nanmax, np.nan))
+            self.min_y.append(pool(self.min_y[-1], np.nanmin, np.nan))
+            self.max_y.append(pool(self.max_y[-1], np.nanmax, np.nan))
+        self.block_size = [distance_between(min_x, min_y, max_x, max_y, projection)
+                           for min_x, max_x, min_y, max_y in zip(self.min_x, self.max_x, self.min_y, self.max_y)]
+
+        # Sum of the values and of the values times the coordinates, per level
+        self.mass = None
+        self.moment_x = None
+        self.moment_y = None
+
+    @property
+    def levels(self) -> int:
+        return len(self.min_x)
+
+    def refresh(self, values: np.ndarray) -> None:
+        """
+        Rebuilds all levels from the values of the cells.
+        :param values: (rows, cols) array
+        :return:
+        """
+        self.mass = [values]
+        self.moment_x = [values * self.x]
+        self.moment_y = [values * self.y]
+        for _ in range(1, self.levels):
+            self.mass.append(pool(self.mass[-1], np.sum, 0))
+            self.moment_x.append(pool(self.moment_x[-1], np.sum, 0))
+            self.moment_y.append(pool(self.moment_y[-1], np.sum, 0))
+
+    def weighted_sum(self, x: float, y: float, window: tuple, radius: float, theta: float) -> float:
+        """
+        Approximates the sum of value / max(0.1, distance) over the cells in the window and within the radius.
+        :param x: x coordinate of the query point
+        :param y: y coordinate of the query point
+        :param window: (min_row, max_row, min_col, max_col) of the cells, the maxima are exclusive
+        :param radius: Radius in km
+        :param theta: Largest ratio of block size to distance at which a block is summarised
+        :return:
+        """
+        min_row, max_row, min_col, max_col = window
+        total = 0.
+        level = self.levels - 1
+        rows = np.zeros(1, dtype=int)
+        cols = np.zeros(1, dtype=int)
+        while len(rows) > 0:
+            size = 2 ** level
+            first_rows, first_cols = rows * size, cols * size
+            overlaps = ((first_rows < max_row) & (first_rows + size > min_row) &
+                        (first_cols < max_col) & (first_cols + size > min_col))
+            rows, cols = rows[overlaps], cols[overlaps]
+            mass = self.mass[level][rows, cols]
+            has_mass = mass != 0
+            rows, cols, mass = rows[has_mass], cols[has_mass], mass[has_mass]
+
+            if level == 0:
+                distance = distance_between(x, y, self.x[rows, cols], self.y[rows, cols], self.projection)
+                within = distance <= radius
+                return total + np.sum(mass[within] / np.maximum(0.1, distance[within]))
+
+            # Nearest and furthest corner of the blocks
+            min_x, max_x = self.min_x[level][rows, cols], self.max_x[level][rows, cols]
+            min_y, max_y = self.min_y[level][rows, cols], self.max_y[level][rows, cols]
+            near = distance_between(x, y, np.clip(x, min_x, max_x), np.clip(y, min_y, max_y), self.projection)
+            far = distance_between(x, y, np.where(x - min_x > max_x - x, min_x, max_x),
+                                   np.where(y - min_y > max_y - y, min_y, max_y), self.projection)
+
+            first_rows, first_cols = rows * size, cols * size
+            inside = ((first_rows >= min_row) & (first_rows + size <= max_row) &
+                      (first_cols >= min_col) & (first_cols + size <= max_col))
+            summarised = inside & (far <= radius) & (self.block_size[level][rows, cols] < theta * near)
+            centroid_distance = distance_between(x, y,
+                                                 self.moment_x[level][rows, cols][summarised] / mass[summarised],
+                                                 self.moment_y[level][rows, cols][summarised] / mass[summarised],
+                                                 self.projection)
+            total += np.sum(mass[summarised] / np.maximum(0.1, centroid_distance))
+
+            # Open the remaining blocks that are not entirely out of range
+            opened = ~summarised & (near <= radius)
+            rows = (2 * rows[opened, np.newaxis] + np.array([0, 0, 1, 1])).reshape(-1)
+            cols = (2 * cols[opened, np.newaxis] + np.array([0, 1, 0, 1])).reshape(-1)
+            level -= 1
+            in_level = (rows < self.mass[level].shape[0]) & (cols < self.mass[level].shape[1])
+            rows, cols = rows[in_level], cols[in_level]
+        return total
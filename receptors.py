@@ -1,40 +1,53 @@
 """
 Receptors track the pheromones for the spread and contain local statistics (e.g. weather conditions) per region
 """
+import hashlib
+import json
 import time
 
 import matplotlib.patches
+from matplotlib.collections import EllipseCollection
 
 import constants
 import general_maths
 from points import Point
-from general_maths import calculate_distance
+from general_maths import distance_many
+from pyramid import SummedPyramid
 
 import numpy as np
 import matplotlib.pyplot as plt
 import math
+import shapely
 
 import os
-import logging
-import datetime
+from log_setup import get_logger
 
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("RECEPTORS")
-logger.setLevel(logging.DEBUG)
+logger = get_logger("RECEPTORS")
+
+RECEPTOR_PLOT_RADIUS = 0.05
+
+# Directions of the adjacent receptors as (row, col) offsets: N, NE, E, SE, S, SW, W, NW
+# Rows run along the x coordinate, columns along the y coordinate
+NEIGHBOUR_OFFSETS = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
 
 
 class Receptor:
-    def __init__(self, x, y, in_polygon=False) -> None:
+    def __init__(self, x, y, grid, index: int, in_polygon=False, in_area_of_interest: bool = None) -> None:
         # TODO: Receptors currently only 100 when IN a landmass ->
         #  change to territorial waters depending on rules (input diff polygon)
         #  - also finetune value
 
+        # Pheromones and sea state are stored in the arrays of the grid, at the index of the receptor
+        self.grid = grid
+        self.index = index
+
+        if in_area_of_interest is None:
+            in_area_of_interest = is_in_area_of_interest(Point(x, y))
+
         if in_polygon:
             self.uav_pheromones = 100
             self.decay = False
-        elif not is_in_area_of_interest(Point(x, y)):
+        elif not in_area_of_interest:
             self.uav_pheromones = 100
             self.decay = False
         else:
@@ -49,55 +62,34 @@ class Receptor:
         self.location = Point(x, y)
         self.in_polygon = in_polygon
 
-        self.patch = None
-
-        # Adjacent receptors:
-        self.adjacent_N = None
-        self.adjacent_NE = None
-        self.adjacent_E = None
-        self.adjacent_SE = None
-        self.adjacent_S = None
-        self.adjacent_SW = None
-        self.adjacent_W = None
-        self.adjacent_NW = None
-
-        self.adjacent_receptors = [self.adjacent_N,
-                                   self.adjacent_NE,
-                                   self.adjacent_E,
-                                   self.adjacent_SE,
-                                   self.adjacent_S,
-                                   self.adjacent_SW,
-                                   self.adjacent_W,
-                                   self.adjacent_NW]
-
     def __str__(self):
         return f"Receptor at: {self.location} - with pheromones {self.uav_pheromones}"
 
-    def initiate_plot(self, axes, cmap):
-        if not constants.PLOTTING_MODE:
-            return axes
+    @property
+    def adjacent_receptors(self) -> list:
+        """
+        :return: Adjacent receptors in the order of NEIGHBOUR_OFFSETS, None outside the grid
+        """
+        return [None if index < 0 else self.grid.receptors[index] for index in self.grid.neighbours[self.index]]
 
-        self.patch = matplotlib.patches.Circle((self.location.x, self.location.y),
-                                               radius=0.05, color=cmap(self.uav_pheromones / 100),
-                                               alpha=0.5, linewidth=None)
-        axes.add_patch(self.patch)
-        return axes
+    @property
+    def uav_pheromones(self) -> float:
+        return self.grid.pheromones[self.index]
 
-    def update_plot(self, axes, cmap):
-        if not constants.PLOTTING_MODE:
-            return
-        if constants.RECEPTOR_PLOT_PARAMETER == "pheromones":
-            self.patch.set_facecolor(cmap(self.uav_pheromones / 100))
-            self.patch.set_edgecolor(cmap(self.uav_pheromones / 100))
-        elif constants.RECEPTOR_PLOT_PARAMETER == "sea_states":
-            self.patch.set_facecolor(cmap(self.sea_state / 6))
-            self.patch.set_edgecolor(cmap(self.sea_state / 6))
-            # self.patch.set_facecolor(cmap(self.new_uniform_value))
-            # self.patch.set_edgecolor(cmap(self.new_uniform_value))
-        return axes
+    @uav_pheromones.setter
+    def uav_pheromones(self, value: float) -> None:
+        self.grid.pheromones[self.index] = value
+
+    @property
+    def sea_state(self) -> float:
+        return self.grid.sea_states[self.index]
+
+    @sea_state.setter
+    def sea_state(self, value: float) -> None:
+        self.grid.sea_states[self.index] = value
 
     def in_range_of_point(self, point: Point, radius: float) -> bool:
-        if point.distance_to_point(self.location) <= radius:
+        if point.distance_to_point(self.location, self.grid.world.projection) <= radius:
             return True
         else:
             return False
@@ -107,21 +99,51 @@ class ReceptorGrid:
     def __init__(self, polygons: list, world) -> None:
         self.receptors = []
 
+        # Static masks of all receptors
+        self.in_polygon = None
+        self.in_area_of_interest = None
+
+        # Index of the adjacent receptor per direction in NEIGHBOUR_OFFSETS
+        self.neighbours = None
+
+        # Whether pheromones can flow between a receptor and the next one along the rows / columns
+        self.open_row_links = None
+        self.open_col_links = None
+
+        # Coordinates of all receptors
+        self.x = None
+        self.y = None
+
+        # Values of all receptors, indexed by the index of the receptor
+        self.pheromones = None
+        self.sea_states = None
+        self.decay = None
+
+        # Coarser summaries of the pheromones for queries over large windows
+        self.pyramid = None
+        # Summed-area table of the pheromones, padded with a leading row and column of zeros
+        self.summed_area = None
+
+        self.collection = None
+
         self.max_cols = None
         self.max_rows = None
 
         self.world = world
 
         self.polygons = polygons
+        # Prepared union of the polygons, for point-in-polygon tests of many points
+        self.land = shapely.union_all([polygon.get_shape() for polygon in polygons])
+        shapely.prepare(self.land)
 
         self.initiate_grid(polygons)
 
-        if constants.RECEPTOR_PLOT_PARAMETER == "pheromones":
-            self.cmap = plt.get_cmap("Greens")
-        elif constants.RECEPTOR_PLOT_PARAMETER == "sea_states":
-            self.cmap = plt.get_cmap("OrRd")
-        else:
-            self.cmap = plt.get_cmap("Greys")
+        self.cmap = receptor_cmap(constants.RECEPTOR_PLOT_PARAMETER)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["collection"] = None
+        return state
 
     def initiate_grid(self, polygons) -> None:
         """
@@ -141,36 +163,100 @@ class ReceptorGrid:
         self.max_cols = int(np.ceil(num_cols))
         self.max_rows = int(np.ceil(num_rows))
 
-        for row in range(self.max_rows):
-            for col in range(self.max_cols):
-                x_location = min_lat + row * constants.GRID_HEIGHT
-                y_location = min_lon + col * constants.GRID_WIDTH
+        self.pheromones = np.zeros(self.max_rows * self.max_cols)
+        self.sea_states = np.zeros(self.max_rows * self.max_cols)
+
+        rows, cols = np.divmod(np.arange(self.max_rows * self.max_cols), self.max_cols)
+        x_locations = min_lat + rows * constants.GRID_HEIGHT
+        y_locations = min_lon + cols * constants.GRID_WIDTH
+        self.x = x_locations.astype(float)
+        self.y = y_locations.astype(float)
+        self.in_polygon, self.in_area_of_interest = self.load_static_masks(polygons, x_locations, y_locations)
 
-                in_polygon = general_maths.check_if_point_in_polygons(polygons, Point(x_location, y_location),
-                                                                      exclude_edges=False)
-                self.receptors.append(Receptor(x=x_location, y=y_location, in_polygon=in_polygon))
+        for index, (x_location, y_location) in enumerate(zip(x_locations.tolist(), y_locations.tolist())):
+            self.receptors.append(Receptor(x=x_location, y=y_location, grid=self, index=index,
+                                           in_polygon=bool(self.in_polygon[index]),
+                                           in_area_of_interest=bool(self.in_area_of_interest[index])))
 
+        self.decay = np.array([receptor.decay for receptor in self.receptors])
         self.set_up_adjacent_connections()
+        self.set_up_diffusion_links()
+
+        self.pyramid = SummedPyramid(self.as_grid(x_locations), self.as_grid(y_locations), self.world.projection)
+        self.update_pheromone_summaries()
+
+    def load_static_masks(self, polygons: list, x: np.ndarray, y: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Creates the masks of receptors within a polygon and receptors within the area of interest.
+        The masks only depend on the grid and the polygons, so they are cached on disk.
+        :param polygons:
+        :param x: x coordinates of all receptors
+        :param y: y coordinates of all receptors
+        :return: Boolean arrays in_polygon and in_area_of_interest
+        """
+        description = json.dumps({"x": x.tolist(), "y": y.tolist(),
+                                  "aoi": [constants.MIN_LAT, constants.MAX_LAT, constants.MIN_LONG, constants.MAX_LONG],
+                                  "polygons": [[(p.x, p.y) for p in polygon.points] for polygon in polygons]})
+        key = hashlib.sha1(description.encode()).hexdigest()[:16]
+        path = os.path.join(constants.STATIC_MASK_CACHE_DIRECTORY, f"receptor_masks_{key}.npz")
+
+        if constants.CACHE_STATIC_MASKS and os.path.exists(path):
+            with np.load(path) as masks:
+                return masks["in_polygon"], masks["in_area_of_interest"]
+
+        in_polygon = general_maths.rasterize_polygons(polygons, x, y)
+        in_area_of_interest = ((constants.MIN_LAT <= x) & (x <= constants.MAX_LAT) &
+                               (constants.MIN_LONG <= y) & (y <= constants.MAX_LONG))
+
+        if constants.CACHE_STATIC_MASKS:
+            os.makedirs(constants.STATIC_MASK_CACHE_DIRECTORY, exist_ok=True)
+            np.savez_compressed(path, in_polygon=in_polygon, in_area_of_interest=in_area_of_interest)
+        return in_polygon, in_area_of_interest
 
     def set_up_adjacent_connections(self):
-        for receptor in self.receptors:
-            if is_in_area_of_interest(receptor.location):
-                x, y = receptor.location.x, receptor.location.y
-                receptor.adjacent_N = self.get_receptor_at_location(Point(x, y + constants.GRID_HEIGHT))
-                receptor.adjacent_NE = self.get_receptor_at_location(Point(x + constants.GRID_WIDTH,
-                                                                           y + constants.GRID_HEIGHT))
-                receptor.adjacent_E = self.get_receptor_at_location(Point(x + constants.GRID_WIDTH,
-                                                                          y))
-                receptor.adjacent_SE = self.get_receptor_at_location(Point(x + constants.GRID_WIDTH,
-                                                                           y - constants.GRID_HEIGHT))
-                receptor.adjacent_S = self.get_receptor_at_location(Point(x,
-                                                                          y - constants.GRID_HEIGHT))
-                receptor.adjacent_SW = self.get_receptor_at_location(Point(x - constants.GRID_WIDTH,
-                                                                           y - constants.GRID_HEIGHT))
-                receptor.adjacent_W = self.get_receptor_at_location(Point(x - constants.GRID_WIDTH,
-                                                                          y))
-                receptor.adjacent_NW = self.get_receptor_at_location(Point(x - constants.GRID_WIDTH,
-                                                                           y + constants.GRID_HEIGHT))
+        """
+        Creates the table with the index of the adjacent receptor in every direction, -1 outside the grid.
+        Receptors are stored row by row, so a neighbour is found by offsetting the row and column.
+        """
+        rows, cols = np.divmod(np.arange(len(self.receptors)), self.max_cols)
+        self.neighbours = np.full((len(self.receptors), len(NEIGHBOUR_OFFSETS)), -1, dtype=np.int32)
+        for direction, (row_offset, col_offset) in enumerate(NEIGHBOUR_OFFSETS):
+            neighbour_rows = rows + row_offset
+            neighbour_cols = cols + col_offset
+            inside = ((0 <= neighbour_rows) & (neighbour_rows < self.max_rows) &
+                      (0 <= neighbour_cols) & (neighbour_cols < self.max_cols))
+            self.neighbours[inside, direction] = neighbour_rows[inside] * self.max_cols + neighbour_cols[inside]
+
+    def set_up_diffusion_links(self) -> None:
+        """
+        Pheromones only flow between two decaying receptors, land and the frame around the AoI are no-flux boundaries.
+        """
+        decay = self.as_grid(self.decay)
+        self.open_row_links = decay[1:, :] & decay[:-1, :]
+        self.open_col_links = decay[:, 1:] & decay[:, :-1]
+
+    def as_grid(self, values: np.ndarray) -> np.ndarray:
+        """
+        :param values: Value per receptor
+        :return: View of the values as a (rows, cols) array
+        """
+        return values.reshape(self.max_rows, self.max_cols)
+
+    def shift(self, values: np.ndarray, row_offset: int, col_offset: int, fill: float = 0) -> np.ndarray:
+        """
+        Gives every receptor the value of its neighbour at the given offset, for stencil operations on the grid.
+        :param values: Value per receptor
+        :param row_offset:
+        :param col_offset:
+        :param fill: Value for receptors without a neighbour at the offset
+        :return: Array with the value of the neighbour per receptor
+        """
+        grid_values = self.as_grid(values)
+        shifted = np.full_like(grid_values, fill)
+        rows, cols = grid_values.shape
+        shifted[max(0, -row_offset): rows - max(0, row_offset), max(0, -col_offset): cols - max(0, col_offset)] = \
+            grid_values[max(0, row_offset): rows - max(0, -row_offset), max(0, col_offset): cols - max(0, -col_offset)]
+        return shifted.reshape(-1)
 
     def get_receptor_at_location(self, point: Point) -> Receptor | None:
         min_lat = constants.MIN_LAT - constants.LAT_GRID_EXTRA
@@ -196,40 +282,75 @@ class ReceptorGrid:
         :param radius: Radius around the point
         :return:
         """
+        indices, _ = self.receptor_indices_in_radius(point, radius)
+        return [self.receptors[index] for index in indices]
+
+    def receptor_indices_in_radius(self, point: Point, radius: float) -> (np.ndarray, np.ndarray):
+        """
+        Vectorized selection of the receptors within a radius of a point, only the window around the point is checked.
+        :param point: Point object
+        :param radius: Radius around the point
+        :return: Indices of the receptors in the radius and their distances to the point
+        """
         t_0 = time.perf_counter()
+        min_row, max_row, min_col, max_col = self.window_around_point(point, radius)
+        indices = (np.arange(min_row, max_row)[:, np.newaxis] * self.max_cols
+                   + np.arange(min_col, max_col)[np.newaxis, :]).reshape(-1)
+        distances = distance_many(self.x[indices], self.y[indices], point.x, point.y, self.world.projection)
+        in_radius = distances <= radius * self.world.scenario.receptor_radius_multiplier
+
+        t_1 = time.perf_counter()
+        constants.time_spent_selecting_receptors += (t_1 - t_0)
+        return indices[in_radius], distances[in_radius]
+
+    def window_around_point(self, point: Point, radius: float) -> (int, int, int, int):
+        """
+        Finds the rows and columns of the receptors that can be in the radius around a point.
+        :param point:
+        :param radius: Radius around the point
+        :return: min_row, max_row, min_col, max_col - the maxima are exclusive
+        """
+        min_row, max_row, min_col, max_col = self.windows_around_points(np.array([point.x]), np.array([point.y]),
+                                                                        radius)
+        return int(min_row[0]), int(max_row[0]), int(min_col[0]), int(max_col[0])
+
+    def windows_around_points(self, x: np.ndarray, y: np.ndarray, radius: float) -> tuple:
+        """
+        Vectorized window_around_point for many points at once.
+        :param x: x coordinates of the points
+        :param y: y coordinates of the points
+        :param radius: Radius around the points
+        :return: Arrays of min_row, max_row, min_col, max_col - the maxima are exclusive
+        """
         # Adjust radius to an upperbound of the coordinate transformation
         lon_lat_radius = max(radius / 100, constants.GRID_WIDTH / 2)
         # only check receptors in the rectangle of size radius - select receptors in the list based on
         # how the list is constructed.
-        x, y = point.x, point.y
         min_x = x - lon_lat_radius
         max_x = x + lon_lat_radius
         min_y = y - lon_lat_radius
         max_y = y + lon_lat_radius
 
         # see in which rows and columns this rectangle is:
-        min_row = int(max(np.floor((min_x - (constants.MIN_LAT - constants.LAT_GRID_EXTRA))
-                                   / constants.GRID_HEIGHT), 0))
-        max_row = int(min(np.ceil((max_x - (constants.MIN_LAT - constants.LAT_GRID_EXTRA))
-                                  / constants.GRID_HEIGHT), self.max_rows))
-
-        min_col = int(max(np.floor((min_y - (constants.MIN_LONG - constants.LONG_GRID_EXTRA))
-                                   / constants.GRID_WIDTH), 0))
-        max_col = int(min(np.ceil((max_y - (constants.MIN_LONG - constants.LONG_GRID_EXTRA))
-                                  / constants.GRID_WIDTH), self.max_cols))
-
-        receptors_in_radius = []
-        for row_index in range(min_row, max_row):
-            for col_index in range(min_col, max_col):
-                index = self.max_cols * row_index + col_index
-                r = self.receptors[index]
-
-                if r.in_range_of_point(point, radius * constants.RECEPTOR_RADIUS_MULTIPLIER):
-                    receptors_in_radius.append(r)
-
-        t_1 = time.perf_counter()
-        constants.time_spent_selecting_receptors += (t_1 - t_0)
-        return receptors_in_radius
+        min_row = np.maximum(np.floor((min_x - (constants.MIN_LAT - constants.LAT_GRID_EXTRA))
+                                      / constants.GRID_HEIGHT), 0).astype(int)
+        max_row = np.minimum(np.ceil((max_x - (constants.MIN_LAT - constants.LAT_GRID_EXTRA))
+                                     / constants.GRID_HEIGHT), self.max_rows).astype(int)
+
+        min_col = np.maximum(np.floor((min_y - (constants.MIN_LONG - constants.LONG_GRID_EXTRA))
+                                      / constants.GRID_WIDTH), 0).astype(int)
+        max_col = np.minimum(np.ceil((max_y - (constants.MIN_LONG - constants.LONG_GRID_EXTRA))
+                                     / constants.GRID_WIDTH), self.max_cols).astype(int)
+        return min_row, np.maximum(max_row, min_row), min_col, np.maximum(max_col, min_col)
+
+    def window_totals(self, min_row: np.ndarray, max_row: np.ndarray,
+                      min_col: np.ndarray, max_col: np.ndarray) -> np.ndarray:
+        """
+        Reads the total pheromones of rectangular windows from the summed-area table, in O(1) per window.
+        :return: Total pheromones per window
+        """
+        table = self.summed_area
+        return table[max_row, max_col] - table[min_row, max_col] - table[max_row, min_col] + table[min_row, min_col]
 
     def get_closest_receptor(self, point: Point) -> Receptor:
         h_space_between_receptors = constants.GRID_WIDTH
@@ -243,7 +364,7 @@ class ReceptorGrid:
         selected_receptor = None
 
         for receptor in potential_receptors:
-            distance_to_receptor = receptor.location.distance_to_point(point)
+            distance_to_receptor = receptor.location.distance_to_point(point, self.world.projection)
             if distance_to_receptor < dist:
                 dist = distance_to_receptor
                 selected_receptor = receptor
@@ -259,12 +380,83 @@ class ReceptorGrid:
 
         return selected_receptor
 
-    def depreciate_pheromones(self):
-        for receptor in self.receptors:
-            if receptor.decay:
-                receptor.uav_pheromones = (receptor.uav_pheromones *
-                                           constants.PHEROMONE_DEPRECIATION_FACTOR_PER_TIME_DELTA
-                                           ** (1 / self.world.time_delta))
+    def depreciate_pheromones(self, steps: int = 1):
+        """
+        Depreciates the pheromones of all decaying receptors
+        :param steps: Number of time steps to depreciate over
+        :return:
+        """
+        self.pheromones[self.decay] *= self.depreciation_factor(steps)
+
+    def depreciation_factor(self, steps: int = 1) -> float:
+        """
+        :param steps: Number of time steps
+        :return: Factor by which the pheromones depreciate over the time steps
+        """
+        return (self.world.scenario.pheromone_depreciation_factor_per_time_delta
+                ** (steps / self.world.time_delta))
+
+    def diffuse_pheromones(self, steps: int = 1) -> None:
+        """
+        Diffuses the pheromones to the adjacent receptors with a 5-point stencil.
+        The flow between two receptors is added to one and subtracted from the other, so diffusion conserves the
+        total amount of pheromones. Long periods are split in sub-steps to keep the explicit scheme stable.
+        :param steps: Number of time steps to diffuse over
+        :return:
+        """
+        rate = self.world.scenario.pheromone_diffusion_rate * self.world.time_delta * steps
+        if rate <= 0:
+            return
+        sub_steps = int(np.ceil(rate / constants.PHEROMONE_DIFFUSION_MAX_RATE))
+        rate /= sub_steps
+
+        pheromones = self.as_grid(self.pheromones)
+        for _ in range(sub_steps):
+            row_flow = rate * (pheromones[1:, :] - pheromones[:-1, :]) * self.open_row_links
+            col_flow = rate * (pheromones[:, 1:] - pheromones[:, :-1]) * self.open_col_links
+            pheromones[:-1, :] += row_flow
+            pheromones[1:, :] -= row_flow
+            pheromones[:, :-1] += col_flow
+            pheromones[:, 1:] -= col_flow
+
+    def update_pheromone_summaries(self) -> None:
+        """
+        Refreshes the summaries of the pheromones, called once per time step after the pheromones have changed.
+        :return:
+        """
+        if constants.PHEROMONE_PYRAMID:
+            self.pyramid.refresh(self.as_grid(self.pheromones))
+        if constants.PHEROMONE_SUMMED_AREA:
+            self.summed_area = np.zeros((self.max_rows + 1, self.max_cols + 1))
+            np.cumsum(np.cumsum(self.as_grid(self.pheromones), axis=0), axis=1, out=self.summed_area[1:, 1:])
+
+    def initiate_plot(self, axes) -> None:
+        """
+        Adds all receptors to the plot as a single collection.
+        :param axes:
+        :return:
+        """
+        if not constants.PLOTTING_MODE:
+            return
+        self.collection = create_receptor_collection(axes,
+                                                     x=[receptor.location.x for receptor in self.receptors],
+                                                     y=[receptor.location.y for receptor in self.receptors])
+        self.update_plot()
+
+    def update_plot(self) -> None:
+        """
+        Updates the colors of all receptors from the plotted parameter in one call.
+        :return:
+        """
+        if not constants.PLOTTING_MODE or self.collection is None:
+            return
+        if constants.RECEPTOR_PLOT_PARAMETER == "pheromones":
+            values = self.pheromones
+        else:
+            values = self.sea_states
+        colors = receptor_colors(values, constants.RECEPTOR_PLOT_PARAMETER, self.cmap)
+        self.collection.set_facecolor(colors)
+        self.collection.set_edgecolor(colors)
 
     def calculate_CoP(self, point: Point, radius: float) -> (float, list):
         """
@@ -274,7 +466,8 @@ class ReceptorGrid:
         :return:
         """
         # Increase radius of receptors selected by a factor 2 to make more future-proof decisions
-        receptors = self.select_receptors_in_radius(point, radius * 2)
+        indices, distances = self.receptor_indices_in_radius(point, radius * 2)
+        receptors = [self.receptors[index] for index in indices]
 
         if not is_in_area_of_interest(point):
             return math.inf, receptors
@@ -283,15 +476,94 @@ class ReceptorGrid:
             if polygon.check_if_contains_point(point, exclude_edges=False):
                 return math.inf, receptors
 
-        CoP = 0
-        for receptor in receptors:
-            CoP += (1 / max(0.1, calculate_distance(a=point, b=receptor.location))) * receptor.uav_pheromones
+        CoP = float(np.sum(self.pheromones[indices] / np.maximum(0.1, distances)))
         # logger.debug(f"Calculated CoP at {point} with rad {radius}: {CoP} - from {len(receptors)} receptors.")
         return CoP, receptors
 
+    def approximate_CoP(self, point: Point, radius: float) -> float:
+        """
+        Approximates calculate_CoP from the pheromone pyramid, blocks of receptors far from the point are summarised.
+        :param point:
+        :param radius:
+        :return:
+        """
+        if not is_in_area_of_interest(point):
+            return math.inf
+
+        for polygon in self.polygons:
+            if polygon.check_if_contains_point(point, exclude_edges=False):
+                return math.inf
+
+        window = self.window_around_point(point, radius * 2)
+        return float(self.pyramid.weighted_sum(point.x, point.y, window,
+                                               radius * 2 * self.world.scenario.receptor_radius_multiplier,
+                                               theta=constants.PHEROMONE_PYRAMID_THETA))
+
+    def local_concentration(self, point: Point) -> float:
+        """
+        Interpolates the concentration of pheromones at the point bilinearly from the four receptors around it.
+        With diffusion the pheromone field is already smoothed, so this replaces the radius query of calculate_CoP.
+        Interpolating (instead of reading the receptor at the point) separates points that fall in the same cell.
+        :param point:
+        :return: Interpolated pheromones, inf outside the AoI or in a polygon like calculate_CoP
+        """
+        if not is_in_area_of_interest(point):
+            return math.inf
+
+        if shapely.intersects_xy(self.land, point.x, point.y):
+            return math.inf
+
+        # Receptors sit on the corners of the cells, the AoI lies within the frame so all four corners exist
+        row_position = (point.x - (constants.MIN_LAT - constants.LAT_GRID_EXTRA)) / constants.GRID_HEIGHT
+        col_position = (point.y - (constants.MIN_LONG - constants.LONG_GRID_EXTRA)) / constants.GRID_WIDTH
+        row = min(int(row_position), self.max_rows - 2)
+        col = min(int(col_position), self.max_cols - 2)
+        row_fraction = row_position - row
+        col_fraction = col_position - col
+
+        pheromones = self.as_grid(self.pheromones)[row:row + 2, col:col + 2]
+        row_weights = np.array([1 - row_fraction, row_fraction])
+        col_weights = np.array([1 - col_fraction, col_fraction])
+        return float(row_weights @ pheromones @ col_weights)
+
 
 def is_in_area_of_interest(point: Point) -> bool:
     if constants.MIN_LAT <= point.x <= constants.MAX_LAT and constants.MIN_LONG <= point.y <= constants.MAX_LONG:
         return True
     else:
         return False
+
+
+def receptor_cmap(parameter: str):
+    if parameter == "pheromones":
+        return plt.get_cmap("Greens")
+    elif parameter == "sea_states":
+        return plt.get_cmap("OrRd")
+    else:
+        return plt.get_cmap("Greys")
+
+
+def receptor_colors(values: np.ndarray, parameter: str, cmap) -> np.ndarray:
+    """
+    :param values: Pheromones or sea states of the receptors
+    :param parameter: The plotted parameter, "pheromones" or "sea_states"
+    :param cmap: Colormap of the parameter
+    :return: RGBA color per receptor
+    """
+    if parameter == "pheromones":
+        return cmap(np.asarray(values) / 100)
+    elif parameter == "sea_states":
+        return cmap(np.asarray(values) / 6)
+    else:
+        return cmap(np.zeros(len(values)))
+
+
+def create_receptor_collection(axes, x, y, animated: bool = False) -> EllipseCollection:
+    """
+    Creates a single collection of circles for all receptors and adds it to the axes.
+    """
+    collection = EllipseCollection(widths=2 * RECEPTOR_PLOT_RADIUS, heights=2 * RECEPTOR_PLOT_RADIUS, angles=0,
+                                   units="xy", offsets=np.column_stack([x, y]), offset_transform=axes.transData,
+                                   alpha=0.5, animated=animated)
+    axes.add_collection(collection)
+    return collection
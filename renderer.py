@@ -0,0 +1,241 @@
+"""
+Renders the map video of a run from its recorded telemetry, independent of the simulation.
+The static map (landmasses, docks, airbases) is drawn once per worker, the receptors are a single collection and
+the entities are drawn as blitted artists on top of the cached background. Chunks of frames can be rendered in
+parallel worker processes, after which the frames are muxed into a video with ffmpeg.
+"""
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.image
+import matplotlib.patches
+import matplotlib.pyplot as plt
+from matplotlib.collections import EllipseCollection
+import numpy as np
+
+import constants
+import constants_coords
+import telemetry
+from receptors import create_receptor_collection, receptor_cmap, receptor_colors
+
+from log_setup import get_logger
+
+logger = get_logger("RENDERER")
+
+FRAME_NAME = "frame_%07d.png"
+
+
+class FrameRenderer:
+    def __init__(self, meta: dict, parameter: str = None, ship_labels: bool = True):
+        """
+        :param meta: Meta data of the recorded run
+        :param parameter: Receptor value to color the grid by, "sea_states" or "pheromones"
+        :param ship_labels: Whether to plot the ship ids next to the ships
+        """
+        if parameter is None:
+            parameter = constants.RECEPTOR_PLOT_PARAMETER
+        self.meta = meta
+        self.parameter = parameter
+        self.ship_labels = ship_labels
+        self.cmap = receptor_cmap(parameter)
+
+        self.fig, self.ax = plt.subplots(1, figsize=(constants.PLOT_SIZE, constants.PLOT_SIZE))
+        self.plot_static_map()
+
+        self.receptors = create_receptor_collection(self.ax, meta["receptor_x"], meta["receptor_y"], animated=True)
+
+        self.drone_radii = EllipseCollection(widths=[], heights=[], angles=[], units="xy", offsets=np.empty((0, 2)),
+                                             offset_transform=self.ax.transData, color=constants.UAV_COLOR,
+                                             alpha=0.1, animated=True)
+        self.ax.add_collection(self.drone_radii)
+        self.drone_markers = self.ax.plot([], [], linestyle="", color=constants.UAV_COLOR, marker="X",
+                                          markersize=constants.WORLD_MARKER_SIZE - 1, markeredgecolor="black",
+                                          animated=True)[0]
+        self.ship_markers = self.ax.plot([], [], linestyle="", color=constants.MERCHANT_COLOR, marker="*",
+                                         markersize=constants.WORLD_MARKER_SIZE, markeredgecolor="black",
+                                         animated=True)[0]
+        self.title = self.ax.set_title("", animated=True)
+
+        # Cache everything that does not change between frames
+        self.fig.canvas.draw()
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+        order = np.argsort(meta["uav_id"])
+        self.uav_ids = meta["uav_id"][order]
+        self.uav_radii = meta["uav_radius"][order]
+
+    def plot_static_map(self) -> None:
+        self.ax.set_facecolor("#2596be")
+        self.ax.set_xlim(left=constants.MIN_LAT, right=constants.MAX_LAT)
+        self.ax.set_xlabel("Latitude")
+        self.ax.set_ylim(bottom=constants.MIN_LONG, top=constants.MAX_LONG)
+        self.ax.set_ylabel("Longitude")
+
+        for name, points, color in constants_coords.LANDMASSES + [constants_coords.CHINA]:
+            self.ax.add_patch(matplotlib.patches.Polygon([(p.x, p.y) for p in points],
+                                                         closed=True, color=color, alpha=0.8))
+
+        self.ax.plot(self.meta["dock_x"], self.meta["dock_y"], linestyle="", color="green", marker="D",
+                     markersize=constants.WORLD_MARKER_SIZE - 4, markeredgewidth=2, alpha=0.5)
+        self.ax.plot(self.meta["airbase_x"], self.meta["airbase_y"], linestyle="", color="rebeccapurple",
+                     marker="8", markersize=constants.WORLD_MARKER_SIZE - 4, markeredgewidth=2, alpha=0.5)
+
+    def render(self, world_time: float, grid_values: np.ndarray, ships: dict, drones: dict) -> np.ndarray:
+        """
+        Renders a single frame.
+        :param world_time:
+        :param grid_values: Value of the plotted parameter per receptor
+        :param ships: Ship columns of the frame
+        :param drones: Drone columns of the frame
+        :return: RGBA image of the frame
+        """
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+
+        self.title.set_text(f"Sea Map - time is {world_time: .3f}")
+        self.ax.draw_artist(self.title)
+
+        self.receptors.set_facecolor(receptor_colors(grid_values, self.parameter, self.cmap))
+        self.receptors.set_edgecolor(self.receptors.get_facecolor())
+        self.ax.draw_artist(self.receptors)
+
+        drone_offsets = np.column_stack([drones["x"], drones["y"]])
+        radii = self.uav_radii[np.searchsorted(self.uav_ids, drones["uav_id"])]
+        diameters = 2 * radii / constants.LATITUDE_CONVERSION_FACTOR
+        self.drone_radii.set_offsets(drone_offsets)
+        self.drone_radii.set_widths(diameters)
+        self.drone_radii.set_heights(diameters)
+        self.drone_radii.set_angles(np.zeros(len(diameters)))
+        self.ax.draw_artist(self.drone_radii)
+        self.drone_markers.set_data(drones["x"], drones["y"])
+        self.ax.draw_artist(self.drone_markers)
+        for uav_id, x, y in zip(drones["uav_id"], drones["x"], drones["y"]):
+            self.draw_label(x, y - 0.001, uav_id)
+
+        self.ship_markers.set_data(ships["x"], ships["y"])
+        self.ax.draw_artist(self.ship_markers)
+        if self.ship_labels:
+            for ship_id, x, y in zip(ships["ship_id"], ships["x"], ships["y"]):
+                self.draw_label(x, y, ship_id)
+
+        canvas.blit(self.fig.bbox)
+        return np.asarray(canvas.buffer_rgba()).copy()
+
+    def draw_label(self, x: float, y: float, label) -> None:
+        text = self.ax.text(x, y, str(label), color="white", animated=True)
+        self.ax.draw_artist(text)
+        text.remove()
+
+    def close(self) -> None:
+        plt.close(self.fig)
+
+
+def rows_per_step(table: dict, steps: np.ndarray) -> list:
+    """
+    Splits a table into the rows of each step, the rows of a table are ordered by step.
+    :param table:
+    :param steps: Sorted steps to split on
+    :return: List with a dictionary of columns per step
+    """
+    starts = np.searchsorted(table["step"], steps, side="left")
+    ends = np.searchsorted(table["step"], steps, side="right")
+    return [{name: column[start:end] for name, column in table.items()} for start, end in zip(starts, ends)]
+
+
+def read_chunk(path: str, table_name: str) -> dict:
+    prefix = table_name + "_"
+    with np.load(path) as chunk:
+        return {key[len(prefix):]: chunk[key] for key in chunk.files if key.startswith(prefix)}
+
+
+def render_chunk(directory: str, chunk_file: str, frames_directory: str, first_frame: int,
+                 initial_grid: np.ndarray, parameter: str = None, ship_labels: bool = True) -> int:
+    """
+    Renders the frames of all steps in a telemetry chunk.
+    :param directory: Telemetry directory
+    :param chunk_file: Name of the chunk file
+    :param frames_directory: Directory the frames are written to
+    :param first_frame: Frame number of the first step in the chunk
+    :param initial_grid: Receptor values before the first grid snapshot in the chunk
+    :param parameter: Receptor value to color the grid by
+    :param ship_labels: Whether to plot the ship ids next to the ships
+    :return: Number of frames rendered
+    """
+    if parameter is None:
+        parameter = constants.RECEPTOR_PLOT_PARAMETER
+    path = os.path.join(directory, chunk_file)
+    steps = read_chunk(path, "pheromones")
+    ships = rows_per_step(read_chunk(path, "ships"), steps["step"])
+    drones = rows_per_step(read_chunk(path, "drones"), steps["step"])
+    grid = read_chunk(path, "grid")
+
+    frame_renderer = FrameRenderer(telemetry.load_meta(directory), parameter, ship_labels)
+    grid_values = initial_grid
+    grid_index = 0
+    for i, (step, world_time) in enumerate(zip(steps["step"], steps["time"])):
+        while grid_index < len(grid["step"]) and grid["step"][grid_index] <= step:
+            grid_values = grid[parameter][grid_index]
+            grid_index += 1
+        frame = frame_renderer.render(world_time, grid_values, ships[i], drones[i])
+        matplotlib.image.imsave(os.path.join(frames_directory, FRAME_NAME % (first_frame + i)), frame)
+    frame_renderer.close()
+    return len(steps["step"])
+
+
+def render_video(directory: str, output_file: str, parameter: str = None, workers: int = 1, fps: int = 100,
+                 ship_labels: bool = True, keep_frames: bool = False) -> None:
+    """
+    Renders the map video of a recorded run.
+    :param directory: Telemetry directory of the run
+    :param output_file: Path of the video
+    :param parameter: Receptor value to color the grid by, "sea_states" or "pheromones"
+    :param workers: Number of processes rendering chunks in parallel
+    :param fps: Frames per second of the video
+    :param ship_labels: Whether to plot the ship ids next to the ships
+    :param keep_frames: Whether to keep the rendered frames after muxing
+    :return:
+    """
+    if parameter is None:
+        parameter = constants.RECEPTOR_PLOT_PARAMETER
+    meta = telemetry.load_meta(directory)
+    chunk_files = sorted(f for f in os.listdir(directory) if f.startswith("chunk_") and f.endswith(".npz"))
+    frames_directory = os.path.join(directory, "frames")
+    os.makedirs(frames_directory, exist_ok=True)
+
+    # Frame offsets and the receptor values each chunk starts from
+    jobs = []
+    first_frame = 0
+    grid_values = meta["initial_" + parameter]
+    for chunk_file in chunk_files:
+        path = os.path.join(directory, chunk_file)
+        jobs.append((directory, chunk_file, frames_directory, first_frame, grid_values, parameter, ship_labels))
+        first_frame += len(read_chunk(path, "pheromones")["step"])
+        grid = read_chunk(path, "grid")
+        if len(grid["step"]) > 0:
+            grid_values = grid[parameter][-1]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(render_chunk, *job) for job in jobs]
+            frames_rendered = sum(future.result() for future in futures)
+    else:
+        frames_rendered = sum(render_chunk(*job) for job in jobs)
+    print(f"Rendered {frames_rendered} frames from {len(chunk_files)} chunks.")
+
+    if shutil.which("ffmpeg") is None:
+        logger.error("ffmpeg not found, frames are kept in %s", frames_directory)
+        return
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-framerate", str(fps),
+                    "-i", os.path.join(frames_directory, FRAME_NAME),
+                    "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", output_file], check=True)
+
+    if not keep_frames:
+        shutil.rmtree(frames_directory)
+
+
+if __name__ == "__main__":
+    render_video(constants.TELEMETRY_DIRECTORY, "animated_arrivals.mp4", workers=os.cpu_count())
@@ -0,0 +1,382 @@
+"""
+Routing to the fixed destinations of the simulation (docks and airbases) over a visibility graph of the obstacles.
+The nodes of the graph are the vertices of all polygons to avoid and the fixed destinations, two nodes are connected
+when the line between them is not obstructed. A shortest-path tree is precomputed for every fixed destination, a
+route to one of them only connects the start to the best visible node and reads the rest of the path from the tree.
+
+Routes to any other point are planned on a coarser level first: islands that lie close together are grouped in
+clusters, and the open water around and between the clusters is covered by gateways. The route runs over the
+precomputed gateway graph, the legs that enter the outline of a cluster are then refined over a visibility graph
+of the convex vertices of its islands. Only when the start or end cannot see any gateway is the route created around
+the obstacles as before.
+"""
+import copy
+import itertools
+import time
+
+import numpy as np
+import shapely
+
+import constants
+import general_maths as gm
+from points import Point
+from routes import Route, create_route
+from theta_star import ThetaStarPlanner
+
+# ----------------------------------------------- LOGGER SET UP ------------------------------------------------
+from log_setup import get_logger
+
+logger = get_logger("ROUTER")
+
+
+# --------------------------------------------- END LOGGER SET UP ------------------------------------------------
+
+# DE-9IM pattern of a line whose interior intersects the interior of the land
+VISIBILITY_PATTERN = "T********"
+
+
+class VisibilityGraph:
+    def __init__(self, polygons_to_avoid: list, nodes: list, projection=None) -> None:
+        """
+        :param polygons_to_avoid: List of polygons to avoid
+        :param nodes: Points of the graph, connected when the line between them is not obstructed
+        :param projection: Local km plane of the world to measure the edges in
+        """
+        self.polygons_to_avoid = polygons_to_avoid
+        self.nodes = nodes
+        self.projection = projection
+
+        self.x = np.array([p.x for p in self.nodes], dtype=float)
+        self.y = np.array([p.y for p in self.nodes], dtype=float)
+        self.lengths = gm.pairwise_distance(np.column_stack((self.x, self.y)), np.column_stack((self.x, self.y)),
+                                            projection)
+
+        self.land = shapely.union_all([polygon.get_shape() for polygon in polygons_to_avoid])
+        shapely.prepare(self.land)
+
+        self.visible = np.zeros(self.lengths.shape, dtype=bool)
+        self.connect_nodes()
+
+    def connect_nodes(self) -> None:
+        i, j = np.triu_indices(len(self.nodes), k=1)
+        distinct = (self.x[i] != self.x[j]) | (self.y[i] != self.y[j])
+        i, j = i[distinct], j[distinct]
+        lines = shapely.linestrings(np.stack((np.column_stack((self.x[i], self.y[i])),
+                                              np.column_stack((self.x[j], self.y[j]))), axis=1))
+        visible = ~shapely.relate_pattern(self.land, lines, VISIBILITY_PATTERN)
+        self.visible[i[visible], j[visible]] = True
+        self.visible[j[visible], i[visible]] = True
+        logger.debug("Visibility graph with %s nodes and %s edges", len(self.nodes), np.sum(self.visible) // 2)
+
+    def is_visible(self, point_a: Point, point_b: Point) -> bool:
+        """
+        A line is obstructed when it runs through the interior of a polygon, lines along the coast or through a
+        vertex only touch the polygon.
+        :param point_a: Start of the line
+        :param point_b: End of the line
+        :return: True if the line between the points is not obstructed
+        """
+        if point_a.x == point_b.x and point_a.y == point_b.y:
+            return not self.land.contains(shapely.Point(point_a.x, point_a.y))
+        line = shapely.LineString([(point_a.x, point_a.y), (point_b.x, point_b.y)])
+        return not self.land.relate_pattern(line, VISIBILITY_PATTERN)
+
+    def visible_from(self, point: Point) -> np.ndarray:
+        """
+        :param point: Point to look from
+        :return: For every node, True if the line from the point to the node is not obstructed
+        """
+        lines = shapely.linestrings(np.stack((np.broadcast_to([point.x, point.y], (len(self.nodes), 2)),
+                                              np.column_stack((self.x, self.y))), axis=1))
+        same = (self.x == point.x) & (self.y == point.y)
+        return same | ~shapely.relate_pattern(self.land, lines, VISIBILITY_PATTERN)
+
+    def shorten(self, path: list) -> list:
+        """
+        Skips the points of a path that are not needed, every point is connected to the furthest point after it
+        that it can see.
+        :param path: Points of an unobstructed path
+        :return: Points of the shortened path
+        """
+        shortened = [path[0]]
+        i = 0
+        while i < len(path) - 1:
+            j = len(path) - 1
+            while j > i + 1 and not self.is_visible(path[i], path[j]):
+                j -= 1
+            shortened.append(path[j])
+            i = j
+        return shortened
+
+    def index_of(self, point: Point) -> int:
+        return self.nodes.index(point)
+
+
+class ShortestPathTree:
+    def __init__(self, graph: VisibilityGraph, source: int = None, source_distances: np.ndarray = None) -> None:
+        """
+        Dijkstra over the visibility graph, the graph is dense so all neighbours are relaxed at once.
+        :param graph: Visibility graph
+        :param source: Index of the root node
+        :param source_distances: Distances of all nodes to a root outside the graph (inf if it does not see the
+        node), used instead of a root node
+        """
+        self.graph = graph
+        self.source = source
+        nodes = len(graph.nodes)
+        if source_distances is None:
+            self.distances = np.full(nodes, np.inf)
+            self.distances[source] = 0
+        else:
+            self.distances = np.array(source_distances, dtype=float)
+        self.predecessors = np.full(nodes, -1, dtype=int)
+
+        done = np.zeros(nodes, dtype=bool)
+        edge_lengths = np.where(graph.visible, graph.lengths, np.inf)
+        for _ in range(nodes):
+            node = int(np.argmin(np.where(done, np.inf, self.distances)))
+            if done[node] or np.isinf(self.distances[node]):
+                break
+            done[node] = True
+            candidates = self.distances[node] + edge_lengths[node]
+            improved = ~done & (candidates < self.distances)
+            self.distances[improved] = candidates[improved]
+            self.predecessors[improved] = node
+
+    def path_from(self, node: int) -> list:
+        """
+        :param node: Index of a node
+        :return: Points from the node to the root of the tree, or to the first node after a root outside the graph
+        """
+        path = [self.graph.nodes[node]]
+        while self.predecessors[node] >= 0:
+            node = self.predecessors[node]
+            path.append(self.graph.nodes[node])
+        return path
+
+
+def cluster_polygons(polygons: list, distance: float) -> list:
+    """
+    Groups polygons that lie within the distance of each other, also through other polygons in the group.
+    :param polygons: List of polygons
+    :param distance: Largest gap between polygons in a group, in coordinates
+    :return: List of groups of polygons
+    """
+    groups = list(range(len(polygons)))
+
+    def find_group(index: int) -> int:
+        while groups[index] != index:
+            index = groups[index]
+        return index
+
+    for i, j in itertools.combinations(range(len(polygons)), 2):
+        if polygons[i].get_shape().distance(polygons[j].get_shape()) < distance:
+            groups[find_group(i)] = find_group(j)
+
+    clusters = {}
+    for index, polygon in enumerate(polygons):
+        clusters.setdefault(find_group(index), []).append(polygon)
+    return list(clusters.values())
+
+
+def convex_vertices(polygon) -> list:
+    """
+    A shortest path around polygons only bends at their convex vertices, the other vertices are not needed as nodes.
+    :param polygon: Polygon
+    :return: List of points at the convex vertices of the polygon
+    """
+    exterior = shapely.remove_repeated_points(polygon.get_shape()).exterior
+    coords = np.array(exterior.coords[:-1])
+    to_previous = coords - np.roll(coords, 1, axis=0)
+    to_next = np.roll(coords, -1, axis=0) - coords
+    turns = to_previous[:, 0] * to_next[:, 1] - to_previous[:, 1] * to_next[:, 0]
+    convex = turns > 0 if exterior.is_ccw else turns < 0
+    return [Point(x, y) for x, y in coords[convex]]
+
+
+class HierarchicalPlanner:
+    def __init__(self, polygons_to_avoid: list, cluster_distance: float, gateway_offset: float,
+                 projection=None) -> None:
+        """
+        Plans routes over a graph of gateways around and between clusters of islands.
+        :param polygons_to_avoid: List of polygons to avoid
+        :param cluster_distance: Largest gap between islands in the same cluster, in coordinates
+        :param gateway_offset: Distance of the gateways around a cluster to its convex hull, in coordinates
+        :param projection: Local km plane of the world to measure distances in
+        """
+        self.polygons_to_avoid = polygons_to_avoid
+        self.clusters = cluster_polygons(polygons_to_avoid, cluster_distance)
+        # Offset convex hull of every cluster, a leg that enters it is refined around the islands of the cluster
+        self.outlines = [shapely.union_all([polygon.get_shape() for polygon in cluster]).convex_hull
+                         .buffer(gateway_offset).simplify(gateway_offset / 2) for cluster in self.clusters]
+        for outline in self.outlines:
+            shapely.prepare(outline)
+        self.gateways = self.create_gateways(cluster_distance)
+        self.graph = VisibilityGraph(polygons_to_avoid, self.gateways, projection)
+        self.trees = [ShortestPathTree(self.graph, gateway) for gateway in range(len(self.gateways))]
+        # distances[i, j] is the length of the shortest path from gateway i to gateway j
+        self.distances = np.column_stack([tree.distances for tree in self.trees])
+        # Obstacle level: visibility graph of the convex vertices of the islands in every cluster
+        self.cluster_graphs = [VisibilityGraph(polygons_to_avoid, [point for polygon in cluster
+                                                                   for point in convex_vertices(polygon)], projection)
+                               for cluster in self.clusters]
+
+    def create_gateways(self, cluster_distance: float) -> list:
+        """
+        Gateways are the corners of the convex hull of every cluster, moved out into open water, and the middle of
+        the passage between every two close islands in a cluster.
+        :return: List of points
+        """
+        candidates = []
+        for cluster, outline in zip(self.clusters, self.outlines):
+            shapes = [polygon.get_shape() for polygon in cluster]
+            candidates += [Point(x, y, name="Gateway") for x, y in outline.exterior.coords[:-1]]
+
+            for shape_a, shape_b in itertools.combinations(shapes, 2):
+                if shape_a.distance(shape_b) < cluster_distance:
+                    passage = shapely.shortest_line(shape_a, shape_b).interpolate(0.5, normalized=True)
+                    candidates.append(Point(passage.x, passage.y, name="Gateway"))
+
+        gateways = [candidate for candidate in candidates
+                    if not any(polygon.check_if_contains_point(candidate, exclude_edges=False)
+                               for polygon in self.polygons_to_avoid)]
+        logger.debug("Created %s gateways around %s clusters", len(gateways), len(self.clusters))
+        return gateways
+
+    def get_route(self, point_a: Point, point_b: Point) -> Route | None:
+        """
+        Route over the gateway graph, the first pair of gateways visible from the start and the end respectively
+        in order of the lower bound of the route length gives the shortest route over the graph.
+        :param point_a: Start Point
+        :param point_b: End Point
+        :return: None if the start or the end does not see any gateway
+        """
+        if self.graph.is_visible(point_a, point_b):
+            return Route(points=[copy.deepcopy(point_a), copy.deepcopy(point_b)])
+
+        gateways = len(self.gateways)
+        distances_a = gm.distance_many(self.graph.x, self.graph.y, point_a.x, point_a.y, self.graph.projection)
+        distances_b = gm.distance_many(self.graph.x, self.graph.y, point_b.x, point_b.y, self.graph.projection)
+        lower_bounds = (distances_a[:, np.newaxis] + self.distances + distances_b[np.newaxis, :]).reshape(-1)
+
+        visible_a = {}
+        visible_b = {}
+        for pair in np.argsort(lower_bounds):
+            if np.isinf(lower_bounds[pair]):
+                break
+            i, j = divmod(int(pair), gateways)
+            if i not in visible_a:
+                visible_a[i] = self.graph.is_visible(point_a, self.gateways[i])
+            if not visible_a[i]:
+                continue
+            if j not in visible_b:
+                visible_b[j] = self.graph.is_visible(self.gateways[j], point_b)
+            if not visible_b[j]:
+                continue
+
+            path = self.graph.shorten(self.refine([point_a] + self.trees[j].path_from(i) + [point_b]))
+            return Route(points=copy.deepcopy(path))
+        return None
+
+    def refine(self, path: list) -> list:
+        """
+        Replaces the legs of a path over the gateways that enter the outline of a cluster by the shortest path
+        around the islands of that cluster, over the visibility graph of their vertices.
+        :param path: Points of the path over the gateways
+        :return: Points of the refined path
+        """
+        for outline, graph in zip(self.outlines, self.cluster_graphs):
+            legs = [k for k in range(len(path) - 1)
+                    if outline.intersects(shapely.LineString([(path[k].x, path[k].y),
+                                                              (path[k + 1].x, path[k + 1].y)]))]
+            if len(legs) == 0:
+                continue
+            start, end = path[legs[0]], path[legs[-1] + 1]
+            if graph.is_visible(start, end):
+                path = path[:legs[0] + 1] + path[legs[-1] + 1:]
+                continue
+
+            tree = ShortestPathTree(graph, source_distances=np.where(
+                graph.visible_from(start), gm.distance_many(graph.x, graph.y, start.x, start.y, graph.projection),
+                np.inf))
+            lengths = tree.distances + np.where(
+                graph.visible_from(end), gm.distance_many(graph.x, graph.y, end.x, end.y, graph.projection), np.inf)
+            node = int(np.argmin(lengths))
+            old_length = gm.polyline_length([p.x for p in path[legs[0]:legs[-1] + 2]],
+                                            [p.y for p in path[legs[0]:legs[-1] + 2]], graph.projection)
+            if lengths[node] < old_length:
+                path = path[:legs[0] + 1] + tree.path_from(node)[::-1] + path[legs[-1] + 1:]
+        return path
+
+
+class Router:
+    def __init__(self, polygons_to_avoid: list, destinations: list, projection=None) -> None:
+        """
+        :param polygons_to_avoid: List of polygons to avoid
+        :param destinations: Fixed destinations to precompute shortest-path trees for
+        :param projection: Local km plane of the world to measure distances in
+        """
+        t_0 = time.perf_counter()
+        self.polygons_to_avoid = polygons_to_avoid
+        nodes = [point for polygon in polygons_to_avoid for point in polygon.points]
+        nodes += [destination for destination in destinations if destination not in nodes]
+        self.graph = VisibilityGraph(polygons_to_avoid, nodes, projection) if destinations else None
+        self.trees = {destination.location(): ShortestPathTree(self.graph, self.graph.index_of(destination))
+                      for destination in destinations}
+        logger.debug("Created %s shortest-path trees in %.2fs", len(self.trees), time.perf_counter() - t_0)
+
+        self.planner = None
+        if constants.HIERARCHICAL_ROUTING:
+            t_0 = time.perf_counter()
+            self.planner = HierarchicalPlanner(polygons_to_avoid, cluster_distance=constants.ISLAND_CLUSTER_DISTANCE,
+                                               gateway_offset=constants.GATEWAY_OFFSET, projection=projection)
+            logger.debug("Created gateway graph in %.2fs", time.perf_counter() - t_0)
+
+        self.grid_planner = None
+        vertices = sum(len(polygon.points) for polygon in polygons_to_avoid)
+        if constants.GRID_ROUTING and vertices >= constants.GRID_ROUTING_MIN_VERTICES:
+            self.grid_planner = ThetaStarPlanner(polygons_to_avoid, resolution=constants.GRID_ROUTING_RESOLUTION)
+        elif constants.GRID_ROUTING:
+            logger.debug("Estimating routes with the exact planners, the polygons only have %s vertices", vertices)
+
+    def get_route(self, point_a: Point, point_b: Point, estimate: bool = False) -> Route:
+        """
+        Route from a point to another point avoiding the polygons, read from the shortest-path tree if the
+        destination is one of the fixed destinations and planned over the gateway graph otherwise.
+        :param point_a: Start Point
+        :param point_b: End Point
+        :param estimate: The route is only used for its length, it is planned over the obstacle raster if available
+        :return:
+        """
+        tree = self.trees.get(point_b.location())
+        planner = self.grid_planner if estimate and self.grid_planner is not None else self.planner
+        if tree is None and planner is None:
+            return create_route(point_a, point_b, self.polygons_to_avoid)
+
+        t_0 = time.perf_counter()
+        if tree is not None:
+            route = self.route_from_tree(point_a, point_b, tree)
+        else:
+            route = planner.get_route(point_a, point_b)
+        constants.time_spent_creating_routes += (time.perf_counter() - t_0)
+        if route is None:
+            logger.debug("No visible node from %s, creating route to %s", point_a, point_b)
+            return create_route(point_a, point_b, self.polygons_to_avoid)
+        return route
+
+    def route_from_tree(self, point_a: Point, point_b: Point, tree: ShortestPathTree) -> Route | None:
+        if self.graph.is_visible(point_a, point_b):
+            return Route(points=[copy.deepcopy(point_a), copy.deepcopy(point_b)])
+
+        # The length via a node is at least the straight line to it, so the first visible node is the best one
+        lower_bounds = (gm.distance_many(self.graph.x, self.graph.y, point_a.x, point_a.y, self.graph.projection)
+                        + tree.distances)
+        for node in np.argsort(lower_bounds):
+            if np.isinf(lower_bounds[node]):
+                break
+            node_point = self.graph.nodes[node]
+            if node_point == point_a:
+                return Route(points=copy.deepcopy(tree.path_from(node)))
+            if self.graph.is_visible(point_a, node_point):
+                return Route(points=[copy.deepcopy(point_a)] + copy.deepcopy(tree.path_from(node)))
+        return None
@@ -2,6 +2,7 @@ import copy
 import time
 import warnings
 import matplotlib.axes
+import numpy as np
 from points import Point
 from polygons import Polygon
 
@@ -10,14 +11,9 @@ import general_maths as gm
 
 # ----------------------------------------------- LOGGER SET UP ------------------------------------------------
 import logging
-import datetime
-import os
+from log_setup import get_logger
 
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("ROUTES")
-logger.setLevel(logging.DEBUG)
+logger = get_logger("ROUTES")
 
 
 # --------------------------------------------- END LOGGER SET UP ------------------------------------------------
@@ -32,10 +28,8 @@ class Route:
         else:
             self.color = color
 
-    def calculate_length(self):
-        self.length = 0
-        for a, b in zip(self.points, self.points[1:]):
-            self.length += gm.calculate_distance(a, b)
+    def calculate_length(self, projection=None):
+        self.length = gm.polyline_length([p.x for p in self.points], [p.y for p in self.points], projection)
 
     def add_route_to_plot(self, axes: matplotlib.axes.Axes):
         lines = []
@@ -44,6 +38,64 @@ class Route:
         return lines
 
 
+class RouteTable:
+    def __init__(self, destinations: list, polygons_to_avoid: list, bands: int, router=None):
+        """
+        Precomputed routes from bands of entry points on the eastern edge of the world (MAX_LAT) to a set of
+        fixed destinations. Routes for a specific entry point are made by stitching the entry point onto the
+        route of its band.
+        The table relies on create_route leaving the polygons untouched. That only holds since the obstacle hulls are
+        cached: before, create_route left the force_maintain flags of the hull points set on the polygons.
+        :param destinations: List of destination points
+        :param polygons_to_avoid: List of polygons to avoid
+        :param bands: Number of bands the entry edge is split in
+        :param router: Router used for obstructed entry legs, routes are created directly if not provided
+        """
+        self.destinations = destinations
+        self.polygons_to_avoid = polygons_to_avoid
+        self.bands = bands
+        self.router = router
+        self.band_width = (constants.MAX_LONG - constants.MIN_LONG) / bands
+
+        self.routes = {}
+        self.create_routes()
+
+    def create_routes(self) -> None:
+        for band in range(self.bands):
+            entry_point = Point(constants.MAX_LAT, constants.MIN_LONG + (band + 0.5) * self.band_width,
+                                name="Entry Point")
+            for destination_index, destination in enumerate(self.destinations):
+                route = create_route(entry_point, destination, self.polygons_to_avoid)
+                self.routes[(band, destination_index)] = route.points
+        logger.debug("Created route table with %s routes", len(self.routes))
+
+    def get_band(self, entry_point: Point) -> int:
+        band = int((entry_point.y - constants.MIN_LONG) // self.band_width)
+        return min(max(band, 0), self.bands - 1)
+
+    def get_route(self, entry_point: Point, destination: Point) -> Route:
+        """
+        Looks up the route from an entry point to one of the destinations in the table.
+        The entry leg is replaced by a leg from the actual entry point, falling back to creating the route
+        if that leg is obstructed.
+        :param entry_point: Point on the eastern edge of the world
+        :param destination: One of the destinations of the table
+        :return:
+        """
+        table_points = self.routes[(self.get_band(entry_point), self.destinations.index(destination))]
+        entry_point = copy.deepcopy(entry_point)
+        # Ships may change their route points in place, every ship gets its own copies
+        points = [entry_point] + copy.deepcopy(table_points[1:])
+
+        obstructed, _, _, _ = line_crosses_any_polygon(self.polygons_to_avoid, points[:2])
+        if obstructed:
+            logger.debug("Entry leg from %s obstructed, creating route to %s", entry_point, destination)
+            if self.router is not None:
+                return self.router.get_route(entry_point, destination)
+            return create_route(entry_point, destination, self.polygons_to_avoid)
+        return Route(points=points)
+
+
 def create_route(point_a: Point, point_b: Point, polygons_to_avoid: list) -> Route:
     """
     Create route from one point to another, avoiding a set of provided polygons
@@ -55,6 +107,7 @@ def create_route(point_a: Point, point_b: Point, polygons_to_avoid: list) -> Rou
     """
     t_0 = time.perf_counter()
     # logger.debug(f"Creating route from {point_a} to {point_b}")
+    polygons_to_avoid = select_levels_of_detail(polygons_to_avoid, point_a, point_b)
     point_a = copy.deepcopy(point_a)
     point_b = copy.deepcopy(point_b)
     route = [point_a, point_b]
@@ -64,7 +117,7 @@ def create_route(point_a: Point, point_b: Point, polygons_to_avoid: list) -> Rou
     iterations = 0
     while obstacle_on_route:
         obstructed, obstacle, point_k, point_l = line_crosses_any_polygon(polygons_to_avoid, route)
-        logger.debug(f"Rerouting from {point_k} to {point_l}. Is obstructed: {obstructed}")
+        logger.debug("Rerouting from %s to %s. Is obstructed: %s", point_k, point_l, obstructed)
 
         if not obstructed:
             obstacle_on_route = False
@@ -73,9 +126,9 @@ def create_route(point_a: Point, point_b: Point, polygons_to_avoid: list) -> Rou
 
         iterations += 1
         if iterations > constants.ITERATION_LIMIT:
-            logger.error(f"Unable to create route from {point_a} at ({point_a.x}, {point_a.y}) to {point_b} at "
-                         f"({point_b.x, point_b.y}) "
-                         f"around {obstacle}, going through edge: {point_k}, {point_l}")
+            logger.error("Unable to create route from %s at (%s, %s) to %s at (%s, %s) around %s, "
+                         "going through edge: %s, %s", point_a, point_a.x, point_a.y, point_b, point_b.x, point_b.y,
+                         obstacle, point_k, point_l)
             point_a.add_point_to_plot(axes=constants.axes_plot, color="yellow", text="a")
             point_b.add_point_to_plot(axes=constants.axes_plot, color="yellow", text="b")
             point_k.add_point_to_plot(axes=constants.axes_plot, color="yellow", text="k")
@@ -88,12 +141,22 @@ def create_route(point_a: Point, point_b: Point, polygons_to_avoid: list) -> Rou
                                f"around {obstacle}, going through edge: {point_k}, {point_l}")
 
     shorter_route = gm.maximize_concavity(route, polygons_to_avoid)
-    logger.debug(f"Route is set to {[str(p) for p in shorter_route]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Route is set to %s", [str(p) for p in shorter_route])
     t_1 = time.perf_counter()
     constants.time_spent_creating_routes += (t_1 - t_0)
     return Route(points=shorter_route)
 
 
+def select_levels_of_detail(polygons_to_avoid: list, point_a: Point, point_b: Point) -> list:
+    """
+    The coarse outline of a polygon contains the polygon, routes around it also avoid the polygon.
+    :return: The coarse outline of every polygon that neither point is close to, the polygon itself otherwise
+    """
+    return [polygon.coarse if polygon.coarse is not None and not polygon.within_coarse_level(point_a)
+            and not polygon.within_coarse_level(point_b) else polygon for polygon in polygons_to_avoid]
+
+
 def line_crosses_any_polygon(polygons_to_avoid: list, route) -> (bool, Polygon, Point, Point):
     for polygon in polygons_to_avoid:
         for p_1, p_2 in zip(route, route[1:]):
@@ -111,20 +174,21 @@ def extract_route_from_convex_hull(start_point: Point, end_point: Point, c_h: li
     :param c_h: Convex hull containing the points k and l
     :return:
     """
-    logging.debug(f"Extracting Points {start_point} and {end_point} out of {[str(p) for p in c_h]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Extracting Points %s and %s out of %s", start_point, end_point, [str(p) for p in c_h])
     if end_point not in c_h:
         Polygon(c_h).add_polygon_to_plot(constants.axes_plot, color="black", opacity=0.35)
         end_point.add_point_to_plot(constants.axes_plot, color="yellow", text="l")
         start_point.add_point_to_plot(constants.axes_plot, color="yellow", text="k")
-        logger.error(f"Failed extracting route from {str(start_point)} to {str(end_point)} "
-                     f"out of {[str(c) for c in c_h]}")
+        logger.error("Failed extracting route from %s to %s out of %s", start_point, end_point,
+                     [str(c) for c in c_h])
         raise IndexError(f"{end_point} not in {[str(p) for p in c_h]}")
     elif start_point not in c_h:
         Polygon(c_h).add_polygon_to_plot(constants.axes_plot, color="black", opacity=0.35)
         end_point.add_point_to_plot(constants.axes_plot, color="yellow", text="l")
         start_point.add_point_to_plot(constants.axes_plot, color="yellow", text="k")
-        logger.error(f"Failed extracting route from {str(start_point)} to {str(end_point)} "
-                     f"out of {[str(c) for c in c_h]}")
+        logger.error("Failed extracting route from %s to %s out of %s", start_point, end_point,
+                     [str(c) for c in c_h])
         raise IndexError(f"{start_point} not in {[str(p) for p in c_h]}")
 
     if c_h.index(end_point) > c_h.index(start_point):
@@ -176,9 +240,9 @@ def reroute_around_obstacle(point_k, point_l, obstacle: Polygon, route):
     route_part_1 = route[:route.index(point_k)]
     route_part_2 = route[route.index(point_l) + 1:]
 
-    logger.debug(f"Inserting route {[str(p) for p in new_sub_route]} "
-                 f"between {[str(p) for p in route_part_1]} "
-                 f"and {[str(p) for p in route_part_2]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Inserting route %s between %s and %s", [str(p) for p in new_sub_route],
+                     [str(p) for p in route_part_1], [str(p) for p in route_part_2])
 
     if route.index(point_l) - route.index(point_k) != 1:
         point_l.add_point_to_plot(constants.axes_plot, color="yellow", text="l")
@@ -275,9 +339,8 @@ def merge_paths(path_precede: list, path_follow: list, target: Point) -> list:
 
 
 def insert_path_in_c_h(path: list, c_h: list, target):
-    logger.debug(f"path: {[str(p) for p in path]} \n"
-                 f"c_h: {[str(p) for p in c_h]} \n"
-                 f"target: {target}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("path: %s \nc_h: %s \ntarget: %s", [str(p) for p in path], [str(p) for p in c_h], target)
 
     preceding_point = path[0]
     following_point = path[-1]
@@ -292,36 +355,40 @@ def insert_path_in_c_h(path: list, c_h: list, target):
         points_preceding_first = c_h[preceding_index:] + c_h[:following_index + 1]
         points_following_first = c_h[following_index:preceding_index + 1]
 
-    logger.debug(f"Path is {[str(p) for p in path]} \n"
-                 f"{str(preceding_point)=}, {str(following_point)=} \n"
-                 f"{preceding_index=}, {following_index=} \n"
-                 f"preceding points: {[str(p) for p in points_preceding_first]}, \n"
-                 f"following points: {[str(p) for p in points_following_first]}, \n"
-                 f"C_h is: {[str(p) for p in c_h]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Path is %s \nstr(preceding_point)=%r, str(following_point)=%r \npreceding_index=%r, "
+                     "following_index=%r \npreceding points: %s, \nfollowing points: %s, \nC_h is: %s",
+                     [str(p) for p in path], str(preceding_point), str(following_point), preceding_index,
+                     following_index, [str(p) for p in points_preceding_first],
+                     [str(p) for p in points_following_first], [str(p) for p in c_h])
 
     if len(points_following_first) <= len(points_preceding_first):
         path.reverse()
-        logger.debug(f"Considering reversed path: {[str(x) for x in path]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Considering reversed path: %s", [str(x) for x in path])
         index_point = following_index
         for p in path:
             if p not in c_h:
                 c_h.insert(index_point + 1, p)
-                logger.debug(f"Following - Inserted {p} at {index_point + 1} \n C_h is: {[str(x) for x in c_h]}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Following - Inserted %s at %s \n C_h is: %s", p, index_point + 1,
+                                 [str(x) for x in c_h])
                 index_point = c_h.index(p)
             else:
                 index_point = c_h.index(p)
-                logger.debug(f"Following - {p} already in c_h, setting index to {index_point}")
+                logger.debug("Following - %s already in c_h, setting index to %s", p, index_point)
     else:
-        logger.debug(f"Keeping path order")
+        logger.debug("Keeping path order")
         index_point = preceding_index
         for p in path:
             if p not in c_h:
                 c_h.insert(index_point + 1, p)
-                logger.debug(f"Preceding - Inserted {p} at {index_point} \n C_h is: {[str(x) for x in c_h]}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Preceding - Inserted %s at %s \n C_h is: %s", p, index_point, [str(x) for x in c_h])
                 index_point = c_h.index(p)
             else:
                 index_point = c_h.index(p)
-                logger.debug(f"Preceding - {p} already in c_h, setting index to {index_point}")
+                logger.debug("Preceding - %s already in c_h, setting index to %s", p, index_point)
 
 def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
     """
@@ -331,7 +398,9 @@ def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
     :param obstacle:
     :return:
     """
-    logger.debug(f"READDING {target} to convex hull - {[str(p) for p in c_h]} - obstacle: {[str(p) for p in c_h]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("READDING %s to convex hull - %s - obstacle: %s", target, [str(p) for p in c_h],
+                     [str(p) for p in c_h])
     if target in c_h:
         return c_h
 
@@ -345,8 +414,9 @@ def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
         if l not in obstacle.points:
             # logger.debug(f"Attempting to add {str(l)} between {str(k)} and {str(m)} in polypoints")
             add_point_to_poly_points(obstacle, k, l, m, ext_polygon_points)
-    logger.debug(f"Closest point is {closest_point} --- extracting updated convex hull --- "
-                 f"extended polypoints is {[str(p) for p in ext_polygon_points]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Closest point is %s --- extracting updated convex hull --- extended polypoints is %s",
+                     closest_point, [str(p) for p in ext_polygon_points])
     # Find the two convex hull points adjacent to this point
     point_options = []
     for convex_point in c_h:
@@ -356,8 +426,9 @@ def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
                                                polygon=Polygon(ext_polygon_points), inclusive=True)
         points_b_to_a = get_points_between_a_b(a=closest_point, b=convex_point,
                                                polygon=Polygon(ext_polygon_points), inclusive=True)
-        logger.debug(f"Convex point {convex_point} - closest point {closest_point}")
-        logger.debug(f"a_to_b: {[str(p) for p in points_a_to_b]}, b_to_a: {[str(p) for p in points_b_to_a]}")
+        logger.debug("Convex point %s - closest point %s", convex_point, closest_point)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("a_to_b: %s, b_to_a: %s", [str(p) for p in points_a_to_b], [str(p) for p in points_b_to_a])
         point_options.append([convex_point, points_a_to_b, "precedes"])
         point_options.append([convex_point, points_b_to_a, "follows"])
 
@@ -371,8 +442,9 @@ def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
     point_after = None
     preceding_points = None
     following_points = None
-    logger.debug(f"Point option is {[[str(p[0]), p[2]] for p in point_options]} - target {target}. "
-                 f"c_h is {[str(p) for p in c_h]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Point option is %s - target %s. c_h is %s", [[str(p[0]), p[2]] for p in point_options], target,
+                     [str(p) for p in c_h])
     for option in point_options:
         min_point, list_of_points, order = option
         # Check more sophisticated if point is before or after (could be at end of list)
@@ -381,13 +453,15 @@ def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
             point_precede = min_point
             preceding_points = list_of_points
             before_selected = True
-            logger.debug(f"Preceding points set at {point_precede} with {[str(p) for p in preceding_points]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Preceding points set at %s with %s", point_precede, [str(p) for p in preceding_points])
 
         if order == "follows" and not after_selected:
             point_after = min_point
             following_points = list_of_points
             after_selected = True
-            logger.debug(f"After points set at {point_after} with {[str(p) for p in following_points]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("After points set at %s with %s", point_after, [str(p) for p in following_points])
 
         if before_selected and after_selected:
             break
@@ -402,11 +476,13 @@ def re_add_point_to_hull(target: Point, c_h: list, obstacle: Polygon) -> list:
 
     path_follow = create_path_along_polygon_between_points(start_point=point_after, target=target,
                                                            routing_points=following_points, obstacle=obstacle)
-    logger.debug(f"precede {[str(p) for p in path_precede]}, follow: {[str(p) for p in path_follow]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("precede %s, follow: %s", [str(p) for p in path_precede], [str(p) for p in path_follow])
     path = merge_paths(path_precede, path_follow, target)
     insert_path_in_c_h(path, c_h, target)
 
-    logger.debug(f"Returning hull {[str(p) for p in c_h]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Returning hull %s", [str(p) for p in c_h])
     return c_h
 
 
@@ -427,24 +503,20 @@ def create_convex_hull(obstacle: Polygon, points=None) -> list:
     else:
         raise TypeError("Unexpected Type For List Of Points")
 
+    # The hull of the obstacle is cached, only the provided points are added to it
+    convex_hull = obstacle.get_convex_hull()
     for point in all_points:
-        # logger.debug(f"Setting points {point} to FORCE-MAINTAIN")
-        point.force_maintain = True
-
-    for point in obstacle.points:
-        if point not in all_points:
-            # logger.debug(f"Adding point {point} to {[str(p) for p in all_points]}")
-            all_points.append(point)
-
-    convex_hull = gm.graham_scan(all_points)
+        convex_hull = gm.insert_point_into_hull(convex_hull, point)
+    start = gm.find_lowest_point_in_polygon(all_points + [p for p in obstacle.points if p not in all_points])
+    convex_hull = gm.start_hull_at_point(convex_hull, start)
 
+    # The provided points have to be maintained, even if that makes the hull non-convex
     for point in all_points:
-        if point.force_maintain and point not in convex_hull:
+        if point not in convex_hull:
             convex_hull = re_add_point_to_hull(point, convex_hull, obstacle)
 
-    logging.debug(f"Returning convex hull {Polygon(convex_hull)}")
-    for point in all_points:
-        point.force_maintain = False
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Returning convex hull %s", Polygon(convex_hull))
     return convex_hull
 
 
@@ -462,27 +534,26 @@ def add_point_to_poly_points(obstacle: Polygon, k: Point, l: Point, m: Point, li
     """
 
     poly_points = obstacle.points.copy()
-    distances = []
 
     if l in poly_points:
         return
 
-    for a, b in zip(poly_points, poly_points[1:] + [poly_points[0]]):
-        a_obstructed = obstacle.check_if_line_through_polygon(p_1=a, p_2=l)
-        b_obstructed = obstacle.check_if_line_through_polygon(p_1=l, p_2=b)
+    # Total distance via every edge, the closest edge that l can connect to from both ends is used
+    distances = gm.distance_many(obstacle.x, obstacle.y, l.x, l.y)
+    total_distances = distances + np.roll(distances, -1)
 
-        if not a_obstructed and not b_obstructed:
-            total_dist = l.distance_to_point(a) + l.distance_to_point(b)
-            distances.append([[a, b], total_dist])
-
-    if len(distances) == 0:
+    for index in np.argsort(total_distances, kind="stable"):
+        a = poly_points[index]
+        b = poly_points[(index + 1) % len(poly_points)]
+        if (not obstacle.check_if_line_through_polygon(p_1=a, p_2=l)
+                and not obstacle.check_if_line_through_polygon(p_1=l, p_2=b)):
+            break
+    else:
         raise ValueError(f"No valid way of adding {l} to {[str(p) for p in poly_points]}")
 
-    min_coords = min(distances, key=lambda x: x[1])[0]
-    a, b = min_coords
-
     # Add point l between a and b
-    logging.debug(f"Inserting {str(l)} at index {poly_points.index(b)} (at [{str(b)}])")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Inserting %s at index %s (at [%s])", l, poly_points.index(b), b)
     list_of_points.insert(poly_points.index(b), l)
 
 
@@ -491,7 +562,9 @@ def create_path_along_polygon_between_points(start_point: Point, target: Point,
     points_to_travel_from = [start_point] + routing_points
 
     path = []
-    logger.debug(f"Creating path from {start_point} to {target}. Routing points: {[str(p) for p in routing_points]}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Creating path from %s to %s. Routing points: %s", start_point, target,
+                     [str(p) for p in routing_points])
     for point in points_to_travel_from:
         obstructed = obstacle.check_if_line_through_polygon(point, target)
         if obstructed:
@@ -502,7 +575,7 @@ def create_path_along_polygon_between_points(start_point: Point, target: Point,
 
         # if we can reach point, complete the path
         else:
-            logger.debug(f"Able to reach {target} from {point}")
+            logger.debug("Able to reach %s from %s", target, point)
             path.extend([point, target])
             # Check if we can remove intermediate points
             if len(path) >= 2:
@@ -0,0 +1,74 @@
+"""
+Scenario of a simulation run: the parameters that are varied between runs (UAV fleet, pheromone behaviour,
+arrival process and rules of engagement).
+A scenario is passed into the world, so multiple scenarios can be simulated in one process.
+Parameters that are not provided take the value of the corresponding constant in constants.py.
+"""
+import copy
+import hashlib
+import json
+
+import constants
+
+# Scenario parameter names, the defaults are the constants with the same name in upper case
+SCENARIO_PARAMETERS = ["uav_models",
+                       "uav_availability",
+                       "safety_endurance",
+                       "patrol_locations",
+                       "pheromone_depreciation_factor_per_time_delta",
+                       "pheromone_diffusion_rate",
+                       "receptor_radius_multiplier",
+                       "cargo_daily_arrival_mean",
+                       "bulk_daily_arrival_mean",
+                       "container_daily_arrival_mean",
+                       "arrival_rate_multiplier",
+                       "arrival_hourly_profile",
+                       "japan_route",
+                       "escort_behaviour",
+                       "hunter_behaviour",
+                       "engage_hunter",
+                       "japan_engagement"]
+
+
+class ScenarioConfig:
+    def __init__(self, seed: int = None, **parameters):
+        """
+        :param seed: Seed of the random number generators, the generators are not reseeded if not provided
+        :param parameters: Scenario parameters, see SCENARIO_PARAMETERS
+        """
+        unknown_parameters = set(parameters) - set(SCENARIO_PARAMETERS)
+        if len(unknown_parameters) > 0:
+            raise ValueError(f"Unknown scenario parameters {sorted(unknown_parameters)}")
+
+        self.seed = seed
+        for name in SCENARIO_PARAMETERS:
+            if name in parameters:
+                value = parameters[name]
+            elif hasattr(constants, name.upper()):
+                value = getattr(constants, name.upper())
+            else:
+                value = getattr(constants, name)
+            setattr(self, name, copy.deepcopy(value))
+
+    def __str__(self):
+        return f"Scenario {self.key()}"
+
+    def to_dict(self) -> dict:
+        parameters = {name: getattr(self, name) for name in SCENARIO_PARAMETERS}
+        parameters["seed"] = self.seed
+        return parameters
+
+    def key(self) -> str:
+        """
+        :return: Hash of all parameters, identical scenarios have identical keys
+        """
+        description = json.dumps(self.to_dict(), sort_keys=True, default=str)
+        return hashlib.sha1(description.encode()).hexdigest()[:16]
+
+    def with_changes(self, **parameters):
+        """
+        :return: Copy of the scenario with the given parameters changed
+        """
+        all_parameters = self.to_dict()
+        all_parameters.update(parameters)
+        return ScenarioConfig(**all_parameters)
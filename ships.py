@@ -6,18 +6,17 @@ import random
 import copy
 from typing import Literal
 
+import numpy as np
+
 import constants
+import general_maths
 from points import Point
-from routes import create_route
+from routes import Route, create_route
 
-import os
 import logging
-import datetime
-date = datetime.date.today()
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S")
-logger = logging.getLogger("SHIPS")
-logger.setLevel(logging.WARNING)
+from log_setup import get_logger
+
+logger = get_logger("SHIPS")
 
 ship_id = 0
 
@@ -43,6 +42,7 @@ class Ship:
         self.destination = None
 
         self.route = None
+        self.store_index = None  # Index in the vessel store of the world, None if not stored
 
         # Parameters to track ship status
         self.arrival_time = None
@@ -66,18 +66,25 @@ class Ship:
         self.text = None
         self.color = None
 
-    def enter_world(self, world) -> None:
-        self.generate_ship_entry_point()
+    def __getstate__(self):
+        # Plot artists are not part of the state, they are recreated when the world is plotted again
+        state = self.__dict__.copy()
+        state.update(ax=None, marker=None, text=None)
+        return state
+
+    def enter_world(self, world, entry_longitude: float = None) -> None:
+        self.generate_ship_entry_point(entry_longitude)
 
-    def set_destination(self, world, destination: Point, harbour=False, leaving=False) -> None:
+    def set_destination(self, world, destination: Point, harbour=False, leaving=False, route: Route = None) -> None:
         """
         :param world:
         :param destination:
         :param harbour: Boolean whether ship is heading to harbour
         :param leaving: Boolean whether ship is leaving the world
+        :param route: Precomputed route to the destination, created if not provided
         :return:
         """
-        logger.debug(f"Ship {self.ship_id} - {self.ship_type} set destination to {destination}")
+        logger.debug("Ship %s - %s set destination to %s", self.ship_id, self.ship_type, destination)
         self.destination = destination
 
         if harbour:
@@ -86,7 +93,7 @@ class Ship:
             self.destination.name = "Exit Point"
         else:
             self.destination.name = "Destination"
-        self.generate_route(world.polygons)
+        self.generate_route(world.polygons, route=route, use_router=True)
 
     def make_move(self):
         """
@@ -98,13 +105,15 @@ class Ship:
 
         self.debug_unit()
 
-    def move(self) -> None:
+    def move(self, duration: float = None) -> None:
         """
-
-        :param self.world.time_delta:
+        Move along the route for the given duration
+        :param duration: Time to move for, a single time delta if not provided
         :return:
         """
-        distance_to_travel = self.world.time_delta * self.speed
+        if duration is None:
+            duration = self.world.time_delta
+        distance_to_travel = duration * self.speed
 
         # Use the distance we move to travel past as many points on the route as we can
         # (ensure we don't overshoot a point)
@@ -113,11 +122,11 @@ class Ship:
             iterations += 1
             if iterations > constants.ITERATION_LIMIT:
                 raise TimeoutError(f"{self.ship_type} {self.ship_id} stuck on distance {distance_to_travel}")
-            logger.debug(f"{self.ship_type} {self.ship_id} travelling from {self.location.x, self.location.y} "
-                         f"to {self.next_point.x, self.next_point.y} ")
+            logger.debug("%s %s travelling from %s to %s ", self.ship_type, self.ship_id,
+                         (self.location.x, self.location.y), (self.next_point.x, self.next_point.y))
 
             # logger.debug(f"- dir vector is {direction_vector} - dist to travel {distance_to_travel}")
-            distance_to_next_point = self.location.distance_to_point(self.next_point)
+            distance_to_next_point = self.location.distance_to_point(self.next_point, self.world.projection)
             distance_travelled = min(distance_to_travel, distance_to_next_point)
             distance_to_travel -= distance_travelled
             # logger.debug(f"Next point {self.next_point}. Dist to next point {distance_to_next_point}, "
@@ -130,13 +139,8 @@ class Ship:
                 if len(self.remaining_points) > 0:
                     self.next_point = self.remaining_points.pop(0)
                 else:
-                    if self.destination.name == "Exit Point":
-                        self.reached_exit_point()
-                    elif self.destination.name == "Harbour":
-                        self.reached_harbour()
-                    else:
-                        # reached desired location - awaiting next step
-                        return
+                    self.reached_end_of_route()
+                    return
                 # logger.debug(f"Ship {self.ship_id} has {distance_to_travel} remaining - next point {self.next_point},"
                 #              f" location is {self.location.x, self.location.y}")
             else:
@@ -147,30 +151,55 @@ class Ship:
                 self.location = Point(new_x, new_y, name=str(self.ship_type) + " " + str(self.ship_id))
                 # logger.debug(f"to {self.location.x}, {self.location.y}")
 
-    def generate_ship_entry_point(self) -> None:
+    def generate_ship_entry_point(self, longitude: float = None) -> None:
         """
         Generates random y coordinate at which ship enters on the East Coast
+        :param longitude: Entry coordinate sampled in advance, random if not provided
         :return:
         """
-        longitude = random.uniform(constants.MIN_LONG, constants.MAX_LONG)
+        if longitude is None:
+            longitude = random.uniform(constants.MIN_LONG, constants.MAX_LONG)
         latitude = constants.MAX_LAT
 
         self.entry_point = Point(latitude, longitude)
         self.location = copy.deepcopy(self.entry_point)
-        logger.debug(f"{self.ship_type} {self.ship_id} enters at {self.entry_point}")
+        logger.debug("%s %s enters at %s", self.ship_type, self.ship_id, self.entry_point)
 
-    def generate_route(self, polygons: list, destination: Point = None) -> None:
+    def generate_route(self, polygons: list, destination: Point = None, route: Route = None,
+                       use_router: bool = False) -> None:
+        """
+        :param polygons: Polygons to avoid
+        :param destination: New destination, the current destination if not provided
+        :param route: Precomputed route to the destination, created if not provided
+        :param use_router: Plan the route with the router of the world, only valid if the polygons are the polygons
+        of the world
+        """
         if destination is None:
             pass
         else:
             self.destination = destination
 
-        self.route = create_route(point_a=self.location, point_b=self.destination,
-                                  polygons_to_avoid=copy.deepcopy(polygons))
+        if route is None and use_router and self.world.router is not None:
+            self.route = self.world.router.get_route(self.location, self.destination)
+        elif route is None:
+            self.route = create_route(point_a=self.location, point_b=self.destination, polygons_to_avoid=polygons)
+        else:
+            self.route = route
         self.past_points.append(self.route.points[0])
         self.next_point = self.route.points[1]
         self.remaining_points = self.route.points[2:]
-        logger.debug(f"{self.ship_type} {self.ship_id} has route {[str(p) for p in self.route.points]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s %s has route %s", self.ship_type, self.ship_id, [str(p) for p in self.route.points])
+
+        if self.store_index is not None:
+            self.world.vessel_store.set_route(self)
+
+    def reached_end_of_route(self) -> None:
+        if self.destination.name == "Exit Point":
+            self.reached_exit_point()
+        elif self.destination.name == "Harbour":
+            self.reached_harbour()
+        # Otherwise reached desired location - awaiting next step
 
     def reached_exit_point(self) -> None:
         for uav in self.trailing_UAVs:
@@ -212,7 +241,8 @@ class Ship:
 
         damage = damage + 10 * self.damage_penalty
         self.health_points -= damage
-        logger.debug(f"{self.ship_type} {self.ship_id} received {damage} damage. New health: {self.health_points}")
+        logger.debug("%s %s received %s damage. New health: %s", self.ship_type, self.ship_id, damage,
+                     self.health_points)
 
         # Set Damage Effects
         if self.health_points >= 81:
@@ -258,7 +288,7 @@ class Ship:
             return
         else:
             self.retreating = True
-            self.generate_route(self.world.polygons, destination=self.entry_point)
+            self.generate_route(self.world.polygons, destination=self.entry_point, use_router=True)
 
     def debug_unit(self) -> None:
         if constants.DEBUG_MODE:
@@ -285,7 +315,7 @@ class Merchant(Ship):
         super().__init__(world)
 
         # Merchant Inherited Properties
-        logger.debug(f"Initializing merchant {ship_id} with type {model}")
+        logger.debug("Initializing merchant %s with type %s", ship_id, model)
         self.ship_type = "Merchant"
         self.cargo_load = None
         self.RCS = None
@@ -320,10 +350,11 @@ class Merchant(Ship):
         :return:
         """
         self.goal_dock = random.choices(self.world.docks, weights=[d.probability for d in self.world.docks], k=1)[0]
-        self.set_destination(self.world, self.goal_dock.location, leaving=True)
+        route = self.world.merchant_route_table.get_route(self.location, self.goal_dock.location)
+        self.set_destination(self.world, self.goal_dock.location, leaving=True, route=route)
 
-    def enter_world(self, world) -> None:
-        self.generate_ship_entry_point()
+    def enter_world(self, world, entry_longitude: float = None) -> None:
+        self.generate_ship_entry_point(entry_longitude)
         self.set_harbour_destination()
 
 
@@ -353,7 +384,7 @@ class Escort(Ship):
         self.guarding_target = None
 
         self.obstacles = world.polygons
-        self.behaviour = constants.escort_behaviour
+        self.behaviour = world.scenario.escort_behaviour
 
         self.initiate_model(model)
 
@@ -402,16 +433,8 @@ class Escort(Ship):
         if len(merchants) == 0:
             return False
 
-        escort_location = self.location
-        merchant = min(merchants, key=lambda m: escort_location.distance_to_point(m.location))
+        distances = general_maths.distance_many([m.location.x for m in merchants], [m.location.y for m in merchants],
+                                                self.location.x, self.location.y, self.world.projection)
+        merchant = merchants[int(np.argmin(distances))]
         self.start_guarding(merchant)
         return True
-
-
-def generate_random_merchant(world) -> Merchant:
-    model = random.choices(["Cargo", "Container", "Bulk"],
-                           [constants.CARGO_DAILY_ARRIVAL_MEAN,
-                            constants.BULK_DAILY_ARRIVAL_MEAN,
-                            constants.CONTAINER_DAILY_ARRIVAL_MEAN])[0]
-    return Merchant(model, world)
-
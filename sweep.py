@@ -0,0 +1,152 @@
+"""
+Runs a simulation for every scenario in an experimental design, fanned out over a pool of worker processes.
+Designs are either a full grid over parameter values or a Latin hypercube over parameter ranges.
+Identical scenarios are run once, and the results are streamed into a single CSV table as runs finish.
+Scenarios that already have a row in the results table are skipped, so an interrupted sweep can be resumed.
+"""
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import constants
+from scenario import ScenarioConfig, SCENARIO_PARAMETERS
+from world import World
+
+from log_setup import get_logger
+
+logger = get_logger("SWEEP")
+
+RESULT_COLUMNS = ["scenario_key", "status", "world_time", "detections", "attacks", "ships_sunk",
+                  "ships_reached_destination", "vessels_in_world", "elapsed_time", "error"]
+
+
+def grid_design(parameter_values: dict) -> list:
+    """
+    :param parameter_values: Values per parameter, e.g. {"uav_availability": [0.25, 0.5, 0.75]}
+    :return: List of parameter dictionaries, one for every combination of values
+    """
+    names = list(parameter_values.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*parameter_values.values())]
+
+
+def latin_hypercube_design(parameter_ranges: dict, samples: int, seed: int = None) -> list:
+    """
+    Samples a Latin hypercube - every range is split in equally sized strata, each stratum is sampled exactly once.
+    :param parameter_ranges: (low, high) per parameter, parameters with integer bounds are sampled as integers
+    :param samples: Number of samples
+    :param seed: Seed of the sampling
+    :return: List of parameter dictionaries
+    """
+    generator = np.random.default_rng(seed)
+    design = [{} for _ in range(samples)]
+    for name, (low, high) in parameter_ranges.items():
+        strata = (generator.permutation(samples) + generator.uniform(0, 1, samples)) / samples
+        values = low + strata * (high - low)
+        for parameters, value in zip(design, values):
+            if isinstance(low, int) and isinstance(high, int):
+                parameters[name] = int(np.floor(value)) if value < high else high
+            else:
+                parameters[name] = float(value)
+    return design
+
+
+def create_scenarios(design: list, base: ScenarioConfig = None, replications: int = 1, seed: int = 0) -> list:
+    """
+    Creates the scenarios of a design, each design point is replicated with a different seed.
+    :param design: List of parameter dictionaries
+    :param base: Scenario providing the parameters that are not in the design
+    :param replications: Number of runs per design point
+    :param seed: Seed of the first replication
+    :return: List of scenarios
+    """
+    if base is None:
+        base = ScenarioConfig()
+    return [base.with_changes(seed=seed + replication, **parameters)
+            for parameters in design for replication in range(replications)]
+
+
+def deduplicate(scenarios: list) -> list:
+    unique_scenarios = {}
+    for scenario in scenarios:
+        unique_scenarios.setdefault(scenario.key(), scenario)
+    if len(unique_scenarios) < len(scenarios):
+        logger.warning("Removed %s duplicate scenarios", len(scenarios) - len(unique_scenarios))
+    return list(unique_scenarios.values())
+
+
+def run_scenario(scenario: ScenarioConfig, duration: float, time_delta: float) -> dict:
+    """
+    Runs a single scenario, meant to be called in a worker process.
+    :return: Result row of the run
+    """
+    # Runs in a sweep are never plotted
+    constants.PLOTTING_MODE = False
+    constants.DEBUG_MODE = False
+
+    t_0 = time.perf_counter()
+    result = {"scenario_key": scenario.key()}
+    try:
+        world = World(time_delta=time_delta, scenario=scenario)
+        world.run(duration)
+        world.close()
+        result.update(status="completed", world_time=world.world_time, detections=world.detections,
+                      attacks=world.attacks, ships_sunk=world.ships_sunk,
+                      ships_reached_destination=world.ships_reached_destination,
+                      vessels_in_world=len(world.current_vessels))
+    except Exception as e:
+        result.update(status="failed", error=f"{type(e).__name__}: {e}")
+    result["elapsed_time"] = time.perf_counter() - t_0
+    return result
+
+
+def completed_scenario_keys(results_path: str) -> set:
+    if not os.path.exists(results_path):
+        return set()
+    with open(results_path, newline="") as file:
+        return {row["scenario_key"] for row in csv.DictReader(file) if row["status"] == "completed"}
+
+
+def run_sweep(scenarios: list, duration: float, results_path: str, time_delta: float = 0.2,
+              workers: int = None) -> None:
+    """
+    Runs all scenarios and streams a row per run into the results table.
+    :param scenarios: Scenarios to run
+    :param duration: Simulated time per run in hours
+    :param results_path: Path of the CSV results table
+    :param time_delta: Time delta of the worlds
+    :param workers: Number of worker processes, the number of CPUs if not provided
+    :return:
+    """
+    scenarios = deduplicate(scenarios)
+    completed_keys = completed_scenario_keys(results_path)
+    scenarios = [scenario for scenario in scenarios if scenario.key() not in completed_keys]
+    print(f"Running {len(scenarios)} scenarios, {len(completed_keys)} already completed.")
+
+    columns = RESULT_COLUMNS + ["seed"] + SCENARIO_PARAMETERS
+    write_header = not os.path.exists(results_path)
+    with open(results_path, "a", newline="") as file, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+
+        futures = {executor.submit(run_scenario, scenario, duration, time_delta): scenario
+                   for scenario in scenarios}
+        for future in as_completed(futures):
+            scenario = futures[future]
+            row = future.result()
+            for name, value in scenario.to_dict().items():
+                row[name] = json.dumps(value) if isinstance(value, (list, dict)) else value
+            writer.writerow(row)
+            file.flush()
+            print(f"Scenario {row['scenario_key']} {row['status']} in {row['elapsed_time']: .1f}s")
+
+
+if __name__ == "__main__":
+    sweep_design = grid_design({"uav_availability": [0.25, 0.5, 0.75],
+                                "pheromone_depreciation_factor_per_time_delta": [0.95, 0.99]})
+    run_sweep(create_scenarios(sweep_design, replications=2), duration=500 * 0.2, results_path="sweep_results.csv")
@@ -0,0 +1,268 @@
+"""
+Records the state of a simulation run for later analysis and rendering.
+Per-step records are buffered in preallocated arrays and written to disk in chunks of compressed .npz files
+by a background thread, so writing never blocks the simulation and memory use stays bounded for long runs.
+
+Output directory layout:
+    meta.npz            - time delta, static scene (receptors, docks, airbases, drones) and status code labels
+    chunk_00000.npz     - records of the steps in the first chunk, columns prefixed with the table name
+    ...
+"""
+import os
+import queue
+import threading
+
+import numpy as np
+
+import constants
+
+from log_setup import get_logger
+
+logger = get_logger("TELEMETRY")
+
+SHIP_STATUSES = ["sailing", "trailed", "retreating"]
+DRONE_MODES = ["routing_to_start", "patrolling", "trailing", "awaiting_support", "routing_to_base"]
+EVENT_KINDS = ["detection", "attack", "sunk"]
+
+SHIP_COLUMNS = {"step": np.int64, "time": np.float64, "ship_id": np.int64, "x": np.float64, "y": np.float64,
+                "status": np.int8, "health": np.float64}
+DRONE_COLUMNS = {"step": np.int64, "time": np.float64, "uav_id": np.int64, "x": np.float64, "y": np.float64,
+                 "mode": np.int8, "ammunition": np.int64}
+EVENT_COLUMNS = {"step": np.int64, "time": np.float64, "kind": np.int8, "uav_id": np.int64,
+                 "ship_id": np.int64, "x": np.float64, "y": np.float64, "damage": np.float64}
+PHEROMONE_COLUMNS = {"step": np.int64, "time": np.float64, "mean": np.float64, "max": np.float64,
+                     "total": np.float64, "above_threshold": np.int64}
+
+
+def ship_status(ship) -> int:
+    if ship.retreating:
+        return SHIP_STATUSES.index("retreating")
+    elif len(ship.trailing_UAVs) > 0:
+        return SHIP_STATUSES.index("trailed")
+    else:
+        return SHIP_STATUSES.index("sailing")
+
+
+def drone_mode(drone) -> int:
+    if drone.routing_to_base:
+        return DRONE_MODES.index("routing_to_base")
+    elif drone.awaiting_support:
+        return DRONE_MODES.index("awaiting_support")
+    elif drone.trailing:
+        return DRONE_MODES.index("trailing")
+    elif drone.routing_to_start:
+        return DRONE_MODES.index("routing_to_start")
+    else:
+        return DRONE_MODES.index("patrolling")
+
+
+class RecordBuffer:
+    """
+    Preallocated columnar buffer, doubles in size only if a single chunk holds more rows than expected.
+    """
+    def __init__(self, columns: dict, capacity: int, width: int = None):
+        self.dtypes = columns
+        self.width = width
+        self.size = 0
+        self.columns = {name: self.allocate(dtype, capacity) for name, dtype in columns.items()}
+
+    def allocate(self, dtype, capacity: int) -> np.ndarray:
+        if self.width is not None and dtype is None:
+            return np.empty((capacity, self.width))
+        return np.empty(capacity, dtype=dtype)
+
+    def capacity(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def append(self, **values) -> None:
+        """
+        Appends rows to the buffer, all values are of equal length.
+        """
+        number_of_rows = len(next(iter(values.values())))
+        while self.size + number_of_rows > self.capacity():
+            for name, column in self.columns.items():
+                grown_column = self.allocate(self.dtypes[name], 2 * len(column))
+                grown_column[:self.size] = column[:self.size]
+                self.columns[name] = grown_column
+
+        for name, value in values.items():
+            self.columns[name][self.size: self.size + number_of_rows] = value
+        self.size += number_of_rows
+
+    def take(self) -> dict:
+        """
+        :return: Copies of the filled part of all columns, the buffer is emptied
+        """
+        records = {name: column[:self.size].copy() for name, column in self.columns.items()}
+        self.size = 0
+        return records
+
+
+class TelemetryWriter:
+    def __init__(self, world, directory: str = None, chunk_steps: int = None, grid_interval: int = None):
+        """
+        :param world: World to record
+        :param directory: Directory the chunks are written to
+        :param chunk_steps: Number of steps per chunk
+        :param grid_interval: Number of steps between snapshots of the full receptor grid
+        """
+        if directory is None:
+            directory = constants.TELEMETRY_DIRECTORY
+        if chunk_steps is None:
+            chunk_steps = constants.TELEMETRY_CHUNK_STEPS
+        if grid_interval is None:
+            grid_interval = constants.TELEMETRY_GRID_INTERVAL
+
+        self.world = world
+        self.directory = directory
+        self.chunk_steps = chunk_steps
+        self.grid_interval = grid_interval
+        os.makedirs(self.directory, exist_ok=True)
+
+        number_of_receptors = len(world.receptor_grid.receptors)
+        self.ships = RecordBuffer(SHIP_COLUMNS, capacity=chunk_steps * 256)
+        self.drones = RecordBuffer(DRONE_COLUMNS, capacity=chunk_steps * 64)
+        self.events = RecordBuffer(EVENT_COLUMNS, capacity=1024)
+        self.pheromones = RecordBuffer(PHEROMONE_COLUMNS, capacity=chunk_steps)
+        self.grid = RecordBuffer({"step": np.int64, "time": np.float64, "pheromones": None, "sea_states": None},
+                                 capacity=max(1, chunk_steps // grid_interval + 1), width=number_of_receptors)
+
+        self.steps_in_chunk = 0
+        self.chunks_written = 0
+
+        # Bounded queue, the simulation only waits on the writer if it falls behind by this many chunks
+        self.queue = queue.Queue(maxsize=constants.TELEMETRY_QUEUE_SIZE)
+        self.thread = threading.Thread(target=self.write_chunks, daemon=True)
+        self.thread.start()
+
+        self.write_meta()
+
+    def step_number(self) -> int:
+        return int(round(self.world.world_time / self.world.time_delta))
+
+    def write_meta(self) -> None:
+        receptors = self.world.receptor_grid.receptors
+        np.savez_compressed(os.path.join(self.directory, "meta.npz"),
+                            time_delta=self.world.time_delta,
+                            receptor_x=np.array([r.location.x for r in receptors]),
+                            receptor_y=np.array([r.location.y for r in receptors]),
+                            receptor_in_polygon=np.array([r.in_polygon for r in receptors]),
+                            initial_pheromones=self.world.receptor_grid.pheromones.copy(),
+                            initial_sea_states=self.world.receptor_grid.sea_states.copy(),
+                            dock_x=np.array([d.location.x for d in self.world.docks]),
+                            dock_y=np.array([d.location.y for d in self.world.docks]),
+                            airbase_x=np.array([a.location.x for a in self.world.airbases]),
+                            airbase_y=np.array([a.location.y for a in self.world.airbases]),
+                            uav_id=np.array([d.uav_id for d in self.world.drones], dtype=np.int64),
+                            uav_radius=np.array([d.radius for d in self.world.drones], dtype=np.float64),
+                            ship_statuses=np.array(SHIP_STATUSES),
+                            drone_modes=np.array(DRONE_MODES),
+                            event_kinds=np.array(EVENT_KINDS))
+
+    def record_step(self) -> None:
+        """
+        Records the state of all ships, airborne drones and the receptor grid after a time step.
+        :return:
+        """
+        step = self.step_number()
+        world_time = self.world.world_time
+
+        ships = self.world.current_vessels
+        self.ships.append(step=np.full(len(ships), step), time=np.full(len(ships), world_time),
+                          ship_id=[s.ship_id for s in ships],
+                          x=[s.location.x for s in ships],
+                          y=[s.location.y for s in ships],
+                          status=[ship_status(s) for s in ships],
+                          health=[s.health_points for s in ships])
+
+        drones = self.world.current_airborne_drones
+        self.drones.append(step=np.full(len(drones), step), time=np.full(len(drones), world_time),
+                           uav_id=[d.uav_id for d in drones],
+                           x=[d.location.x for d in drones],
+                           y=[d.location.y for d in drones],
+                           mode=[drone_mode(d) for d in drones],
+                           ammunition=[d.ammunition for d in drones])
+
+        receptor_grid = self.world.receptor_grid
+        decaying_pheromones = receptor_grid.pheromones[receptor_grid.decay]
+        self.pheromones.append(step=[step], time=[world_time],
+                               mean=[decaying_pheromones.mean()], max=[decaying_pheromones.max()],
+                               total=[decaying_pheromones.sum()],
+                               above_threshold=[np.count_nonzero(decaying_pheromones
+                                                                 > constants.TELEMETRY_PHEROMONE_THRESHOLD)])
+
+        if step % self.grid_interval == 0:
+            self.grid.append(step=[step], time=[world_time], pheromones=receptor_grid.pheromones[None, :],
+                             sea_states=receptor_grid.sea_states[None, :])
+
+        self.steps_in_chunk += 1
+        if self.steps_in_chunk >= self.chunk_steps:
+            self.flush()
+
+    def record_event(self, kind: str, drone, ship, damage: float = 0) -> None:
+        self.events.append(step=[self.step_number()], time=[self.world.world_time], kind=[EVENT_KINDS.index(kind)],
+                           uav_id=[-1 if drone is None else drone.uav_id], ship_id=[ship.ship_id],
+                           x=[ship.location.x], y=[ship.location.y], damage=[damage])
+
+    def flush(self) -> None:
+        """
+        Hands the buffered records to the writer thread as a single chunk.
+        :return:
+        """
+        if self.steps_in_chunk == 0 and self.events.size == 0:
+            return
+        records = {}
+        for table_name, buffer in [("ships", self.ships), ("drones", self.drones), ("events", self.events),
+                                   ("pheromones", self.pheromones), ("grid", self.grid)]:
+            for column_name, column in buffer.take().items():
+                records[table_name + "_" + column_name] = column
+
+        path = os.path.join(self.directory, f"chunk_{self.chunks_written:05d}.npz")
+        self.queue.put((path, records))
+        self.chunks_written += 1
+        self.steps_in_chunk = 0
+
+    def write_chunks(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            path, records = item
+            try:
+                np.savez_compressed(path, **records)
+            except OSError as e:
+                logger.error("Failed to write telemetry chunk %s: %s", path, e)
+            self.queue.task_done()
+
+    def close(self) -> None:
+        """
+        Writes the remaining records and waits for the writer thread to finish.
+        :return:
+        """
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
+
+
+def load_table(directory: str, table_name: str) -> dict:
+    """
+    Reads a table from all chunks in a telemetry directory.
+    :param directory:
+    :param table_name: ships, drones, events, pheromones or grid
+    :return: Dictionary of column name to array
+    """
+    chunk_files = sorted(f for f in os.listdir(directory) if f.startswith("chunk_") and f.endswith(".npz"))
+    prefix = table_name + "_"
+    columns = {}
+    for chunk_file in chunk_files:
+        with np.load(os.path.join(directory, chunk_file)) as chunk:
+            for key in chunk.files:
+                if key.startswith(prefix):
+                    columns.setdefault(key[len(prefix):], []).append(chunk[key])
+    return {name: np.concatenate(parts) for name, parts in columns.items()}
+
+
+def load_meta(directory: str) -> dict:
+    with np.load(os.path.join(directory, "meta.npz")) as meta:
+        return {key: meta[key] for key in meta.files}
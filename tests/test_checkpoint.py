@@ -0,0 +1,67 @@
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+import checkpoint
+import constants
+from scenario import ScenarioConfig
+from world import World
+
+STEPS = 100
+
+
+@pytest.fixture
+def world(monkeypatch):
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+    return World(time_delta=0.2, scenario=ScenarioConfig(seed=6))
+
+
+def locations(entities: list) -> list:
+    return [(entity.location.x, entity.location.y) for entity in entities]
+
+
+def test_restored_run_matches_uninterrupted_run(world, tmp_path):
+    path = str(tmp_path / "world.pkl.gz")
+    for _ in range(STEPS):
+        world.time_step()
+    world.save_checkpoint(path)
+    for _ in range(STEPS):
+        world.time_step()
+    world.close()
+
+    restored = checkpoint.load_checkpoint(path)
+    for _ in range(STEPS):
+        restored.time_step()
+    restored.close()
+
+    assert restored.world_time == world.world_time
+    assert len(world.current_vessels) > 0 and len(world.current_airborne_drones) > 0
+    assert [ship.ship_id for ship in restored.current_vessels] == [ship.ship_id for ship in world.current_vessels]
+    assert locations(restored.current_vessels) == locations(world.current_vessels)
+    assert ([drone.uav_id for drone in restored.current_airborne_drones] ==
+            [drone.uav_id for drone in world.current_airborne_drones])
+    assert locations(restored.current_airborne_drones) == locations(world.current_airborne_drones)
+    assert np.array_equal(restored.receptor_grid.pheromones, world.receptor_grid.pheromones)
+
+
+def test_recursion_limit_is_restored(world, tmp_path, monkeypatch):
+    path = str(tmp_path / "world.pkl.gz")
+    recursion_limit = sys.getrecursionlimit()
+    world.save_checkpoint(path)
+    assert sys.getrecursionlimit() == recursion_limit
+    checkpoint.load_checkpoint(path).close()
+    assert sys.getrecursionlimit() == recursion_limit
+
+    def fail(*args, **kwargs):
+        raise pickle.PicklingError("Test")
+
+    monkeypatch.setattr(pickle, "dump", fail)
+    with pytest.raises(pickle.PicklingError):
+        world.save_checkpoint(path)
+    assert sys.getrecursionlimit() == recursion_limit
+    world.close()
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+import constants
+import events
+from scenario import ScenarioConfig
+from telemetry import load_table
+from world import World
+
+STEPS = 150
+DRONE_STEPS = 600
+
+
+def run_world(monkeypatch, discrete_event_mode: bool, telemetry_directory=None, scenario=None,
+              steps: int = STEPS) -> World:
+    monkeypatch.setattr(constants, "DISCRETE_EVENT_MODE", discrete_event_mode)
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", telemetry_directory is not None)
+    if telemetry_directory is not None:
+        monkeypatch.setattr(constants, "TELEMETRY_DIRECTORY", str(telemetry_directory))
+
+    if scenario is None:
+        # Without drones all activity is transit, the discrete-event mode jumps between the weather resamples.
+        # Ships arrive at the full daily means, so many ships are moved inside the jumps
+        scenario = ScenarioConfig(seed=2, uav_models=[], arrival_rate_multiplier=1)
+    world = World(time_delta=0.2, scenario=scenario)
+    world.run(steps * world.time_delta)
+    world.close()
+    return world
+
+
+@pytest.fixture
+def fixed_step_world(monkeypatch, tmp_path):
+    return run_world(monkeypatch, discrete_event_mode=False, telemetry_directory=tmp_path / "fixed_step")
+
+
+@pytest.fixture
+def discrete_event_world(monkeypatch, tmp_path):
+    return run_world(monkeypatch, discrete_event_mode=True, telemetry_directory=tmp_path / "discrete_event")
+
+
+def test_ships_match_fixed_step_model(fixed_step_world, discrete_event_world):
+    assert discrete_event_world.world_time == pytest.approx(fixed_step_world.world_time)
+    assert discrete_event_world.ships_reached_destination == fixed_step_world.ships_reached_destination
+    assert ([ship.arrival_time for ship in discrete_event_world.current_vessels] ==
+            [ship.arrival_time for ship in fixed_step_world.current_vessels])
+    for jumped, stepped in zip(discrete_event_world.current_vessels, fixed_step_world.current_vessels):
+        assert jumped.location.x == pytest.approx(stepped.location.x)
+        assert jumped.location.y == pytest.approx(stepped.location.y)
+
+
+def test_pheromones_match_fixed_step_model(fixed_step_world, discrete_event_world):
+    assert np.allclose(discrete_event_world.receptor_grid.pheromones, fixed_step_world.receptor_grid.pheromones)
+
+
+def test_jumped_steps_are_recorded(tmp_path, fixed_step_world, discrete_event_world):
+    fixed_step = load_table(str(tmp_path / "fixed_step"), "ships")
+    discrete_event = load_table(str(tmp_path / "discrete_event"), "ships")
+    assert np.array_equal(np.unique(discrete_event["step"]), np.unique(fixed_step["step"]))
+    # Ship ids keep counting across worlds
+    assert np.array_equal(discrete_event["ship_id"] - discrete_event["ship_id"].min(),
+                          fixed_step["ship_id"] - fixed_step["ship_id"].min())
+    assert np.allclose(discrete_event["x"], fixed_step["x"])
+    assert np.allclose(discrete_event["y"], fixed_step["y"])
+
+
+@pytest.mark.parametrize("diffusion", [False, True])
+def test_drones_in_transit_match_fixed_step_model(monkeypatch, diffusion):
+    monkeypatch.setattr(constants, "PHEROMONE_DIFFUSION", diffusion)
+    # With 14 airframes the utilization rate allows a single airborne UAV, the jumps carry it to and from its patrols
+    uav_model = dict(constants.UAV_MODELS[3], number_of_airframes=14)
+
+    def scenario():
+        return ScenarioConfig(seed=2, uav_models=[uav_model], arrival_rate_multiplier=1)
+
+    fixed_step_world = run_world(monkeypatch, discrete_event_mode=False, scenario=scenario(), steps=DRONE_STEPS)
+
+    transit_steps = []
+    fast_forward_transit = World.fast_forward_transit
+
+    def record_transit(world, steps):
+        transit_steps.append(steps * len(world.current_airborne_drones))
+        fast_forward_transit(world, steps)
+
+    monkeypatch.setattr(World, "fast_forward_transit", record_transit)
+    discrete_event_world = run_world(monkeypatch, discrete_event_mode=True, scenario=scenario(), steps=DRONE_STEPS)
+    assert sum(transit_steps) > 0
+
+    assert discrete_event_world.world_time == pytest.approx(fixed_step_world.world_time)
+    assert discrete_event_world.detections == fixed_step_world.detections
+    for jumped, stepped in zip(discrete_event_world.drones, fixed_step_world.drones):
+        assert jumped.location.x == pytest.approx(stepped.location.x)
+        assert jumped.location.y == pytest.approx(stepped.location.y)
+        assert jumped.time_spent_airborne == pytest.approx(stepped.time_spent_airborne)
+    assert np.allclose(discrete_event_world.receptor_grid.pheromones, fixed_step_world.receptor_grid.pheromones)
+
+
+def test_unknown_event_kind_raises(monkeypatch):
+    world = run_world(monkeypatch, discrete_event_mode=True, steps=0)
+    with pytest.raises(ValueError):
+        world.handle_event(events.Event(world.world_time, "unknown"))
@@ -0,0 +1,55 @@
+import pytest
+
+import constants
+from general_maths import calculate_distance
+from points import Point
+from scenario import ScenarioConfig
+from world import World
+
+
+def create_world(monkeypatch, metric_projection: bool = False, **scenario_parameters) -> World:
+    monkeypatch.setattr(constants, "METRIC_PROJECTION", metric_projection)
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+    return World(time_delta=0.2, scenario=ScenarioConfig(seed=1, **scenario_parameters))
+
+
+@pytest.mark.parametrize("metric_projection", [False, True])
+def test_move_towards_orientation(monkeypatch, metric_projection):
+    world = create_world(monkeypatch, metric_projection)
+    drone = world.drones[0]
+    drone.location = Point(125, 20)
+    drone.direction = "east"
+
+    moves = {direction: drone.move_towards_orientation(100, direction)
+             for direction in ["north", "east", "south", "west", "reverse"]}
+    for direction, point in moves.items():
+        assert calculate_distance(drone.location, point, projection=world.projection) == pytest.approx(100)
+
+    assert moves["north"].x == drone.location.x and moves["north"].y > drone.location.y
+    assert moves["south"].x == drone.location.x and moves["south"].y < drone.location.y
+    assert moves["east"].y == drone.location.y and moves["east"].x > drone.location.x
+    assert moves["west"].y == drone.location.y and moves["west"].x < drone.location.x
+    assert (moves["reverse"].x, moves["reverse"].y) == (moves["west"].x, moves["west"].y)
+
+
+def test_select_support_takes_the_closest_feasible_uav(monkeypatch):
+    world = create_world(monkeypatch, arrival_rate_multiplier=1)
+    world.run(200 * world.time_delta)
+    caller = world.current_airborne_drones[0]
+    candidates = [uav for uav in world.current_airborne_drones if uav.ammunition > 0 and not uav.routing_to_base]
+    assert len(candidates) > 2
+
+    # Checking every candidate, as the selection did before it stopped at the first feasible one
+    number_feasible = []
+    for ship in world.current_vessels[:5]:
+        caller.located_ship = ship
+        feasible = [uav for uav in candidates if uav.reach_and_return(ship.location)]
+        expected = min(feasible, key=lambda uav: caller.location.distance_to_point(uav.location, world.projection),
+                       default=None)
+        assert caller.select_support() is expected
+        number_feasible.append(len(feasible))
+    assert 0 in number_feasible and max(number_feasible) > 1
+    world.close()
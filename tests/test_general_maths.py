@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+import shapely
+
+import constants_coords
+import general_maths as gm
+from points import Point
+from polygons import Polygon
+from routes import create_convex_hull
+
+
+def coordinates(points: list) -> list:
+    return [(p.x, p.y) for p in points]
+
+
+def full_rebuild(polygon: Polygon, points: list) -> list:
+    """
+    Hull of the polygon and the points built from scratch, starting at the lowest point like create_convex_hull
+    """
+    unique_points = []
+    for point in points + polygon.points:
+        if point not in unique_points:
+            unique_points.append(point)
+    start = gm.find_lowest_point_in_polygon(points + [p for p in polygon.points if p not in points])
+    return gm.start_hull_at_point(gm.monotone_chain(unique_points), start)
+
+
+def cached_hull(polygon: Polygon, points: list) -> list:
+    """
+    The hull as create_convex_hull builds it from the cached hull of the polygon
+    """
+    convex_hull = polygon.get_convex_hull()
+    for point in points:
+        convex_hull = gm.insert_point_into_hull(convex_hull, point)
+    start = gm.find_lowest_point_in_polygon(points + [p for p in polygon.points if p not in points])
+    return gm.start_hull_at_point(convex_hull, start)
+
+
+def test_monotone_chain_leaves_out_collinear_and_duplicate_points():
+    square = [Point(0, 0), Point(1, 0), Point(2, 0), Point(2, 2), Point(0, 2), Point(1, 1), Point(2, 2), Point(0, 1)]
+    assert coordinates(gm.monotone_chain(square)) == [(0, 0), (2, 0), (2, 2), (0, 2)]
+
+
+def test_monotone_chain_of_degenerate_input():
+    assert gm.monotone_chain([]) == []
+    assert coordinates(gm.monotone_chain([Point(1, 1)])) == [(1, 1)]
+    assert coordinates(gm.monotone_chain([Point(2, 2), Point(1, 1)])) == [(1, 1), (2, 2)]
+    # All points on a line: only the two ends remain
+    line = [Point(2, 2), Point(0, 0), Point(1, 1), Point(3, 3)]
+    assert coordinates(gm.monotone_chain(line)) == [(0, 0), (3, 3)]
+
+
+def test_insert_point_into_hull():
+    hull = gm.monotone_chain([Point(0, 0), Point(2, 0), Point(2, 2), Point(0, 2)])
+    original = coordinates(hull)
+
+    # Inside and on an edge the hull does not change
+    assert coordinates(gm.insert_point_into_hull(hull, Point(1, 1))) == original
+    assert coordinates(gm.insert_point_into_hull(hull, Point(1, 2))) == original
+
+    # A point equal to a hull point takes its place
+    duplicate = Point(2, 2, name="duplicate")
+    assert gm.insert_point_into_hull(hull, duplicate)[2] is duplicate
+
+    # Outside, the hull points it sees are replaced by the point
+    assert sorted(coordinates(gm.insert_point_into_hull(hull, Point(3, 3)))) == [(0, 0), (0, 2), (2, 0), (3, 3)]
+    # Collinear with an edge, the end of that edge would be collinear and is left out
+    assert sorted(coordinates(gm.insert_point_into_hull(hull, Point(3, 0)))) == [(0, 0), (0, 2), (2, 2), (3, 0)]
+    assert coordinates(hull) == original
+
+    # Hulls of fewer than three points are rebuilt
+    assert coordinates(gm.insert_point_into_hull([Point(0, 0), Point(1, 1)], Point(2, 2))) == [(0, 0), (2, 2)]
+    assert coordinates(gm.insert_point_into_hull([Point(0, 0), Point(2, 0)], Point(1, 1))) == [(0, 0), (2, 0), (1, 1)]
+
+
+def test_start_hull_at_point():
+    hull = gm.monotone_chain([Point(0, 0), Point(2, 0), Point(2, 2), Point(0, 2)])
+    assert coordinates(gm.start_hull_at_point(hull, Point(2, 0))) == [(2, 0), (2, 2), (0, 2), (0, 0)]
+    # A lowest point collinear on the bottom edge is inserted into it
+    assert coordinates(gm.start_hull_at_point(hull, Point(1, 0))) == [(1, 0), (2, 0), (2, 2), (0, 2), (0, 0)]
+
+
+@pytest.mark.parametrize("name", ["TAIWAN", "YONAGUNI", "OKINAWA"])
+def test_cached_hull_matches_full_rebuild(name):
+    polygon = Polygon(points=getattr(constants_coords, name + "_POINTS"))
+    rng = np.random.default_rng(0)
+    min_x, max_x, min_y, max_y = polygon.vertex_bounds
+    margin = max(max_x - min_x, max_y - min_y)
+
+    x = rng.uniform(min_x - margin, max_x + margin, (50, 2))
+    y = rng.uniform(min_y - margin, max_y + margin, (50, 2))
+    point_pairs = [[Point(x_1, y_1), Point(x_2, y_2)] for (x_1, x_2), (y_1, y_2) in zip(x, y)]
+    # Vertices of the polygon and points on its bounding box are degenerate cases of the insertion
+    point_pairs.append([Point(polygon.points[0].x, polygon.points[0].y), Point(max_x + 1, max_y + 1)])
+    point_pairs.append([Point(min_x, min_y), Point(max_x, min_y)])
+
+    for points in point_pairs:
+        hull = cached_hull(polygon, points)
+        assert coordinates(hull) == coordinates(full_rebuild(polygon, points))
+        shape = shapely.MultiPoint(coordinates(polygon.points + points)).convex_hull
+        assert shapely.Polygon(coordinates(hull)).equals(shape)
+
+
+def test_create_convex_hull_matches_full_rebuild():
+    polygon = Polygon(points=constants_coords.TAIWAN_POINTS)
+    min_x, max_x, min_y, max_y = polygon.vertex_bounds
+    points = [Point(min_x - 1, min_y - 1), Point(max_x + 1, max_y + 1)]
+    assert coordinates(create_convex_hull(polygon, points)) == coordinates(full_rebuild(polygon, points))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import constants
+from general_maths import calculate_distance
+from points import Point
+from projection import EquirectangularProjection
+
+
+@pytest.fixture
+def projection():
+    return EquirectangularProjection.around_area_of_interest()
+
+
+def test_plane_round_trip(projection):
+    x = np.linspace(constants.MIN_LAT, constants.MAX_LAT, 7)
+    y = np.linspace(constants.MIN_LONG, constants.MAX_LONG, 7)
+    assert np.allclose(projection.to_lon_lat(*projection.to_plane(x, y)), (x, y))
+
+    plane_x, plane_y = projection.to_plane(projection.reference_x, projection.reference_y)
+    assert (plane_x, plane_y) == (0, 0)
+    assert projection.to_lon_lat(plane_x + 100, plane_y) == pytest.approx(
+        (projection.reference_x + 100 / projection.x_scale, projection.reference_y))
+
+
+def test_distance_matches_mean_latitude_distance_near_centre(projection):
+    centre = Point(projection.reference_x, projection.reference_y)
+    # Points mirrored around the reference latitude have the reference as mean latitude, the scales are equal
+    for offset_x, offset_y in [(1, 0), (0, 1), (0.5, 0.5), (-0.3, 0.8)]:
+        a = Point(centre.x - offset_x, centre.y - offset_y)
+        b = Point(centre.x + offset_x, centre.y + offset_y)
+        assert calculate_distance(a, b, projection=projection) == pytest.approx(calculate_distance(a, b))
+
+    # Within half a degree of the centre the scale of the mean latitude differs less than 0.5 %
+    for offset_x, offset_y in [(0.5, 0.5), (-0.5, 0.2), (0.1, -0.5)]:
+        b = Point(centre.x + offset_x, centre.y + offset_y)
+        assert calculate_distance(centre, b, projection=projection) == pytest.approx(
+            calculate_distance(centre, b), rel=5e-3)
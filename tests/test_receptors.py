@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+import constants
+from points import Point
+from scenario import ScenarioConfig
+from world import World
+
+STEPS = 150
+
+
+@pytest.fixture
+def world(monkeypatch):
+    monkeypatch.setattr(constants, "PHEROMONE_DIFFUSION", True)
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+    return World(time_delta=0.2, scenario=ScenarioConfig(seed=3))
+
+
+def test_local_concentration_is_inf_in_polygon(world):
+    # On Japan, in a cell of which the receptor is at sea
+    point = Point(136.81, 37.25)
+    assert not world.receptor_grid.get_receptor_at_location(point).in_polygon
+    assert math.isinf(world.receptor_grid.local_concentration(point))
+
+
+def test_local_concentration_separates_points_in_one_cell(world):
+    grid = world.receptor_grid
+    grid.pheromones[:] = grid.x + 2 * grid.y
+
+    points = [Point(125.2, 20.5), Point(125.5, 20.5), Point(125.5, 20.8)]
+    concentrations = [grid.local_concentration(point) for point in points]
+    assert len({grid.get_receptor_at_location(point).index for point in points}) == 1
+    assert concentrations == pytest.approx([point.x + 2 * point.y for point in points])
+
+    receptor = grid.get_receptor_at_location(points[0])
+    assert grid.local_concentration(receptor.location) == pytest.approx(receptor.uav_pheromones)
+
+
+def test_uavs_stay_out_of_polygons_with_diffusion(world):
+    for _ in range(STEPS):
+        world.time_step()
+        for drone in world.current_airborne_drones:
+            assert not any(polygon.check_if_contains_point(drone.location) for polygon in world.polygons), \
+                f"UAV {drone.uav_id} at ({drone.location.x}, {drone.location.y}) is in a polygon"
+    assert np.any([drone.patrolling for drone in world.current_airborne_drones])
+    world.close()
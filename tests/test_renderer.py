@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+
+import constants
+import telemetry
+from renderer import FRAME_NAME, read_chunk, render_chunk, rows_per_step
+from scenario import ScenarioConfig
+from world import World
+
+
+def test_rows_per_step_splits_on_steps():
+    table = {"step": np.array([1, 1, 2, 4, 4, 4]), "x": np.arange(6.)}
+    rows = rows_per_step(table, np.array([1, 2, 3, 4]))
+    assert [list(step_rows["step"]) for step_rows in rows] == [[1, 1], [2], [], [4, 4, 4]]
+    assert [list(step_rows["x"]) for step_rows in rows] == [[0, 1], [2], [], [3, 4, 5]]
+
+    # Rows of steps that are not split on are left out
+    assert [list(step_rows["x"]) for step_rows in rows_per_step(table, np.array([2, 4]))] == [[2], [3, 4, 5]]
+
+
+def test_render_chunk_renders_a_frame_per_step(monkeypatch, tmp_path):
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+    world = World(time_delta=0.2, scenario=ScenarioConfig(seed=6))
+    directory = str(tmp_path)
+    world.telemetry = telemetry.TelemetryWriter(world, directory=directory, chunk_steps=4, grid_interval=2)
+    for _ in range(4):
+        world.time_step()
+    world.close()
+
+    path = os.path.join(directory, "chunk_00000.npz")
+    ships = rows_per_step(read_chunk(path, "ships"), read_chunk(path, "pheromones")["step"])
+    assert [len(step_rows["ship_id"]) for step_rows in ships] == [len(world.current_vessels)] * 4
+
+    frames_directory = tmp_path / "frames"
+    frames_directory.mkdir()
+    meta = telemetry.load_meta(directory)
+    frames = render_chunk(directory, "chunk_00000.npz", str(frames_directory), first_frame=10,
+                          initial_grid=meta["initial_pheromones"], parameter="pheromones")
+    assert frames == 4
+    assert sorted(os.listdir(frames_directory)) == [FRAME_NAME % frame for frame in range(10, 14)]
@@ -0,0 +1,85 @@
+import itertools
+
+import numpy as np
+import shapely
+
+import constants_coords as cc
+from points import Point
+from polygons import Polygon
+from router import HierarchicalPlanner, Router
+from routes import create_route
+
+ISLANDS = ["TAIWAN", "ORCHID_ISLAND", "GREEN_ISLAND", "PENGHU_COUNTRY", "WANGAN", "QIMEI", "YONAGUNI", "TAKETOMI",
+           "ISHIGAKE", "MIYAKOJIMA", "OKINAWA", "OKINOERABUJIMA", "TOKUNOSHIMA", "AMAMI_OSHIMA", "YAKUSHIMA",
+           "TANEGASHIMA", "JAPAN"]
+DESTINATIONS = [Point(120.30, 22.44), Point(121.75, 25.19), Point(112, 22), Point(120, 32)]
+
+
+def create_router() -> Router:
+    polygons = [Polygon(points=getattr(cc, name + "_POINTS")) for name in ISLANDS]
+    return Router(polygons, DESTINATIONS)
+
+
+def crosses_interior(shapes: list, point_a: Point, point_b: Point) -> bool:
+    line = shapely.LineString([(point_a.x, point_a.y), (point_b.x, point_b.y)])
+    return any(line.crosses(shape) or shape.contains(line) for shape in shapes)
+
+
+def test_no_edge_crosses_a_polygon_interior():
+    router = create_router()
+    shapes = [polygon.get_shape() for polygon in router.polygons_to_avoid]
+    nodes = router.graph.nodes
+    for i, j in zip(*np.nonzero(np.triu(router.graph.visible))):
+        assert not crosses_interior(shapes, nodes[i], nodes[j]), f"{nodes[i]} - {nodes[j]}"
+
+
+def test_destinations_are_reachable_from_every_vertex():
+    router = create_router()
+    for tree in router.trees.values():
+        assert not np.any(np.isinf(tree.distances))
+
+
+def test_routes_stay_in_open_water():
+    router = create_router()
+    shapes = [polygon.get_shape() for polygon in router.polygons_to_avoid]
+    rng = np.random.default_rng(2)
+    starts = [Point(x, y) for x, y in rng.uniform((115, 15), (135, 35), size=(100, 2))]
+    starts = [start for start in starts if not any(shape.intersects(shapely.Point(start.x, start.y))
+                                                   for shape in shapes)]
+    for start, destination in zip(starts, itertools.cycle(DESTINATIONS)):
+        route = router.get_route(start, destination)
+        assert route.points[0] == start and route.points[-1] == destination
+        for point_a, point_b in zip(route.points, route.points[1:]):
+            assert not crosses_interior(shapes, point_a, point_b)
+
+
+def test_tree_routes_are_not_longer_than_created_routes():
+    router = create_router()
+    shapes = [polygon.get_shape() for polygon in router.polygons_to_avoid]
+    rng = np.random.default_rng(5)
+    starts = [Point(x, y) for x, y in rng.uniform((115, 15), (135, 35), size=(60, 2))]
+    starts = [start for start in starts if not any(shape.intersects(shapely.Point(start.x, start.y))
+                                                   for shape in shapes)]
+    for start, destination in zip(starts, itertools.cycle(DESTINATIONS)):
+        route = router.get_route(start, destination)
+        reference = create_route(start, destination, router.polygons_to_avoid)
+        assert route.length <= reference.length + 1e-6, f"{start} - {destination}"
+        for point_a, point_b in zip(route.points, route.points[1:]):
+            assert not crosses_interior(shapes, point_a, point_b)
+
+
+def test_hierarchical_routes_stay_in_open_water():
+    router = create_router()
+    shapes = [polygon.get_shape() for polygon in router.polygons_to_avoid]
+    planner = HierarchicalPlanner(router.polygons_to_avoid, cluster_distance=1.0, gateway_offset=0.1)
+    rng = np.random.default_rng(7)
+    points = [Point(x, y) for x, y in rng.uniform((118, 18), (135, 35), size=(200, 2))]
+    points = [point for point in points if not any(shape.intersects(shapely.Point(point.x, point.y))
+                                                   for shape in shapes)]
+    for start, end in zip(points[::2], points[1::2]):
+        route = planner.get_route(start, end)
+        if route is None:
+            continue
+        assert route.points[0] == start and route.points[-1] == end
+        for point_a, point_b in zip(route.points, route.points[1:]):
+            assert not crosses_interior(shapes, point_a, point_b)
@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+
+import constants
+import constants_coords as cc
+from points import Point
+from polygons import Polygon
+from routes import RouteTable, create_route, line_crosses_any_polygon
+
+ISLANDS = ["TAIWAN", "ORCHID_ISLAND", "GREEN_ISLAND", "PENGHU_COUNTRY", "WANGAN", "QIMEI", "YONAGUNI", "TAKETOMI",
+           "ISHIGAKE", "MIYAKOJIMA", "OKINAWA", "OKINOERABUJIMA", "TOKUNOSHIMA", "AMAMI_OSHIMA", "YAKUSHIMA",
+           "TANEGASHIMA", "JAPAN"]
+DOCKS = [Point(120.30, 22.44, name="Kaohsiung", force_maintain=True),
+         Point(120.42, 24.21, name="Tiachung", force_maintain=True),
+         Point(121.75, 25.19, name="Keelung", force_maintain=True),
+         Point(121.70, 23.96, name="Hualien", force_maintain=True)]
+BANDS = 10
+
+
+@pytest.fixture(scope="module")
+def route_table() -> RouteTable:
+    polygons = [Polygon(points=getattr(cc, name + "_POINTS")) for name in ISLANDS]
+    return RouteTable(destinations=DOCKS, polygons_to_avoid=polygons, bands=BANDS)
+
+
+def test_get_band_clamps_to_the_entry_edge(route_table):
+    assert route_table.get_band(Point(constants.MAX_LAT, constants.MIN_LONG)) == 0
+    assert route_table.get_band(Point(constants.MAX_LAT, constants.MIN_LONG - 1)) == 0
+    assert route_table.get_band(Point(constants.MAX_LAT, constants.MAX_LONG)) == BANDS - 1
+    assert route_table.get_band(Point(constants.MAX_LAT, constants.MIN_LONG + 1.5 * route_table.band_width)) == 1
+
+
+def test_routes_run_from_the_entry_point_to_the_destination(route_table):
+    entry_longitudes = [constants.MIN_LONG + 0.3 + 4.4 * i for i in range(BANDS)]
+    for y, destination in zip(entry_longitudes, itertools.cycle(DOCKS)):
+        entry_point = Point(constants.MAX_LAT, y, name="Entry Point")
+        route = route_table.get_route(entry_point, destination)
+        assert (route.points[0].x, route.points[0].y) == (entry_point.x, entry_point.y)
+        assert (route.points[-1].x, route.points[-1].y) == (destination.x, destination.y)
+        assert not line_crosses_any_polygon(route_table.polygons_to_avoid, route.points)[0]
+        # Only the entry leg differs from the route created from the entry point of the band
+        reference = create_route(entry_point, destination, route_table.polygons_to_avoid)
+        assert route.length == pytest.approx(reference.length, rel=0.05)
+
+
+def test_routes_do_not_share_points(route_table):
+    destination = DOCKS[0]
+    table_points = route_table.routes[(route_table.get_band(Point(constants.MAX_LAT, 20.1)), 0)]
+    route_a = route_table.get_route(Point(constants.MAX_LAT, 20.1), destination)
+    route_b = route_table.get_route(Point(constants.MAX_LAT, 20.2), destination)
+    assert len(route_a.points) == len(route_b.points) > 2
+
+    table_ids = {id(point) for point in table_points}
+    assert not table_ids & {id(point) for point in route_a.points}
+    assert not {id(point) for point in route_a.points} & {id(point) for point in route_b.points}
+
+    # Moving a point of one route leaves the table and the other route untouched
+    route_a.points[1].x += 1
+    assert route_b.points[1].x == table_points[1].x == route_a.points[1].x - 1
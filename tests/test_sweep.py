@@ -0,0 +1,33 @@
+import csv
+
+import constants
+import sweep
+from scenario import ScenarioConfig
+
+DURATION = 2 * 0.2
+
+
+def read_results(path: str) -> list:
+    with open(path, newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def test_duplicate_and_completed_scenarios_are_skipped(monkeypatch, tmp_path):
+    # The worker processes are forked and inherit these settings
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+    results_path = str(tmp_path / "results.csv")
+    scenario_a, scenario_b = sweep.create_scenarios(sweep.grid_design({"uav_availability": [0.25, 0.5]}),
+                                                    base=ScenarioConfig(uav_models=[]), seed=3)
+    assert scenario_a.key() != scenario_b.key()
+    assert sweep.deduplicate([scenario_a, scenario_b, scenario_a.with_changes()]) == [scenario_a, scenario_b]
+
+    sweep.run_sweep([scenario_a], DURATION, results_path, workers=1)
+    assert sweep.completed_scenario_keys(results_path) == {scenario_a.key()}
+
+    # The resumed sweep only runs scenario b, once
+    sweep.run_sweep([scenario_a, scenario_b, scenario_b.with_changes()], DURATION, results_path, workers=1)
+    rows = read_results(results_path)
+    assert [row["scenario_key"] for row in rows] == [scenario_a.key(), scenario_b.key()]
+    assert all(row["status"] == "completed" for row in rows), [row["error"] for row in rows]
+    assert [float(row["uav_availability"]) for row in rows] == [0.25, 0.5]
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+import constants
+import telemetry
+from scenario import ScenarioConfig
+from world import World
+
+STEPS = 30
+CHUNK_STEPS = 7
+GRID_INTERVAL = 5
+
+
+@pytest.fixture
+def world(monkeypatch):
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+    return World(time_delta=0.2, scenario=ScenarioConfig(seed=6))
+
+
+def test_recorded_tables_match_the_run(world, tmp_path):
+    directory = str(tmp_path)
+    world.telemetry = telemetry.TelemetryWriter(world, directory=directory, chunk_steps=CHUNK_STEPS,
+                                                grid_interval=GRID_INTERVAL)
+    ship_rows = []
+    drone_rows = []
+    for _ in range(STEPS):
+        world.time_step()
+        ship_rows += [(ship.ship_id, ship.location.x, ship.location.y) for ship in world.current_vessels]
+        drone_rows += [(drone.uav_id, drone.location.x, drone.location.y) for drone in world.current_airborne_drones]
+    world.close()
+
+    chunk_files = [f for f in os.listdir(directory) if f.startswith("chunk_")]
+    assert len(chunk_files) == int(np.ceil(STEPS / CHUNK_STEPS))
+    assert telemetry.load_meta(directory)["time_delta"] == world.time_delta
+
+    pheromones = telemetry.load_table(directory, "pheromones")
+    assert list(pheromones["step"]) == list(range(1, STEPS + 1))
+    assert pheromones["time"][-1] == world.world_time
+
+    ships = telemetry.load_table(directory, "ships")
+    assert len(ship_rows) > 0
+    assert list(zip(ships["ship_id"], ships["x"], ships["y"])) == ship_rows
+    assert np.all(np.diff(ships["step"]) >= 0)
+
+    drones = telemetry.load_table(directory, "drones")
+    assert len(drone_rows) > 0
+    assert list(zip(drones["uav_id"], drones["x"], drones["y"])) == drone_rows
+
+    grid = telemetry.load_table(directory, "grid")
+    assert list(grid["step"]) == list(range(GRID_INTERVAL, STEPS + 1, GRID_INTERVAL))
+    assert grid["pheromones"].shape == (len(grid["step"]), len(world.receptor_grid.receptors))
+    assert np.array_equal(grid["pheromones"][-1], world.receptor_grid.pheromones)
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import shapely
+
+import constants
+import constants_coords as cc
+import general_maths as gm
+from points import Point
+from polygons import Polygon
+from router import Router
+from routes import line_crosses_any_polygon
+from theta_star import ThetaStarPlanner
+
+ISLANDS = ["TAIWAN", "ORCHID_ISLAND", "GREEN_ISLAND", "PENGHU_COUNTRY", "WANGAN", "QIMEI", "YONAGUNI", "TAKETOMI",
+           "ISHIGAKE", "MIYAKOJIMA", "OKINAWA", "OKINOERABUJIMA", "TOKUNOSHIMA", "AMAMI_OSHIMA", "YAKUSHIMA",
+           "TANEGASHIMA", "JAPAN"]
+RESOLUTION = 0.25
+# Pairs of points in open water of which the straight line crosses a polygon
+OBSTRUCTED_PAIRS = [(Point(119.0, 23.5), Point(122.5, 23.5)),
+                    (Point(120.5, 21.5), Point(121.5, 26.0)),
+                    (Point(123.0, 24.0), Point(130.0, 28.0)),
+                    (Point(127.0, 26.0), Point(128.5, 27.0))]
+
+
+@pytest.fixture(scope="module")
+def polygons() -> list:
+    return [Polygon(points=getattr(cc, name + "_POINTS")) for name in ISLANDS]
+
+
+@pytest.fixture(scope="module")
+def planner(polygons) -> ThetaStarPlanner:
+    return ThetaStarPlanner(polygons, resolution=RESOLUTION)
+
+
+def test_raster_blocks_cells_near_polygons(polygons, planner):
+    raster = planner.raster
+    land = shapely.union_all([polygon.get_shape() for polygon in polygons])
+    inland = polygons[ISLANDS.index("TAIWAN")].get_shape().representative_point()
+    assert raster.blocked[raster.cell_of(Point(inland.x, inland.y))]
+    assert not raster.blocked[raster.cell_of(Point(125.0, 20.0))]
+    # Every cell of which the centre lies in a polygon is blocked
+    assert np.all(raster.blocked[shapely.intersects_xy(land, raster.x, raster.y)])
+
+    # Points outside the area of interest fall in the border cells
+    assert raster.cell_of(Point(constants.MIN_LAT - 1, constants.MIN_LONG - 1)) == (0, 0)
+    assert raster.cell_of(Point(constants.MAX_LAT + 1, constants.MAX_LONG + 1)) == (raster.rows - 1, raster.cols - 1)
+
+
+def test_line_of_sight_over_the_raster(planner):
+    raster = planner.raster
+    open_water = (raster.cell_of(Point(125.0, 20.0)), raster.cell_of(Point(127.0, 21.0)))
+    across_taiwan = (raster.cell_of(Point(119.0, 23.5)), raster.cell_of(Point(122.5, 23.5)))
+    assert raster.line_of_sight(raster.blocked, *open_water)
+    assert not raster.line_of_sight(raster.blocked, *across_taiwan)
+
+
+@pytest.mark.parametrize("point_a, point_b", OBSTRUCTED_PAIRS)
+def test_route_avoids_polygons(polygons, planner, point_a, point_b):
+    assert line_crosses_any_polygon(polygons, [point_a, point_b])[0]
+
+    route = planner.get_route(point_a, point_b)
+    assert route is not None
+    assert (route.points[0].x, route.points[0].y) == (point_a.x, point_a.y)
+    assert (route.points[-1].x, route.points[-1].y) == (point_b.x, point_b.y)
+    assert not line_crosses_any_polygon(polygons, route.points)[0]
+    assert route.length >= gm.calculate_distance(point_a, point_b)
+
+
+def test_unobstructed_route_is_the_straight_line(planner):
+    point_a, point_b = Point(125.0, 20.0), Point(127.0, 21.0)
+    route = planner.get_route(point_a, point_b)
+    assert len(route.points) == 2
+    assert route.length == pytest.approx(gm.calculate_distance(point_a, point_b))
+
+
+def test_no_route_from_or_to_a_blocked_point(polygons, planner):
+    inland = polygons[ISLANDS.index("TAIWAN")].get_shape().representative_point()
+    blocked_point = Point(inland.x, inland.y)
+    assert planner.raster.blocked[planner.raster.cell_of(blocked_point)]
+
+    open_water = Point(119.0, 23.5)
+    assert planner.get_route(blocked_point, open_water) is None
+    assert planner.get_route(open_water, blocked_point) is None
+
+
+def test_router_estimates_with_the_grid_planner(monkeypatch, polygons):
+    monkeypatch.setattr(constants, "GRID_ROUTING", True)
+    monkeypatch.setattr(constants, "GRID_ROUTING_MIN_VERTICES", 0)
+    monkeypatch.setattr(constants, "HIERARCHICAL_ROUTING", False)
+    router = Router(polygons, [])
+    assert isinstance(router.grid_planner, ThetaStarPlanner)
+
+    point_a, point_b = OBSTRUCTED_PAIRS[0]
+    calls = []
+    monkeypatch.setattr(router.grid_planner, "get_route", lambda a, b: calls.append((a, b)) or None)
+    router.get_route(point_a, point_b, estimate=True)
+    assert calls == [(point_a, point_b)]
+
+    monkeypatch.setattr(constants, "GRID_ROUTING_MIN_VERTICES", 10 ** 9)
+    assert Router(polygons, []).grid_planner is None
@@ -0,0 +1,39 @@
+import pytest
+
+import constants
+from scenario import ScenarioConfig
+from world import World
+
+STEPS = 200
+# Largest difference in degrees between the vectorized and per-ship movement, only rounding may differ
+POSITION_TOLERANCE = 1e-9
+
+
+def run_world(monkeypatch, vectorized: bool, metric_projection: bool) -> World:
+    monkeypatch.setattr(constants, "VECTORIZED_SHIP_MOVEMENT", vectorized)
+    monkeypatch.setattr(constants, "METRIC_PROJECTION", metric_projection)
+    monkeypatch.setattr(constants, "PLOTTING_MODE", False)
+    monkeypatch.setattr(constants, "DEBUG_MODE", False)
+    monkeypatch.setattr(constants, "CACHE_STATIC_MASKS", False)
+    monkeypatch.setattr(constants, "RECORD_TELEMETRY", False)
+
+    world = World(time_delta=0.2, scenario=ScenarioConfig(seed=4, uav_models=[], arrival_rate_multiplier=1))
+    world.run(STEPS * world.time_delta)
+    world.close()
+    return world
+
+
+@pytest.mark.parametrize("metric_projection", [False, True])
+def test_vectorized_movement_matches_ship_move(monkeypatch, metric_projection):
+    vectorized = run_world(monkeypatch, vectorized=True, metric_projection=metric_projection)
+    per_ship = run_world(monkeypatch, vectorized=False, metric_projection=metric_projection)
+
+    assert vectorized.ships_reached_destination == per_ship.ships_reached_destination
+    assert ([ship.arrival_time for ship in vectorized.current_vessels] ==
+            [ship.arrival_time for ship in per_ship.current_vessels])
+    assert len(vectorized.current_vessels) > 0
+    for ship, reference in zip(vectorized.current_vessels, per_ship.current_vessels):
+        assert ship.location.x == pytest.approx(reference.location.x, abs=POSITION_TOLERANCE)
+        assert ship.location.y == pytest.approx(reference.location.y, abs=POSITION_TOLERANCE)
+        assert (ship.next_point.x, ship.next_point.y) == (reference.next_point.x, reference.next_point.y)
+        assert len(ship.past_points) == len(reference.past_points)
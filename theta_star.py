@@ -0,0 +1,164 @@
+"""
+Any-angle path planning (lazy Theta*) on a raster of the area of interest.
+A cell is blocked when it comes within a cell size of any polygon, so a line of sight over free cells, sampled at
+every half cell, never touches a polygon. The runtime of a query is proportional to the number of explored cells,
+the resolution of the raster trades the accuracy of the routes for speed.
+The path over the raster is shortened against the true polygons afterwards.
+"""
+import heapq
+import math
+
+import numpy as np
+import shapely
+
+import constants
+import general_maths as gm
+from points import Point
+from projection import EquirectangularProjection
+from routes import Route, line_crosses_any_polygon
+
+# ----------------------------------------------- LOGGER SET UP ------------------------------------------------
+from log_setup import get_logger
+
+logger = get_logger("THETA_STAR")
+
+
+# --------------------------------------------- END LOGGER SET UP ------------------------------------------------
+
+# Steps to the 8 neighbours of a cell in (row, col)
+NEIGHBOUR_STEPS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+class ObstacleRaster:
+    def __init__(self, polygons_to_avoid: list, resolution: float) -> None:
+        """
+        :param polygons_to_avoid: List of polygons to avoid
+        :param resolution: Cell size in degrees
+        """
+        self.resolution = resolution
+        # Rows run along y, columns along x
+        self.rows = int(np.ceil((constants.MAX_LONG - constants.MIN_LONG) / resolution))
+        self.cols = int(np.ceil((constants.MAX_LAT - constants.MIN_LAT) / resolution))
+
+        x = constants.MIN_LAT + (np.arange(self.cols) + 0.5) * resolution
+        y = constants.MIN_LONG + (np.arange(self.rows) + 0.5) * resolution
+        self.x, self.y = np.meshgrid(x, y)
+
+        land = shapely.union_all([polygon.get_shape() for polygon in polygons_to_avoid]).buffer(resolution)
+        shapely.prepare(land)
+        self.blocked = shapely.intersects_xy(land, self.x, self.y)
+        logger.debug("Raster of %s x %s cells, %s blocked", self.rows, self.cols, np.sum(self.blocked))
+
+        projection = EquirectangularProjection.around_area_of_interest()
+        self.x_scale = projection.x_scale * resolution
+        self.y_scale = projection.y_scale * resolution
+
+    def cell_of(self, point: Point) -> tuple:
+        row = int((point.y - constants.MIN_LONG) // self.resolution)
+        col = int((point.x - constants.MIN_LAT) // self.resolution)
+        return min(max(row, 0), self.rows - 1), min(max(col, 0), self.cols - 1)
+
+    def distance(self, cell_a: tuple, cell_b: tuple) -> float:
+        return math.hypot((cell_a[0] - cell_b[0]) * self.y_scale, (cell_a[1] - cell_b[1]) * self.x_scale)
+
+    def line_of_sight(self, blocked: np.ndarray, cell_a: tuple, cell_b: tuple) -> bool:
+        """
+        :param blocked: Blocked cells
+        :param cell_a: (row, col) of the first cell
+        :param cell_b: (row, col) of the second cell
+        :return: True if no cell along the line is blocked
+        """
+        steps = max(abs(cell_a[0] - cell_b[0]), abs(cell_a[1] - cell_b[1]))
+        if steps <= 1:
+            return not blocked[cell_a] and not blocked[cell_b]
+        fractions = np.arange(2 * steps + 1) / (2 * steps)
+        rows = np.rint(cell_a[0] + fractions * (cell_b[0] - cell_a[0])).astype(int)
+        cols = np.rint(cell_a[1] + fractions * (cell_b[1] - cell_a[1])).astype(int)
+        return not np.any(blocked[rows, cols])
+
+
+class ThetaStarPlanner:
+    def __init__(self, polygons_to_avoid: list, resolution: float) -> None:
+        """
+        :param polygons_to_avoid: List of polygons to avoid
+        :param resolution: Cell size of the raster in degrees
+        """
+        self.polygons_to_avoid = polygons_to_avoid
+        self.raster = ObstacleRaster(polygons_to_avoid, resolution)
+
+    def search(self, start: tuple, goal: tuple) -> list | None:
+        """
+        Lazy Theta*: a cell takes the parent of the cell it is reached from, the line of sight to that parent is
+        only checked once the cell is expanded.
+        :param start: (row, col) of the start cell
+        :param goal: (row, col) of the goal cell
+        :return: Cells from start to goal, None if the goal can not be reached
+        """
+        raster = self.raster
+        # The start and goal can lie within a cell size of the coast, the route is checked against the polygons
+        blocked = raster.blocked.copy()
+        for row, col in [start, goal]:
+            blocked[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = False
+
+        g = {start: 0.}
+        parents = {start: start}
+        closed = set()
+        queue = [(raster.distance(start, goal), start)]
+        while queue:
+            f, cell = heapq.heappop(queue)
+            if cell in closed:
+                continue
+            parent = parents[cell]
+            if not raster.line_of_sight(blocked, parent, cell):
+                # Take the best expanded neighbour as parent instead
+                neighbours = [(cell[0] + d_row, cell[1] + d_col) for d_row, d_col in NEIGHBOUR_STEPS]
+                g[cell], parents[cell] = min((g[n] + raster.distance(n, cell), n) for n in neighbours if n in closed)
+            if cell == goal:
+                return self.extract_path(parents, goal)
+            closed.add(cell)
+
+            parent = parents[cell]
+            for d_row, d_col in NEIGHBOUR_STEPS:
+                neighbour = (cell[0] + d_row, cell[1] + d_col)
+                if (not 0 <= neighbour[0] < raster.rows or not 0 <= neighbour[1] < raster.cols
+                        or blocked[neighbour] or neighbour in closed):
+                    continue
+                new_g = g[parent] + raster.distance(parent, neighbour)
+                if new_g < g.get(neighbour, np.inf):
+                    g[neighbour] = new_g
+                    parents[neighbour] = parent
+                    heapq.heappush(queue, (new_g + raster.distance(neighbour, goal), neighbour))
+        return None
+
+    @staticmethod
+    def extract_path(parents: dict, goal: tuple) -> list:
+        path = [goal]
+        while parents[path[-1]] != path[-1]:
+            path.append(parents[path[-1]])
+        return path[::-1]
+
+    def get_route(self, point_a: Point, point_b: Point) -> Route | None:
+        """
+        :param point_a: Start Point
+        :param point_b: End Point
+        :return: None if there is no path over the raster, or if the legs to the start and end are obstructed
+        """
+        if not line_crosses_any_polygon(self.polygons_to_avoid, [point_a, point_b])[0]:
+            return Route(points=[Point(point_a.x, point_a.y, name=point_a.name),
+                                 Point(point_b.x, point_b.y, name=point_b.name)])
+
+        cells = self.search(self.raster.cell_of(point_a), self.raster.cell_of(point_b))
+        if cells is None:
+            return None
+
+        path = ([Point(point_a.x, point_a.y, name=point_a.name)] +
+                [Point(self.raster.x[cell], self.raster.y[cell]) for cell in cells[1:-1]] +
+                [Point(point_b.x, point_b.y, name=point_b.name)])
+        try:
+            path = gm.maximize_concavity(path, self.polygons_to_avoid)
+        except TimeoutError:
+            logger.debug("Could not shorten path of %s points", len(path))
+
+        if line_crosses_any_polygon(self.polygons_to_avoid, path)[0]:
+            return None
+        return Route(points=path)
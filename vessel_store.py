@@ -0,0 +1,177 @@
+"""
+Array-backed store of the vessels in the world.
+Positions, speeds and routes of all vessels are kept in arrays, so that all vessels move along their routes in a
+single vectorized step. Vessels are removed by swapping the last vessel into their slot.
+"""
+import numpy as np
+
+import constants
+from general_maths import distance_between
+from points import Point
+
+
+class VesselStore:
+    def __init__(self, capacity: int = 64, max_route_points: int = 16):
+        self.ships = []
+        self.route_point_lists = []
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.segment = np.zeros(capacity, dtype=int)
+        self.points_passed = np.zeros(capacity, dtype=int)
+        self.number_of_route_points = np.zeros(capacity, dtype=int)
+        self.arrived = np.zeros(capacity, dtype=bool)
+
+        # Routes, padded to the longest route in the store
+        self.route_x = np.zeros((capacity, max_route_points))
+        self.route_y = np.zeros((capacity, max_route_points))
+
+    def __len__(self):
+        return len(self.ships)
+
+    def vessel_arrays(self) -> list:
+        return [self.x, self.y, self.speed, self.segment, self.points_passed, self.number_of_route_points,
+                self.arrived, self.route_x, self.route_y]
+
+    def grow_capacity(self) -> None:
+        capacity = 2 * len(self.x)
+        for name in ["x", "y", "speed", "segment", "points_passed", "number_of_route_points", "arrived",
+                     "route_x", "route_y"]:
+            array = getattr(self, name)
+            new_array = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            new_array[:len(array)] = array
+            setattr(self, name, new_array)
+
+    def grow_route_width(self, max_route_points: int) -> None:
+        for name in ["route_x", "route_y"]:
+            array = getattr(self, name)
+            new_array = np.zeros((array.shape[0], max_route_points))
+            new_array[:, :array.shape[1]] = array
+            setattr(self, name, new_array)
+
+    def add(self, ship) -> None:
+        if len(self.ships) == len(self.x):
+            self.grow_capacity()
+        index = len(self.ships)
+        self.ships.append(ship)
+        self.route_point_lists.append([])
+        ship.store_index = index
+        self.speed[index] = ship.speed
+        self.set_route(ship)
+
+    def remove(self, ship) -> None:
+        """
+        Removes a ship from the store, the last ship in the store takes its place.
+        :param ship:
+        :return:
+        """
+        index = ship.store_index
+        last_index = len(self.ships) - 1
+        if index != last_index:
+            moved_ship = self.ships[last_index]
+            self.ships[index] = moved_ship
+            self.route_point_lists[index] = self.route_point_lists[last_index]
+            moved_ship.store_index = index
+            for array in self.vessel_arrays():
+                array[index] = array[last_index]
+        self.ships.pop()
+        self.route_point_lists.pop()
+        ship.store_index = None
+
+    def set_route(self, ship) -> None:
+        """
+        Loads the remaining route of a ship into the store, starting from its current location.
+        :param ship:
+        :return:
+        """
+        index = ship.store_index
+        points = [Point(ship.location.x, ship.location.y), ship.next_point] + ship.remaining_points
+        if len(points) > self.route_x.shape[1]:
+            self.grow_route_width(len(points))
+
+        self.route_point_lists[index] = points
+        self.route_x[index] = 0
+        self.route_y[index] = 0
+        self.route_x[index, :len(points)] = [p.x for p in points]
+        self.route_y[index, :len(points)] = [p.y for p in points]
+
+        self.x[index] = ship.location.x
+        self.y[index] = ship.location.y
+        self.number_of_route_points[index] = len(points)
+        self.segment[index] = 0
+        self.points_passed[index] = 0
+        self.arrived[index] = False
+
+    def step(self, duration: float, projection=None) -> list:
+        """
+        Moves all vessels along their routes over the given duration.
+        Like Ship.move, the distance to the next point is measured again from the current location every step,
+        the distance in km along a segment is not linear in lon/lat without a projection.
+        :param duration: Time to move
+        :param projection: Local km plane of the world to measure in
+        :return: List of the ships that reached the end of their route in this step
+        """
+        n = len(self.ships)
+        if n == 0:
+            return []
+        previous_segment = self.segment[:n].copy()
+        distance_to_travel = np.where(self.arrived[:n], 0, self.speed[:n] * duration)
+        newly_arrived = np.zeros(n, dtype=bool)
+
+        # Every iteration moves the ships that still have distance to travel up to their next point at most
+        iterations = 0
+        moving = np.nonzero(distance_to_travel > 0)[0]
+        while len(moving) > 0:
+            iterations += 1
+            if iterations > constants.ITERATION_LIMIT:
+                raise TimeoutError(f"Vessels {moving.tolist()} stuck on distances {distance_to_travel[moving]}")
+            next_x = self.route_x[moving, self.segment[moving] + 1]
+            next_y = self.route_y[moving, self.segment[moving] + 1]
+            distance_to_next_point = distance_between(self.x[moving], self.y[moving], next_x, next_y, projection)
+
+            reached = distance_to_next_point <= distance_to_travel[moving]
+            part_of_route = np.divide(distance_to_travel[moving], distance_to_next_point,
+                                      out=np.ones(len(moving)), where=~reached)
+            self.x[moving] += part_of_route * (next_x - self.x[moving])
+            self.y[moving] += part_of_route * (next_y - self.y[moving])
+            self.x[moving[reached]] = next_x[reached]
+            self.y[moving[reached]] = next_y[reached]
+            distance_to_travel[moving] = np.where(reached, distance_to_travel[moving] - distance_to_next_point, 0)
+
+            passed = moving[reached]
+            self.segment[passed] += 1
+            end_of_route = passed[self.segment[passed] + 1 >= self.number_of_route_points[passed]]
+            self.segment[end_of_route] -= 1
+            self.arrived[end_of_route] = True
+            newly_arrived[end_of_route] = True
+            distance_to_travel[end_of_route] = 0
+            moving = moving[distance_to_travel[moving] > 0]
+
+        progressed = np.nonzero((self.segment[:n] != previous_segment) | newly_arrived)[0]
+        for ship, x_ship, y_ship in zip(self.ships, self.x[:n].tolist(), self.y[:n].tolist()):
+            ship.location.x = x_ship
+            ship.location.y = y_ship
+
+        for index in progressed:
+            self.update_route_progress(index)
+
+        return [self.ships[index] for index in np.nonzero(newly_arrived)[0]]
+
+    def update_route_progress(self, index: int) -> None:
+        """
+        Updates the passed and upcoming points of a ship after it passed one or more points of its route.
+        :param index:
+        :return:
+        """
+        ship = self.ships[index]
+        points = self.route_point_lists[index]
+        if self.arrived[index]:
+            points_passed = len(points) - 1
+        else:
+            points_passed = self.segment[index]
+
+        ship.past_points.extend(points[self.points_passed[index] + 1: points_passed + 1])
+        self.points_passed[index] = points_passed
+        ship.next_point = points[min(points_passed + 1, len(points) - 1)]
+        ship.remaining_points = points[points_passed + 2:]
@@ -4,46 +4,54 @@ A world has a set time delta, which sets the time-jumps per simulation step.
 A time delta of 1 corresponds to jumps of 1 hour real time.
 """
 
-import datetime
-import logging
-from logging.handlers import RotatingFileHandler
 import os
+import random
 import time
 
 import weather_data
 
-if not os.path.exists("logs"):
-    os.makedirs("logs")
-
 import matplotlib.pyplot as plt
 import numpy as np
 
+import checkpoint
 import constants
 import constants_coords
+import events
+from arrivals import ArrivalSchedule
 from drones import Drone, DroneType, Airbase
+from events import EventCalendar
 from points import Point
 from polygons import Polygon
+from projection import EquirectangularProjection
 from receptors import ReceptorGrid
-from ships import Ship, Merchant, generate_random_merchant
+from router import Router
+from routes import RouteTable
+from scenario import ScenarioConfig
+from ships import Ship, Merchant
+from telemetry import TelemetryWriter
+from vessel_store import VesselStore
+from log_setup import get_logger
 
-date = datetime.date.today()
+logger = get_logger("WORLD")
 
-logging.basicConfig(level=logging.DEBUG, filename=os.path.join(os.getcwd(), 'logs/navy_log_' + str(date) + '.log'),
-                    handlers=[RotatingFileHandler("logs/navy_log_" + str(date) + ".log",
-                                                  maxBytes=2000, backupCount=10)],
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt="%H:%M:%S", filemode='w')
-logger = logging.getLogger("WORLD")
-logger.setLevel(logging.DEBUG)
 
-logging.getLogger("matplotlib").setLevel(logging.WARNING)
-logging.getLogger("PIL").setLevel(logging.WARNING)
-logging.getLogger("PIL.PngImagePlugin").setLevel(logging.WARNING)
-logging.getLogger("fiona.ogrext").setLevel(logging.WARNING)
-logging.getLogger("GEOPOLYGON").setLevel(logging.WARNING)
+class World:
+    def __init__(self, time_delta: float, scenario: ScenarioConfig = None):
+        """
+        :param time_delta: Time (in hours) per simulation step
+        :param scenario: Scenario parameters of the run, the defaults in constants.py if not provided
+        """
+        if scenario is None:
+            scenario = ScenarioConfig()
+        self.scenario = scenario
+        if scenario.seed is not None:
+            random.seed(scenario.seed)
+            np.random.seed(scenario.seed)
 
+        # Distances of this world are measured on a local km plane in projection mode, passed to the distance helpers
+        self.projection = None
+        self.set_up_projection()
 
-class World:
-    def __init__(self, time_delta: float):
         # timer functions
         self.time_spent_on_UAVs = 0
         self.time_spent_on_navy = 0
@@ -67,6 +75,12 @@ class World:
         self.airbases = None
         self.initiate_airbases()
 
+        self.router = None
+        self.initiate_router()
+
+        self.merchant_route_table = None
+        self.initiate_merchant_route_table()
+
         self.receptor_grid = None
         self.initiate_receptor_grid()
 
@@ -79,10 +93,17 @@ class World:
         self.splits_per_step = int(np.ceil(constants.UAV_MOVEMENT_SPLITS_P_H * self.time_delta))
         print(f"SPLITS PER TIME DELTA SET AT {self.splits_per_step}")
         self.world_time = 0
+        self.event_calendar = EventCalendar()
+        self.arrival_schedule = ArrivalSchedule(start_time=self.world_time, scenario=self.scenario)
 
         # Statistics
-        self.current_vessels = []
+        self.vessel_store = VesselStore()
+        self.current_vessels = self.vessel_store.ships
         self.current_airborne_drones = []
+        self.detections = 0
+        self.attacks = 0
+        self.ships_sunk = 0
+        self.ships_reached_destination = 0
 
         # Plotting
         self.fig = None
@@ -93,46 +114,36 @@ class World:
         self.drone_types = []
         self.initiate_drones()
 
+        if constants.DISCRETE_EVENT_MODE:
+            self.initiate_events()
+
+        self.telemetry = None
+        if constants.RECORD_TELEMETRY:
+            self.telemetry = TelemetryWriter(self)
+
+    def __getstate__(self):
+        # Plot artists and the telemetry writer are not part of the simulation state
+        state = self.__dict__.copy()
+        state.update(fig=None, ax=None, telemetry=None)
+        return state
+
+    def set_up_projection(self) -> None:
+        if constants.METRIC_PROJECTION:
+            self.projection = EquirectangularProjection.around_area_of_interest()
+        else:
+            self.projection = None
+
     def initiate_land_masses(self) -> None:
-        self.landmasses = [Landmass(name="taiwan", polygon=Polygon(points=constants_coords.TAIWAN_POINTS),
-                                    color=constants_coords.TAIWAN_COLOR),
-                           Landmass(name="orchid_island", polygon=Polygon(points=constants_coords.ORCHID_ISLAND_POINTS),
-                                    color=constants_coords.TAIWAN_COLOR),
-                           Landmass(name="green_island", polygon=Polygon(points=constants_coords.GREEN_ISLAND_POINTS),
-                                    color=constants_coords.TAIWAN_COLOR),
-                           Landmass(name="penghu", polygon=Polygon(points=constants_coords.PENGHU_COUNTRY_POINTS),
-                                    color=constants_coords.TAIWAN_COLOR),
-                           Landmass(name="wangan", polygon=Polygon(points=constants_coords.WANGAN_POINTS),
-                                    color=constants_coords.TAIWAN_COLOR),
-                           Landmass(name="qimei", polygon=Polygon(points=constants_coords.QIMEI_POINTS),
-                                    color=constants_coords.TAIWAN_COLOR),
-                           Landmass(name="yonaguni", polygon=Polygon(points=constants_coords.YONAGUNI_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="taketomi", polygon=Polygon(points=constants_coords.TAKETOMI_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="ishigaki", polygon=Polygon(points=constants_coords.ISHIGAKE_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="miyakojima", polygon=Polygon(points=constants_coords.MIYAKOJIMA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="okinawa", polygon=Polygon(points=constants_coords.OKINAWA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="okinoerabujima",
-                                    polygon=Polygon(points=constants_coords.OKINOERABUJIMA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="tokunoshima", polygon=Polygon(points=constants_coords.TOKUNOSHIMA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="amami_oshima", polygon=Polygon(points=constants_coords.AMAMI_OSHIMA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="yakushima", polygon=Polygon(points=constants_coords.YAKUSHIMA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="tanegashima", polygon=Polygon(points=constants_coords.TANEGASHIMA_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           Landmass(name="japan", polygon=Polygon(points=constants_coords.JAPAN_POINTS),
-                                    color=constants_coords.JAPAN_COLOR),
-                           ]
-
-        self.china_polygon = Landmass(name="china", polygon=Polygon(points=constants_coords.CHINA_POINTS),
-                                      color=constants_coords.CHINA_COLOR)
+        self.landmasses = [Landmass(name=name, polygon=Polygon(points=points), color=color)
+                           for name, points, color in constants_coords.LANDMASSES]
+
+        name, points, color = constants_coords.CHINA
+        self.china_polygon = Landmass(name=name, polygon=Polygon(points=points), color=color)
+
+        if constants.COASTLINE_LOD:
+            for landmass in self.landmasses + [self.china_polygon]:
+                landmass.polygon.set_up_coarse_level(buffer=constants.COASTLINE_BUFFER,
+                                                     tolerance=constants.COASTLINE_SIMPLIFY_TOLERANCE)
 
     def initiate_receptor_grid(self) -> None:
         self.receptor_grid = ReceptorGrid(self.polygons + [self.china_polygon.polygon], self)
@@ -147,6 +158,20 @@ class World:
                       Dock(name="Hualien", location=Point(121.70, 23.96, name="Hualien", force_maintain=True),
                            probability=0.05)]
 
+    def initiate_router(self) -> None:
+        if not constants.SHORTEST_PATH_TREES and not constants.HIERARCHICAL_ROUTING and not constants.GRID_ROUTING:
+            return
+        destinations = []
+        if constants.SHORTEST_PATH_TREES:
+            destinations = [dock.location for dock in self.docks] + [airbase.location for airbase in self.airbases]
+        self.router = Router(polygons_to_avoid=self.polygons, destinations=destinations, projection=self.projection)
+
+    def initiate_merchant_route_table(self) -> None:
+        self.merchant_route_table = RouteTable(destinations=[dock.location for dock in self.docks],
+                                               polygons_to_avoid=self.polygons,
+                                               bands=constants.MERCHANT_ENTRY_BANDS,
+                                               router=self.router)
+
     def initiate_airbases(self) -> None:
         self.airbases = [Airbase(name="Base 1", location=Point(112, 22, force_maintain=True, name="Base 1")),
                          Airbase(name="Base 2", location=Point(120, 32, force_maintain=True, name="Base 2"))]
@@ -155,9 +180,9 @@ class World:
         # TODO: Decide method on how to distribute over airbases (50/50 per type? Certain ratios?)
         logger.debug("Initiating Drones...")
 
-        for model in constants.UAV_MODELS:
+        for model in self.scenario.uav_models:
             drone_type = DroneType(name=model['name'],
-                                   amount=np.floor(model['number_of_airframes'] * constants.UAV_AVAILABILITY))
+                                   amount=np.floor(model['number_of_airframes'] * self.scenario.uav_availability))
             self.drone_types.append(drone_type)
 
             for _ in range(model['number_of_airframes']):
@@ -168,6 +193,11 @@ class World:
 
             drone_type.calculate_utilization_rate()
 
+    def initiate_events(self) -> None:
+        self.event_calendar.schedule(self.time_last_weather_update + constants.WEATHER_RESAMPLING_TIME_SPLIT,
+                                     events.WEATHER_RESAMPLE)
+        self.event_calendar.schedule(self.arrival_schedule.next_arrival_time(), events.ARRIVAL)
+
     def plot_world(self, include_receptors=False) -> None:
         if not constants.PLOTTING_MODE and not constants.DEBUG_MODE:
             return
@@ -180,27 +210,37 @@ class World:
         self.ax.set_ylabel("Longitude")
 
         for landmass in self.landmasses:
-            logging.debug(f"Plotting {landmass}")
+            logger.debug("Plotting %s", landmass)
             self.ax = landmass.add_landmass_to_plot(self.ax)
 
         self.ax = self.china_polygon.add_landmass_to_plot(self.ax)
 
         for dock in self.docks:
-            logging.debug(f"Plotting {dock}")
+            logger.debug("Plotting %s", dock)
             self.ax = dock.add_dock_to_plot(self.ax)
 
         for airbase in self.airbases:
-            logging.debug(f"Plotting {airbase}")
+            logger.debug("Plotting %s", airbase)
             self.ax = airbase.add_airbase_to_plot(self.ax)
 
         if include_receptors:
-            for receptor in self.receptor_grid.receptors:
-                self.ax = receptor.initiate_plot(self.ax, self.receptor_grid.cmap)
+            self.receptor_grid.initiate_plot(self.ax)
         constants.axes_plot = self.ax
 
         plt.show()
         self.fig.canvas.draw()
 
+    def restore_plot(self) -> None:
+        """
+        Recreates the plot of a world restored from a checkpoint.
+        :return:
+        """
+        self.plot_world(True)
+        for ship in self.current_vessels:
+            ship.ax = self.ax
+        for drone in self.drones:
+            drone.ax = self.ax
+
     def plot_world_update(self) -> None:
         if not constants.PLOTTING_MODE:
             return
@@ -212,16 +252,15 @@ class World:
         for drone in self.current_airborne_drones:
             drone.update_plot()
 
-        for receptor in self.receptor_grid.receptors:
-            receptor.update_plot(self.ax, self.receptor_grid.cmap)
+        self.receptor_grid.update_plot()
 
         self.fig.canvas.draw()
         self.fig.canvas.flush_events()
         plt.show()
 
-    def merchant_enters(self, merchant: Merchant) -> None:
-        merchant.enter_world(self)
-        self.current_vessels.append(merchant)
+    def merchant_enters(self, merchant: Merchant, entry_longitude: float = None) -> None:
+        merchant.enter_world(self, entry_longitude)
+        self.vessel_store.add(merchant)
 
     def launch_drone(self) -> None:
         t_0 = time.perf_counter()
@@ -231,37 +270,72 @@ class World:
         t_1 = time.perf_counter()
         constants.time_spent_launching_drones += (t_1 - t_0)
 
-    def calculate_ships_entering(self) -> int:
+    def create_arriving_merchants(self) -> None:
         """
-        Calculate number of ships entering in time period t.
-        :return: Integer number of ships entering
+        Creates the merchants that arrived since the last step according to the arrival schedule.
+        :return:
         """
-        # TODO: Sample from poisson with rate lambda as in overleaf
-        if np.random.rand() > 0.99:
-            return 1
-        else:
-            return 0
-
-    def create_arriving_merchants(self) -> None:
-        for _ in range(self.calculate_ships_entering()):
-            new_merchant = generate_random_merchant(self)
-            logger.debug(f"New ship: {new_merchant.ship_id} is entering the AoI")
-            self.merchant_enters(new_merchant)
+        for arrival_time, model, entry_longitude in self.arrival_schedule.pop_arrivals(self.world_time):
+            new_merchant = Merchant(model, self)
+            new_merchant.arrival_time = arrival_time
+            logger.debug("New ship: %s is entering the AoI", new_merchant.ship_id)
+            self.merchant_enters(new_merchant, entry_longitude)
 
-    def calculate_ship_movements(self) -> None:
+    def calculate_ship_movements(self, duration: float = None) -> None:
+        """
+        Moves all ships and removes the ones that left the world.
+        :param duration: Time to move the ships over, a single time delta if not provided
+        :return:
+        """
         ships_finished = []
 
-        for ship in self.current_vessels:
-            ship.make_move()
-            if ship.left_world:
-                ships_finished.append(ship)
+        if constants.VECTORIZED_SHIP_MOVEMENT:
+            if duration is None:
+                duration = self.time_delta
+            for ship in self.vessel_store.step(duration, self.projection):
+                ship.reached_end_of_route()
+                if ship.left_world:
+                    ships_finished.append(ship)
+            if constants.DEBUG_MODE:
+                for ship in self.current_vessels:
+                    ship.debug_unit()
+        else:
+            for ship in self.current_vessels:
+                if duration is None:
+                    ship.make_move()
+                else:
+                    ship.move(duration)
+                if ship.left_world:
+                    ships_finished.append(ship)
 
         # Remove ships that have reached their destination
         for ship in ships_finished:
-            self.current_vessels.remove(ship)
+            self.vessel_store.remove(ship)
+        self.ships_reached_destination += len(ships_finished)
 
     def ship_destroyed(self, ship: Ship) -> None:
-        self.current_vessels.remove(ship)
+        self.vessel_store.remove(ship)
+        self.ships_sunk += 1
+        if self.telemetry is not None:
+            self.telemetry.record_event("sunk", None, ship)
+
+    def register_detection(self, drone: Drone, ship: Ship) -> None:
+        self.detections += 1
+        if self.telemetry is not None:
+            self.telemetry.record_event("detection", drone, ship)
+
+    def register_attack(self, drone: Drone, ship: Ship, damage: float) -> None:
+        self.attacks += 1
+        if self.telemetry is not None:
+            self.telemetry.record_event("attack", drone, ship, damage)
+
+    def close(self) -> None:
+        """
+        Finishes the run, writes out the remaining telemetry.
+        :return:
+        """
+        if self.telemetry is not None:
+            self.telemetry.close()
 
     def calculate_drone_movements(self) -> None:
         for drone in self.current_airborne_drones:
@@ -271,14 +345,19 @@ class World:
         print(f"Starting iteration {self.world_time: .3f}")
         self.world_time += self.time_delta
 
-        self.update_weather_conditions()
+        if constants.DISCRETE_EVENT_MODE:
+            # Weather, maintenance and arrivals are handled through the event calendar
+            self.process_events()
+        else:
+            self.update_weather_conditions()
 
-        for uav in self.drones:
-            if uav.under_maintenance:
-                uav.check_if_complete_maintenance()
+            for uav in self.drones:
+                if uav.under_maintenance:
+                    uav.check_if_complete_maintenance()
 
         t_0 = time.perf_counter()
-        self.create_arriving_merchants()
+        if not constants.DISCRETE_EVENT_MODE:
+            self.create_arriving_merchants()
         self.calculate_ship_movements()
         t_1 = time.perf_counter()
         self.time_spent_on_navy += (t_1 - t_0)
@@ -291,6 +370,9 @@ class World:
 
         t_0 = time.perf_counter()
         self.receptor_grid.depreciate_pheromones()
+        if constants.PHEROMONE_DIFFUSION:
+            self.receptor_grid.diffuse_pheromones()
+        self.receptor_grid.update_pheromone_summaries()
         t_1 = time.perf_counter()
         constants.time_spent_depreciating_pheromones += (t_1 - t_0)
 
@@ -299,7 +381,168 @@ class World:
         t_1 = time.perf_counter()
         self.time_spent_plotting += (t_1 - t_0)
 
-        logger.debug(f"End of iteration {self.world_time: .3f} \n")
+        if self.telemetry is not None:
+            self.telemetry.record_step()
+
+        logger.debug("End of iteration % .3f \n", self.world_time)
+
+    def run(self, duration: float) -> None:
+        """
+        Runs the simulation for the given duration (in hours).
+        In discrete-event mode, periods in which all entities are in straight-line transit are jumped over
+        up to the step of the next event, otherwise the world is advanced one time step at a time.
+        :param duration: Time to simulate in hours
+        :return:
+        """
+        end_time = self.world_time + duration
+        last_checkpoint_time = self.world_time
+        while self.world_time + self.time_delta <= end_time + 1e-9:
+            if constants.DISCRETE_EVENT_MODE and self.only_transit_activity():
+                self.jump_to_next_event(end_time)
+            else:
+                self.time_step()
+
+            if (constants.CHECKPOINT_INTERVAL is not None and self.world_time - last_checkpoint_time
+                    >= constants.CHECKPOINT_INTERVAL * self.time_delta - 1e-9):
+                self.save_checkpoint()
+                last_checkpoint_time = self.world_time
+
+    def save_checkpoint(self, path: str = None) -> None:
+        """
+        Saves the full state of the world, see checkpoint.py
+        :param path: File to save to, a file in the checkpoint directory named after the world time if not provided
+        :return:
+        """
+        if path is None:
+            os.makedirs(constants.CHECKPOINT_DIRECTORY, exist_ok=True)
+            path = os.path.join(constants.CHECKPOINT_DIRECTORY, f"world_{self.world_time:.3f}.pkl.gz")
+        checkpoint.save_checkpoint(self, path)
+
+    def only_transit_activity(self) -> bool:
+        """
+        Checks if all activity in the world is straight-line transit - no drones are patrolling, trailing or
+        waiting to be launched, which would require decisions in every step.
+        :return:
+        """
+        for drone_type in self.drone_types:
+            if drone_type.can_launch():
+                return False
+
+        for drone in self.current_airborne_drones:
+            if not (drone.routing_to_start or drone.routing_to_base) or drone.trailing:
+                return False
+            if drone.transit_time_remaining() < self.time_delta:
+                return False
+        return True
+
+    def jump_to_next_event(self, end_time: float) -> None:
+        """
+        Jumps all entities in transit forward to the last step before the next event, then makes a regular step.
+        Merchants keep arriving during a jump, so the ships are still created and moved step by step, which is cheap
+        in the vessel store. Only the drones in transit and the pheromones are advanced over the whole jump at once,
+        or step by step when the telemetry records every step or the pheromones diffuse between the deposits.
+        The jump thus only saves time in idle periods, when the drones are in maintenance or in transit and no
+        launch or patrol decisions are due.
+        :param end_time: Time at which the run ends, the jump does not go beyond it
+        :return:
+        """
+        for drone in self.current_airborne_drones:
+            self.schedule_transit_event(drone)
+
+        # Arrivals are handled within the jump, they do not end it
+        next_time = min(self.event_calendar.next_event_time(ignored_kinds=[events.ARRIVAL]), end_time)
+        steps = max(1, int(np.floor((next_time - self.world_time) / self.time_delta + 1e-9)))
+        skipped_steps = steps - 1
+
+        if skipped_steps > 0:
+            logger.debug("Jumping %s steps from % .3f to next event at % .3f", skipped_steps, self.world_time,
+                         next_time)
+            if self.telemetry is None and not constants.PHEROMONE_DIFFUSION:
+                steps_per_transit_move = skipped_steps
+            else:
+                steps_per_transit_move = 1
+            for step in range(1, skipped_steps + 1):
+                self.world_time += self.time_delta
+
+                t_0 = time.perf_counter()
+                self.create_arriving_merchants()
+                self.calculate_ship_movements()
+                t_1 = time.perf_counter()
+                self.time_spent_on_navy += (t_1 - t_0)
+
+                if step % steps_per_transit_move == 0:
+                    self.fast_forward_transit(steps_per_transit_move)
+                    if self.telemetry is not None:
+                        self.telemetry.record_step()
+
+        self.time_step()
+
+    def fast_forward_transit(self, steps: int) -> None:
+        """
+        Moves the drones in transit and depreciates the pheromones over multiple time steps at once.
+        The pheromones are depreciated first, the drones depreciate what they spread in each step over the remaining
+        steps, which gives the same pheromones as depreciating after every step.
+        Diffusion is applied over all steps after the pheromones are spread, so it is only exact for a single step.
+        :param steps: Number of time steps
+        :return:
+        """
+        t_0 = time.perf_counter()
+        self.receptor_grid.depreciate_pheromones(steps=steps)
+        t_1 = time.perf_counter()
+        constants.time_spent_depreciating_pheromones += (t_1 - t_0)
+
+        t_0 = time.perf_counter()
+        depreciation_factor = self.receptor_grid.depreciation_factor()
+        for drone in self.current_airborne_drones:
+            drone.fast_forward(steps, depreciation_factor)
+        t_1 = time.perf_counter()
+        self.time_spent_on_UAVs += (t_1 - t_0)
+
+        t_0 = time.perf_counter()
+        if constants.PHEROMONE_DIFFUSION:
+            self.receptor_grid.diffuse_pheromones(steps=steps)
+        self.receptor_grid.update_pheromone_summaries()
+        t_1 = time.perf_counter()
+        constants.time_spent_depreciating_pheromones += (t_1 - t_0)
+
+    def schedule_transit_event(self, drone: Drone) -> None:
+        """
+        Schedules the event that ends the straight-line transit of a drone - reaching the end of its route,
+        or reaching the point from which it might have to return to base.
+        :param drone:
+        :return:
+        """
+        if drone.transit_event is not None and not drone.transit_event.cancelled:
+            return
+
+        time_to_end_of_route = drone.route_time_remaining()
+        time_in_transit = drone.transit_time_remaining()
+        if time_in_transit < time_to_end_of_route:
+            kind = events.ENDURANCE_LIMIT
+        else:
+            kind = events.WAYPOINT_REACHED
+        drone.transit_event = self.event_calendar.schedule(self.world_time + time_in_transit, kind, drone)
+
+    def process_events(self) -> None:
+        for event in self.event_calendar.pop_due_events(self.world_time):
+            self.handle_event(event)
+
+    def handle_event(self, event: events.Event) -> None:
+        logger.debug("Handling %s", event)
+        if event.kind == events.WEATHER_RESAMPLE:
+            self.update_weather_conditions()
+            self.event_calendar.schedule(self.time_last_weather_update + constants.WEATHER_RESAMPLING_TIME_SPLIT,
+                                         events.WEATHER_RESAMPLE)
+        elif event.kind == events.ARRIVAL:
+            self.create_arriving_merchants()
+            self.event_calendar.schedule(self.arrival_schedule.next_arrival_time(), events.ARRIVAL)
+        elif event.kind == events.MAINTENANCE_DONE:
+            event.entity.check_if_complete_maintenance()
+        elif event.kind in [events.WAYPOINT_REACHED, events.ENDURANCE_LIMIT]:
+            # Transit of the drone ends - it is handled by regular time steps from here on
+            event.entity.transit_event = None
+        else:
+            raise ValueError(f"Unexpected event kind {event.kind}")
 
     def update_weather_conditions(self):
         """
@@ -350,8 +593,8 @@ if __name__ == "__main__":
     t_0 = time.perf_counter()
     world = World(time_delta=0.2)
 
-    for z in range(10000):
-        world.time_step()
+    world.run(duration=10000 * world.time_delta)
+    world.close()
 
     # FOR TESTING PURPOSES
     # for uav in world.drones: